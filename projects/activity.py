@@ -0,0 +1,134 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from projects.models import TaskActivity
+
+logger = logging.getLogger(__name__)
+
+# TaskActivity.field of the stats.TaskState fields
+TRACKED_FIELDS = (
+    ('status', 'status'),
+    ('developer_id', 'developer'),
+    ('due_date', 'due_date'),
+)
+
+
+def _value(value):
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def activities(removed, added, actor_id=None):
+    """
+    Unsaved TaskActivity rows of the tracked fields which differ between the states of the same tasks,
+    created and deleted tasks have no activity
+    """
+    before = {state.id: state for state in removed if state.id is not None}
+    now = timezone.now()
+    rows = []
+    for state in added:
+        old = before.get(state.id)
+        if old is None:
+            continue
+        for attr, field in TRACKED_FIELDS:
+            if getattr(old, attr) != getattr(state, attr):
+                rows.append(TaskActivity(task_id=state.id, project_id=state.project_id, actor_id=actor_id,
+                                         field=field, old_value=_value(getattr(old, attr)),
+                                         new_value=_value(getattr(state, attr)), created_at=now))
+    return rows
+
+
+class ActivityBuffer:
+    """
+    Activity rows waiting to be written. A background thread writes them with one bulk_create
+    once settings.TASK_ACTIVITY_BUFFER_SIZE rows are buffered or the oldest one is
+    settings.TASK_ACTIVITY_FLUSH_SECONDS old, so the request changing a task only appends to a list.
+    Buffered rows are lost if the process dies before a flush.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # a forked worker starts with an empty buffer and its own thread, the rows belong to the parent
+        self.condition = threading.Condition()
+        self.rows = []
+        self.oldest = None
+        self.worker = None
+
+    def add(self, rows):
+        if not settings.TASK_ACTIVITY_BUFFER_SIZE:
+            TaskActivity.objects.bulk_create(rows)
+            return
+        with self.condition:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, name='task-activity-flush', daemon=True)
+                self.worker.start()
+            if not self.rows:
+                self.oldest = time.monotonic()
+            self.rows.extend(rows)
+            if len(self.rows) >= settings.TASK_ACTIVITY_BUFFER_SIZE:
+                self.condition.notify()
+
+    def take(self):
+        with self.condition:
+            rows, self.rows, self.oldest = self.rows, [], None
+        return rows
+
+    def wait(self):
+        """
+        Blocks until the buffered rows are due to be written
+        """
+        with self.condition:
+            while True:
+                timeout = None
+                if self.oldest is not None:
+                    timeout = self.oldest + settings.TASK_ACTIVITY_FLUSH_SECONDS - time.monotonic()
+                if len(self.rows) >= settings.TASK_ACTIVITY_BUFFER_SIZE or (timeout is not None and timeout <= 0):
+                    return
+                self.condition.wait(timeout)
+
+    def flush(self):
+        """
+        Writes the buffered rows, returns their number. Rows which cannot be written are logged and dropped,
+        this also runs at exit.
+        """
+        rows = self.take()
+        if not rows:
+            return 0
+        try:
+            TaskActivity.objects.bulk_create(rows)
+        except Exception:
+            logger.exception('Could not write the task activity, {} rows dropped'.format(len(rows)))
+            return 0
+        return len(rows)
+
+    def run(self):
+        while True:
+            self.wait()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+buffer = ActivityBuffer()
+os.register_at_fork(after_in_child=buffer.reset)
+atexit.register(buffer.flush)
+
+
+def capture(removed, added, actor_id=None):
+    """
+    Buffers the activity of a task write once its transaction commits
+    """
+    rows = activities(removed, added, actor_id)
+    if rows:
+        transaction.on_commit(lambda: buffer.add(rows))
@@ -1,7 +1,14 @@
 from django.contrib import admin
 
-from .models import Project, Task
+from .models import DeveloperTaskStats, OutgoingEmail, Project, ProjectStats, Task, TaskActivity, TaskImportJob, \
+    TaskNotification
 
 admin.site.register(Project)
 admin.site.register(Task)
+admin.site.register(TaskNotification)
+admin.site.register(OutgoingEmail)
+admin.site.register(ProjectStats)
+admin.site.register(DeveloperTaskStats)
+admin.site.register(TaskImportJob)
+admin.site.register(TaskActivity)
 # Register your models here.
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Envelope:
+    """
+    A message of a channel, shared by all its subscribers: body caches the message rendered for the client
+    """
+    __slots__ = ('channel', 'message', 'body')
+
+    def __init__(self, channel, message):
+        self.channel = channel
+        self.message = message
+        self.body = None
+
+
+# put in a subscription queue instead of the messages it had no room for, the client has to refetch
+RESET = Envelope(None, 'reset')
+KEEPALIVE = Envelope(None, 'keepalive')
+
+
+def project_channel(project_id):
+    return 'project:{}'.format(project_id)
+
+
+def user_channel(user_id):
+    return 'user:{}'.format(user_id)
+
+
+class Subscription:
+    """
+    Messages of some channels for a stream running on an event loop, at most
+    settings.TASK_EVENTS_QUEUE_SIZE of them are queued for a slow client
+    """
+
+    def __init__(self, channels, loop):
+        self.channels = tuple(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=settings.TASK_EVENTS_QUEUE_SIZE)
+
+    def put(self, item):
+        # called on the event loop of the subscription, None ends the stream
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            if item is not None:
+                item = RESET
+        self.queue.put_nowait(item)
+
+    def close(self):
+        self.put(None)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Hub:
+    """
+    In-process pub/sub of the event streams. dispatch() can be called from any thread,
+    each event loop with subscribers to the channel is woken once per message.
+    A timer per event loop sends the keepalives of all its subscriptions.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+        self.loops = defaultdict(set)
+
+    def subscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                self.channels[channel].add(subscription)
+            start_keepalive = subscription.loop not in self.loops
+            self.loops[subscription.loop].add(subscription)
+        if start_keepalive:
+            subscription.loop.call_soon_threadsafe(self.schedule_keepalive, subscription.loop)
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.channels[channel]
+            self.loops.get(subscription.loop, set()).discard(subscription)
+
+    def subscriber_count(self):
+        with self.lock:
+            return sum(len(subscriptions) for subscriptions in self.loops.values())
+
+    def schedule_keepalive(self, loop):
+        loop.call_later(settings.TASK_EVENTS_KEEPALIVE_SECONDS, self.keepalive, loop)
+
+    def keepalive(self, loop):
+        with self.lock:
+            subscriptions = list(self.loops[loop])
+            if not subscriptions:
+                # the next subscription of the loop starts the timer again
+                del self.loops[loop]
+                return
+        self._deliver(subscriptions, KEEPALIVE)
+        self.schedule_keepalive(loop)
+
+    @staticmethod
+    def _deliver(subscriptions, item):
+        for subscription in subscriptions:
+            subscription.put(item)
+
+    def dispatch(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.channels.get(channel, ()))
+        by_loop = defaultdict(list)
+        for subscription in subscriptions:
+            by_loop[subscription.loop].append(subscription)
+        envelope = Envelope(channel, message)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver, group, envelope)
+            except RuntimeError:
+                # the loop is closed, its streams are gone
+                for subscription in group:
+                    self.unsubscribe(subscription)
+
+
+hub = Hub()
+
+
+class LocalBackend:
+    """
+    Delivers the messages published after their transaction commits to the streams of this process only
+    """
+
+    def publish(self, channel, message):
+        transaction.on_commit(lambda: hub.dispatch(channel, message))
+
+    def listen(self):
+        pass
+
+
+class PostgresBackend:
+    """
+    Publishes with NOTIFY in the transaction of the change, so every process listening on the database
+    gets the messages once it commits. A thread per listening process dispatches them to its hub.
+    """
+    channel = 'task_events'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listener = None
+
+    def publish(self, channel, message):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', (self.channel, json.dumps([channel, message])))
+
+    def listen(self):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.run, name='task-events-listen', daemon=True)
+                self.listener.start()
+
+    def receive(self):
+        wrapper = connections['default']
+        pg_connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            pg_connection.autocommit = True
+            with pg_connection.cursor() as cursor:
+                cursor.execute('LISTEN {}'.format(self.channel))
+            while True:
+                select.select([pg_connection], [], [])
+                pg_connection.poll()
+                while pg_connection.notifies:
+                    channel, message = json.loads(pg_connection.notifies.pop(0).payload)
+                    hub.dispatch(channel, message)
+        finally:
+            pg_connection.close()
+
+    def run(self):
+        while True:
+            try:
+                self.receive()
+            except Exception:
+                logger.exception('Task events listener failed, reconnecting')
+                time.sleep(1)
+
+
+_backend = None
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.TASK_EVENTS_BACKEND)()
+    return _backend
+
+
+def publish(channel, message):
+    backend().publish(channel, message)
+
+
+def _task_event(event_type, state):
+    return {
+        'type': event_type,
+        'id': state.id,
+        'status': state.status,
+        'developer': state.developer_id,
+        'due_date': state.due_date.isoformat(),
+    }
+
+
+def task_events(removed, added):
+    """
+    {project id: events} of a task write, from the stats.TaskState of the tasks before and after it.
+    Tasks created without ids (SQLite bulk_create, COPY imports) cannot be sent, the clients of their
+    projects get a single reset event instead and refetch the tasks.
+    """
+    before = {state.id for state in removed}
+    after = {state.id for state in added if state.id is not None}
+    events = defaultdict(list)
+    reset = set()
+    for state in added:
+        if state.id is None:
+            reset.add(state.project_id)
+            continue
+        event_type = 'task.updated' if state.id in before else 'task.created'
+        events[state.project_id].append(_task_event(event_type, state))
+    for state in removed:
+        if state.id not in after:
+            events[state.project_id].append(_task_event('task.deleted', state))
+    for project_id in reset:
+        events[project_id] = [{'type': 'reset', 'detail': 'Tasks were created, refetch the tasks.'}]
+    return events
+
+
+def publish_task_events(removed, added):
+    batch_size = settings.TASK_EVENTS_BATCH_SIZE
+    for project_id, events in task_events(removed, added).items():
+        for start in range(0, len(events), batch_size):
+            publish(project_channel(project_id), events[start:start + batch_size])
+
+
+def publish_membership_changes(user_ids):
+    """
+    Streams of the users re-check their membership
+    """
+    for user_id in user_ids:
+        publish(user_channel(user_id), 'membership')
@@ -0,0 +1,130 @@
+import datetime
+
+import django_filters
+from django import forms
+from django.db.models import Q
+
+from projects.models import Task
+
+# orderings of the task list, each followed by the columns of the index serving it
+TASK_ORDERINGS = {
+    'due_date': ('due_date', 'id'),
+    'status': ('status', 'due_date', 'id'),
+    'id': ('id', ),
+}
+
+# (filters, orderings, index) of the task list queries served by an index.
+# A developer (or unassigned) filter narrows the query to the developer's tasks through
+# task_developer_status and allows any other filter and ordering.
+TASK_LIST_INDEXES = (
+    (set(), {'due_date'}, 'task_project_due_date_id'),
+    ({'due_range'}, {'due_date'}, 'task_project_due_date_id'),
+    (set(), {'id'}, 'task_project_id'),
+    (set(), {'status'}, 'task_project_status_due_date'),
+    ({'status'}, {'due_date', 'status'}, 'task_project_status_due_date'),
+    ({'status', 'due_range'}, {'due_date', 'status'}, 'task_project_status_due_date'),
+    ({'statuses'}, {'status'}, 'task_project_status_due_date'),
+    ({'statuses', 'due_range'}, {'status'}, 'task_project_status_due_date'),
+    ({'overdue'}, {'due_date'}, 'task_project_open_due_date'),
+    ({'overdue', 'due_range'}, {'due_date'}, 'task_project_open_due_date'),
+)
+
+
+def task_list_index(data):
+    """
+    Name of the index serving the cleaned filter data, None for an unsupported combination
+    """
+    # ?unassigned=false does not narrow the query to one developer
+    if data.get('developer') is not None or data.get('unassigned') is True:
+        return 'task_developer_status'
+    filters = set()
+    statuses = data.get('status') or []
+    if len(statuses) == 1:
+        filters.add('status')
+    elif statuses:
+        filters.add('statuses')
+    if any(data.get(name) is not None for name in ('due_date', 'due_after', 'due_before')):
+        filters.add('due_range')
+    if data.get('overdue'):
+        filters.add('overdue')
+    ordering = (data.get('ordering') or ['due_date'])[0].lstrip('-')
+    for supported_filters, orderings, index in TASK_LIST_INDEXES:
+        if filters == supported_filters and ordering in orderings:
+            return index
+    return None
+
+
+class TaskFilterForm(forms.Form):
+
+    def clean(self):
+        data = super().clean()
+        if len(data.get('ordering') or []) > 1:
+            raise forms.ValidationError('Order by one field only.')
+        if task_list_index(data) is None:
+            raise forms.ValidationError('This combination of filters and ordering is not supported.')
+        return data
+
+
+class TaskOrderingFilter(django_filters.OrderingFilter):
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        field = value[0]
+        prefix = '-' if field.startswith('-') else ''
+        return qs.order_by(*(prefix + column for column in TASK_ORDERINGS[field.lstrip('-')]))
+
+
+class TaskFilter(django_filters.FilterSet):
+    """
+    Filters of the task list and export: ?status= (repeatable), ?developer=, ?unassigned=true,
+    ?due_date=, ?due_after= and ?due_before= (both inclusive), ?overdue=true and
+    ?ordering=[-]due_date|status|id. Combinations no index can serve are rejected, see TASK_LIST_INDEXES.
+    """
+    status = django_filters.MultipleChoiceFilter(choices=Task.TASK_STATUSES)
+    developer = django_filters.NumberFilter(field_name='developer_id')
+    unassigned = django_filters.BooleanFilter(field_name='developer', lookup_expr='isnull')
+    due_after = django_filters.DateFilter(field_name='due_date', lookup_expr='gte')
+    due_before = django_filters.DateFilter(field_name='due_date', lookup_expr='lte')
+    overdue = django_filters.BooleanFilter(method='filter_overdue')
+    ordering = TaskOrderingFilter(fields=tuple((field, field) for field in TASK_ORDERINGS))
+
+    class Meta:
+        model = Task
+        form = TaskFilterForm
+        fields = (
+            'status',
+            'developer',
+            'unassigned',
+            'due_date',
+            'due_after',
+            'due_before',
+            'overdue',
+        )
+
+    def filter_overdue(self, queryset, name, value):
+        overdue = Q(due_date__lt=datetime.date.today()) & ~Q(status='Done')
+        return queryset.filter(overdue) if value else queryset
+
+
+class DeveloperTaskFilter(django_filters.FilterSet):
+    """
+    Filters of the caller's task list across projects: ?status= (repeatable), ?due_after=,
+    ?due_before=, ?overdue=true and ?ordering=[-]due_date, all served by task_developer_due_date_id
+    """
+    status = django_filters.MultipleChoiceFilter(choices=Task.TASK_STATUSES)
+    due_after = django_filters.DateFilter(field_name='due_date', lookup_expr='gte')
+    due_before = django_filters.DateFilter(field_name='due_date', lookup_expr='lte')
+    overdue = django_filters.BooleanFilter(method='filter_overdue')
+    ordering = TaskOrderingFilter(fields=(('due_date', 'due_date'), ))
+
+    class Meta:
+        model = Task
+        fields = (
+            'status',
+            'due_after',
+            'due_before',
+            'overdue',
+        )
+
+    filter_overdue = TaskFilter.filter_overdue
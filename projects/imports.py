@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from projects.membership import project_user_types
+from projects.models import Project, Task
+from projects.serializers.task_serializers import BulkCreateTaskSerializer
+from projects.signals import tasks_changed
+from projects.stats import task_state
+
+
+def read_rows(file, file_format):
+    """
+    (line number, item) of an uploaded file, read as a stream. item is None for an unparsable line.
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            item = None
+        yield number, item if isinstance(item, dict) else None
+
+
+def _developer_ids(items):
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item.get('developer')))
+        except (AttributeError, TypeError, ValueError):
+            pass
+    return ids
+
+
+def _copy_value(field, task):
+    value = field.get_db_prep_save(field.pre_save(task, add=True), connection)
+    if value is None:
+        # unquoted empty is NULL in COPY csv, quoted values never are
+        return ''
+    return '"{}"'.format(str(value).replace('"', '""'))
+
+
+def copy_tasks(tasks):
+    """
+    Writes the tasks with PostgreSQL COPY, which skips the per-row INSERT overhead
+    """
+    fields = [field for field in Task._meta.concrete_fields if not field.primary_key]
+    buffer = io.StringIO()
+    for task in tasks:
+        # COPY skips TaskQuerySet.bulk_create, which schedules the reminders
+        task.remind_on = task.reminder_date()
+        buffer.write(','.join(_copy_value(field, task) for field in fields))
+        buffer.write('\n')
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.copy_expert('COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            quote(Task._meta.db_table), ', '.join(quote(field.column) for field in fields)), buffer)
+
+
+def write_tasks(tasks):
+    if connection.vendor == 'postgresql':
+        copy_tasks(tasks)
+    else:
+        Task.objects.bulk_create(tasks, batch_size=settings.TASK_BULK_BATCH_SIZE)
+    tasks_changed.send(sender=Task, removed=[], added=[task_state(task) for task in tasks])
+
+
+class TaskImporter:
+    """
+    Validates and writes the rows of an import job batch by batch, saving the progress after each one
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.errors = json.loads(job.errors)
+        # developers of the project are preloaded, other ids are looked up once per batch
+        members = Project.members.through.objects.filter(project_id=job.project_id).values('user_id')
+        self.developers = project_user_types(job.project_id, members)
+        self.checked = set(self.developers)
+
+    def run(self):
+        with self.job.file.open('rb') as file:
+            rows = read_rows(file, self.job.format)
+            while True:
+                batch = list(islice(rows, settings.TASK_IMPORT_BATCH_SIZE))
+                if not batch:
+                    break
+                self.import_batch(batch)
+
+    def import_batch(self, batch):
+        unknown = _developer_ids(item for _, item in batch if item is not None) - self.checked
+        if unknown:
+            self.developers.update(project_user_types(self.job.project_id, unknown))
+            self.checked |= unknown
+        context = {'developers': self.developers, 'project_id': self.job.project_id}
+        tasks = []
+        for line, item in batch:
+            if item is None:
+                self.error(line, {'non_field_errors': ['Invalid row.']})
+                continue
+            serializer = BulkCreateTaskSerializer(data=item, context=context)
+            if serializer.is_valid():
+                tasks.append(serializer.build())
+            else:
+                self.error(line, serializer.errors)
+        with transaction.atomic():
+            if tasks:
+                write_tasks(tasks)
+            self.job.processed += len(batch)
+            self.job.created += len(tasks)
+            self.job.errors = json.dumps(self.errors)
+            self.job.save(update_fields=['processed', 'created', 'failed', 'errors'])
+
+    def error(self, line, errors):
+        self.job.failed += 1
+        if len(self.errors) < settings.TASK_IMPORT_MAX_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+
+def _finish(job, status, *fields):
+    job.status = status
+    job.finished_at = timezone.now()
+    # the upload is not needed once the job is over
+    job.file.delete(save=False)
+    job.save(update_fields=['status', 'finished_at', 'file'] + list(fields))
+
+
+def run_import(job):
+    job.status = 'Running'
+    job.save(update_fields=['status'])
+    try:
+        TaskImporter(job).run()
+    except Exception as error:
+        job.errors = json.dumps(json.loads(job.errors) + [{'line': None, 'errors': {'detail': [str(error)]}}])
+        _finish(job, 'Failed', 'errors')
+        raise
+    _finish(job, 'Done')
@@ -0,0 +1,208 @@
+import datetime
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from projects.models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_mass_mail(datatuple):
+    """
+    Same arguments as django.core.mail.send_mass_mail, but writes the messages to the outbox.
+    Call it inside the transaction of the change the emails are about.
+    """
+    emails = OutgoingEmail.objects.bulk_create([
+        OutgoingEmail(subject=subject,
+                      body=body,
+                      from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+                      recipients=','.join(recipient_list))
+        for subject, body, from_email, recipient_list in datatuple
+    ])
+    return len(emails)
+
+
+class TokenBucket:
+    """
+    Allows `rate` sends per second on average with bursts of up to `capacity`
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def take(self):
+        """
+        Blocks until a token is available and consumes it
+        """
+        with self.lock:
+            self._refill()
+            while self.tokens < 1:
+                self.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class ConnectionPool:
+    """
+    Keeps up to `size` open email backend connections for reuse between batches
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.created < self.size:
+                connection = get_connection()
+                connection.open()
+                self.created += 1
+                return connection
+        return self.idle.get()
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self.lock:
+            self.created -= 1
+
+    @contextmanager
+    def connection(self):
+        connection = self._acquire()
+        try:
+            yield connection
+        except Exception:
+            # the connection may be half broken after an SMTP error, do not reuse it
+            self._discard(connection)
+            raise
+        self.idle.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self.idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+_pool = None
+_bucket = None
+
+
+def default_pool():
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(settings.OUTBOX_POOL_SIZE)
+    return _pool
+
+
+def default_bucket():
+    global _bucket
+    if _bucket is None:
+        _bucket = TokenBucket(settings.OUTBOX_SEND_RATE, settings.OUTBOX_SEND_BURST)
+    return _bucket
+
+
+def retry_delay(attempts):
+    return datetime.timedelta(seconds=settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def claim_outbox(batch_size):
+    """
+    Due outbox emails, claimed by moving their next attempt OUTBOX_CLAIM_SECONDS ahead
+    so other dispatchers skip them. The rows are locked for the claim only.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(OutgoingEmail.objects.select_for_update(skip_locked=True)
+                      .filter(status='Pending', next_attempt_at__lte=now)
+                      .order_by('next_attempt_at', 'id')[:batch_size])
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails])\
+            .update(next_attempt_at=now + datetime.timedelta(seconds=settings.OUTBOX_CLAIM_SECONDS))
+    return emails
+
+
+def dispatch_outbox(batch_size=None, pool=None, bucket=None):
+    """
+    Sends one batch of due outbox emails, at least once: the emails of a dispatcher dying
+    before it records the sends are claimed again once their claim expires.
+    Failed sends are retried with exponential backoff until OUTBOX_MAX_ATTEMPTS is reached.
+    Returns a report of the batch.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    pool = pool or default_pool()
+    bucket = bucket or default_bucket()
+    report = {'fetched': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'send_seconds': 0.0}
+    emails = claim_outbox(batch_size)
+    report['fetched'] = len(emails)
+    for email in emails:
+        bucket.take()
+        started = time.monotonic()
+        try:
+            with pool.connection() as connection:
+                connection.send_messages([email.message(connection)])
+        except Exception as error:
+            email.attempts += 1
+            email.last_error = str(error)
+            if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                email.status = 'Failed'
+                report['failed'] += 1
+            else:
+                email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+                report['retried'] += 1
+            logger.warning("Sending outbox email {} failed: {}".format(email.id, error))
+        else:
+            email.attempts += 1
+            email.status = 'Sent'
+            email.sent_at = timezone.now()
+            report['sent'] += 1
+        report['send_seconds'] += time.monotonic() - started
+    OutgoingEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return report
+
+
+def outbox_stats():
+    """
+    Queue depth and latency figures of the outbox
+    """
+    now = timezone.now()
+    pending = OutgoingEmail.objects.filter(status='Pending')
+    oldest = pending.aggregate(oldest=Min('created_at'))['oldest']
+    recent = OutgoingEmail.objects.filter(status='Sent').order_by('-id')\
+        .values_list('created_at', 'sent_at')[:settings.OUTBOX_BATCH_SIZE]
+    latencies = [(sent_at - created_at).total_seconds() for created_at, sent_at in recent]
+    return {
+        'queue_depth': pending.count(),
+        'due': pending.filter(next_attempt_at__lte=now).count(),
+        'failed': OutgoingEmail.objects.filter(status='Failed').count(),
+        'oldest_pending_seconds': (now - oldest).total_seconds() if oldest else 0,
+        'avg_send_latency_seconds': sum(latencies) / len(latencies) if latencies else 0,
+    }
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from projects.models import Project, Task
+from projects.views.task_views import TaskListAPIView
+from users.authentication import CachedTokenAuthentication
+from users.jwt import JWTClaimsAuthentication, issue_tokens
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compares requests per second of the task list with token, cached token and JWT authentication. ' \
+           'Seeds the data inside a transaction which is rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def seed(self):
+        developer = User.objects.create(username='bench_developer', email='bench@example.com',
+                                        user_type='Developer')
+        project = Project.objects.create(title='bench', description='authentication benchmark')
+        project.members.add(developer)
+        Task.objects.bulk_create([Task(title='task {}'.format(number), description='', developer=developer,
+                                       project=project) for number in range(10)])
+        return developer, project
+
+    def timed(self, authentication_class, header, project, requests):
+        """
+        Requests per second and queries per request of the task list
+        """
+        view = TaskListAPIView.as_view(authentication_classes=(authentication_class, ))
+        url = '/api/projects/{}/tasks/'.format(project.id)
+
+        def get():
+            response = view(self.factory.get(url, HTTP_AUTHORIZATION=header, HTTP_HOST='localhost'),
+                            project_id=project.id)
+            assert response.status_code == 200, response.data
+
+        get()
+        with CaptureQueriesContext(connection) as queries:
+            get()
+        started = time.perf_counter()
+        for _ in range(requests):
+            get()
+        return requests / (time.perf_counter() - started), len(queries)
+
+    def handle(self, *args, **options):
+        self.factory = APIRequestFactory()
+        with transaction.atomic():
+            developer, project = self.seed()
+            token = Token.objects.create(user=developer)
+            modes = (
+                ('token', TokenAuthentication, 'Token ' + token.key),
+                ('cached token', CachedTokenAuthentication, 'Token ' + token.key),
+                ('jwt', JWTClaimsAuthentication, 'Bearer ' + issue_tokens(developer)['access']),
+            )
+            caches[settings.LIST_RESPONSE_CACHE].clear()
+            self.stdout.write('{:>14} {:>14} {:>18}'.format('auth', 'requests/s', 'queries/request'))
+            for name, authentication_class, header in modes:
+                per_second, queries = self.timed(authentication_class, header, project, options['requests'])
+                self.stdout.write('{:>14} {:>14.0f} {:>18}'.format(name, per_second, queries))
+            transaction.set_rollback(True)
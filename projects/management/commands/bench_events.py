@@ -0,0 +1,114 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from projects import events
+from projects.streams import TaskEventStream
+
+BENCH_PROJECT_ID = 0
+
+
+class BenchStream(TaskEventStream):
+    """
+    The task event stream without the authorization, which is not measured
+    """
+
+    async def authorize(self, scope, project_id):
+        return SimpleNamespace(pk=0), None
+
+
+class BenchClient:
+    """
+    An idle SSE client recording when it receives each event
+    """
+
+    def __init__(self, received):
+        self.disconnected = asyncio.Event()
+        self.received = received
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        body = message.get('body', b'')
+        if body.startswith(b'event:'):
+            data = json.loads(body.split(b'\ndata: ', 1)[1])
+            self.received(data['id'], time.perf_counter())
+
+
+class Command(BaseCommand):
+    help = 'Measures the fan-out latency of the task event streams: the time from publishing a task event ' \
+           'in a worker thread to its delivery to every idle subscriber of the project.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, nargs='+', default=[100, 1000, 5000])
+        parser.add_argument('--rounds', type=int, default=20)
+
+    async def bench(self, subscribers, rounds):
+        loop = asyncio.get_event_loop()
+        stream = BenchStream()
+        published = {}
+        latencies = []
+        last_delivery = []
+        pending = {'count': 0, 'done': None}
+
+        def received(round_number, at):
+            latencies.append(at - published[round_number])
+            pending['count'] -= 1
+            if not pending['count']:
+                last_delivery.append(at - published[round_number])
+                pending['done'].set()
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        clients = [BenchClient(received) for _ in range(subscribers)]
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/projects/{}/events/'.format(BENCH_PROJECT_ID)}
+        streams = [loop.create_task(stream(scope, client.receive, client.send)) for client in clients]
+        while events.hub.subscriber_count() < subscribers:
+            await asyncio.sleep(0.01)
+        memory = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+        tracemalloc.stop()
+        threads = threading.active_count()
+
+        for round_number in range(rounds):
+            pending['count'] = subscribers
+            pending['done'] = asyncio.Event()
+            message = [{'type': 'task.updated', 'id': round_number}]
+            published[round_number] = time.perf_counter()
+            # published from another thread, as a request committing a task change would
+            await loop.run_in_executor(None, events.hub.dispatch, events.project_channel(BENCH_PROJECT_ID), message)
+            await pending['done'].wait()
+
+        for client in clients:
+            client.disconnected.set()
+        await asyncio.gather(*streams)
+        return latencies, last_delivery, memory, threads
+
+    def handle(self, *args, **options):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.stdout.write('{:>12} {:>10} {:>10} {:>10} {:>14} {:>12} {:>8}'.format(
+            'subscribers', 'p50 ms', 'p99 ms', 'max ms', 'last p50 ms', 'KB/stream', 'threads'))
+        try:
+            for subscribers in options['subscribers']:
+                latencies, last_delivery, memory, threads = loop.run_until_complete(
+                    self.bench(subscribers, options['rounds']))
+                latencies.sort()
+                self.stdout.write('{:>12} {:>10.2f} {:>10.2f} {:>10.2f} {:>14.2f} {:>12.2f} {:>8}'.format(
+                    subscribers,
+                    statistics.median(latencies) * 1000,
+                    latencies[int(len(latencies) * 0.99) - 1] * 1000,
+                    latencies[-1] * 1000,
+                    statistics.median(last_delivery) * 1000,
+                    memory / subscribers / 1024,
+                    threads,
+                ))
+        finally:
+            loop.close()
@@ -0,0 +1,79 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from projects.models import Project, Task
+from projects.pagination import KeysetPagination
+from projects.views.task_views import TaskListAPIView
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compares page number and cursor pagination of the task list at deep pages. ' \
+           'Seeds the data inside a transaction which is rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 100, 1000, 10000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def seed(self, rows):
+        developer = User.objects.create(username='bench_developer', email='bench@example.com',
+                                        user_type='Developer')
+        project = Project.objects.create(title='bench', description='pagination benchmark')
+        project.members.add(developer)
+        today = datetime.date.today()
+        batch = []
+        for number in range(rows):
+            batch.append(Task(title='task {}'.format(number), description='',
+                              due_date=today + datetime.timedelta(days=number % 365),
+                              developer=developer, project=project))
+            if len(batch) == 1000:
+                Task.objects.bulk_create(batch)
+                batch = []
+        Task.objects.bulk_create(batch)
+        return developer, project
+
+    def timed(self, developer, project, params, repeat):
+        """
+        Best time in milliseconds of a task list request
+        """
+        view = TaskListAPIView.as_view()
+        best = None
+        for _ in range(repeat):
+            request = self.factory.get('/api/projects/{}/tasks/'.format(project.id), params, HTTP_HOST='localhost')
+            force_authenticate(request, user=developer)
+            # the task list responses are cached, the queries are what is measured
+            caches[settings.LIST_RESPONSE_CACHE].clear()
+            started = time.perf_counter()
+            response = view(request, project_id=project.id)
+            elapsed = time.perf_counter() - started
+            assert response.status_code == 200, response.data
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000
+
+    def handle(self, *args, **options):
+        page_size = api_settings.PAGE_SIZE
+        pages = sorted(options['pages'])
+        self.factory = APIRequestFactory()
+        with transaction.atomic():
+            developer, project = self.seed(pages[-1] * page_size)
+            tasks = Task.objects.filter(project=project).order_by('due_date', 'id')
+            self.stdout.write('{:>8} {:>14} {:>14}'.format('page', 'page number ms', 'cursor ms'))
+            for page in pages:
+                by_number = self.timed(developer, project, {'page': page}, options['repeat'])
+                if page == 1:
+                    cursor_params = {'pagination': 'cursor'}
+                else:
+                    previous = tasks.values_list('due_date', 'id')[(page - 1) * page_size - 1]
+                    cursor_params = {'cursor': KeysetPagination.encode_cursor(
+                        [previous[0].isoformat(), previous[1]])}
+                by_cursor = self.timed(developer, project, cursor_params, options['repeat'])
+                self.stdout.write('{:>8} {:>14.2f} {:>14.2f}'.format(page, by_number, by_cursor))
+            transaction.set_rollback(True)
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from projects.models import Project, Task
+from projects.views.project_views import ProjectDetailView, ProjectListAPIView, ProjectStatsAPIView
+from projects.views.task_views import TaskDetailView, TaskListAPIView
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Counts the queries of the project and task views for users of more and more projects, ' \
+           'with cold membership and response caches. ' \
+           'Seeds the data inside a transaction which is rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, nargs='+', default=[1, 10, 100])
+        parser.add_argument('--members', type=int, default=20)
+
+    def seed(self, projects, members):
+        prefix = 'bench_user_{}_'.format(projects)
+        User.objects.bulk_create([
+            User(username=prefix + str(number), email='{}{}@example.com'.format(prefix, number),
+                 user_type='Developer')
+            for number in range(members)
+        ])
+        users = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+        created = [Project.objects.create(title='bench {}'.format(number), description='scoping benchmark')
+                   for number in range(projects)]
+        for project in created:
+            project.members.add(*users)
+        Task.objects.bulk_create([Task(title='task', description='', developer=users[0], project=project)
+                                  for project in created for _ in range(10)])
+        return users[0], created[-1], Task.objects.filter(project=created[-1]).first()
+
+    def queries(self, view_class, user, **kwargs):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        caches[settings.LIST_RESPONSE_CACHE].clear()
+        request = self.factory.get('/', HTTP_HOST='localhost')
+        force_authenticate(request, user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = view_class.as_view()(request, **kwargs)
+            response.render()
+        assert response.status_code == 200, response.data
+        return len(queries)
+
+    def handle(self, *args, **options):
+        self.factory = APIRequestFactory()
+        sizes = options['projects']
+        rows = []
+        with transaction.atomic():
+            for size in sizes:
+                user, project, task = self.seed(size, options['members'])
+                rows.append([
+                    self.queries(ProjectListAPIView, user),
+                    self.queries(ProjectDetailView, user, pk=project.pk),
+                    self.queries(ProjectStatsAPIView, user, pk=project.pk),
+                    self.queries(TaskListAPIView, user, project_id=project.pk),
+                    self.queries(TaskDetailView, user, project_id=project.pk, pk=task.pk),
+                ])
+            transaction.set_rollback(True)
+        names = ('project list', 'project detail', 'project stats', 'task list', 'task detail')
+        self.stdout.write('{:>16}'.format('projects') + ''.join('{:>8}'.format(size) for size in sizes))
+        for index, name in enumerate(names):
+            self.stdout.write('{:>16}'.format(name) + ''.join('{:>8}'.format(row[index]) for row in rows))
@@ -0,0 +1,65 @@
+import datetime
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from projects.models import Project, Task
+from projects.serializers.fast import compile_fields, fast_representation
+from projects.serializers.task_serializers import TaskSerializer
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compares the throughput of TaskSerializer and the fast list path at several page sizes. ' \
+           'Seeds the data inside a transaction which is rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def seed(self, rows):
+        developer = User.objects.create(username='bench_developer', email='bench@example.com',
+                                        user_type='Developer')
+        project = Project.objects.create(title='bench', description='serializer benchmark')
+        today = datetime.date.today()
+        Task.objects.bulk_create([
+            Task(title='task {}'.format(number), description='benchmark task',
+                 due_date=today + datetime.timedelta(days=number % 365),
+                 developer=developer if number % 2 else None, project=project)
+            for number in range(rows)
+        ])
+        return project
+
+    def timed(self, page, repeat):
+        """
+        Best time in seconds of building a page, and the page
+        """
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = page()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['rows'])
+        mapping = compile_fields(TaskSerializer)
+        columns = [source for _, source, _ in mapping]
+        with transaction.atomic():
+            project = self.seed(sizes[-1])
+            tasks = Task.objects.filter(project=project).order_by('due_date', 'id')
+            self.stdout.write('{:>6} {:>18} {:>18} {:>8}'.format('rows', 'serializer rows/s', 'fast rows/s',
+                                                                 'speedup'))
+            for size in sizes:
+                slow, slow_data = self.timed(lambda: TaskSerializer(tasks[:size], many=True).data, options['repeat'])
+                fast, fast_data = self.timed(lambda: fast_representation(mapping, tasks.values(*columns)[:size]),
+                                             options['repeat'])
+                assert json.dumps(slow_data, cls=JSONEncoder) == json.dumps(fast_data, cls=JSONEncoder)
+                self.stdout.write('{:>6} {:>18.0f} {:>18.0f} {:>7.1f}x'.format(size, size / slow, size / fast,
+                                                                               slow / fast))
+            transaction.set_rollback(True)
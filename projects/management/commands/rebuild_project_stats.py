@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+from projects.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the task stats of all projects, or of the given ones, from their tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_ids', type=int, nargs='*')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by('id')
+        if options['project_ids']:
+            projects = projects.filter(id__in=options['project_ids'])
+        rebuilt = 0
+        for project_id in projects.values_list('id', flat=True).iterator():
+            rebuild(project_id)
+            rebuilt += 1
+        self.stdout.write('Rebuilt the stats of {} projects'.format(rebuilt))
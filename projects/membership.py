@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import BooleanField, Case, Exists, OuterRef, Value, When
+
+from projects import events
+from projects.models import Project
+from users import caching
+from users.jwt import mark_claims_stale
+from users.models import User
+
+
+def _cache():
+    return caches[settings.PROJECT_MEMBERSHIP_CACHE]
+
+
+def _key(user_id):
+    return 'project_ids:{}'.format(user_id)
+
+
+def user_project_ids(user_id):
+    """
+    Ids of the projects the user is a member of, cached until the membership changes
+    """
+    cache = _cache()
+    project_ids = cache.get(_key(user_id))
+    if project_ids is None:
+        project_ids = frozenset(Project.members.through.objects.filter(user_id=user_id)
+                                .values_list('project_id', flat=True))
+        cache.set(_key(user_id), project_ids)
+    return project_ids
+
+
+def member_project_ids(user):
+    """
+    Ids of the projects of an authenticated user, from the token claims for a JWT user
+    """
+    project_ids = getattr(user, 'project_ids', None)
+    return user_project_ids(user.pk) if project_ids is None else project_ids
+
+
+def is_project_member(user, project_id):
+    if user is None or not user.is_authenticated:
+        return False
+    return int(project_id) in member_project_ids(user)
+
+
+def membership(user, project_ref='pk'):
+    """
+    Membership of the user in the project referenced by the query: an EXISTS subquery,
+    or the project ids of the token claims for a JWT user
+    """
+    project_ids = getattr(user, 'project_ids', None)
+    if project_ids is not None:
+        return Case(When(**{project_ref + '__in': sorted(project_ids), 'then': Value(True)}),
+                    default=Value(False), output_field=BooleanField())
+    return Exists(Project.members.through.objects.filter(project_id=OuterRef(project_ref), user_id=user.pk))
+
+
+def with_membership(queryset, user, project_ref='pk'):
+    """
+    The queryset annotated with is_member, so checking the visibility of an object costs no query of its own
+    """
+    return queryset.annotate(is_member=membership(user, project_ref))
+
+
+def member_scoped(queryset, user, project_ref='project_id'):
+    """
+    The rows of the queryset in the user's projects, in the same query
+    """
+    return with_membership(queryset, user, project_ref).filter(is_member=True)
+
+
+def member_projects(user):
+    """
+    Subquery of the ids of the user's projects, the claimed ids for a JWT user
+    """
+    project_ids = getattr(user, 'project_ids', None)
+    if project_ids is not None:
+        return sorted(project_ids)
+    return Project.members.through.objects.filter(user_id=user.pk).values('project_id')
+
+
+def project_user_types(project_id, user_ids):
+    """
+    {user id: (user_type, is project member)} for the existing users among user_ids, in one query
+    """
+    membership = Project.members.through.objects.filter(project_id=project_id, user_id=OuterRef('pk'))
+    users = User.objects.filter(id__in=user_ids).annotate(is_member=Exists(membership))
+    return {user_id: (user_type, is_member)
+            for user_id, user_type, is_member in users.values_list('id', 'user_type', 'is_member')}
+
+
+def invalidate_memberships(user_ids):
+    user_ids = list(user_ids)
+    keys = [_key(user_id) for user_id in user_ids]
+    if not keys:
+        return
+    mark_claims_stale(user_ids)
+    caching.invalidate(lambda: _cache().delete_many(keys))
+    events.publish_membership_changes(user_ids)
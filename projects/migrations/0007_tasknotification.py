@@ -0,0 +1,28 @@
+# Generated by Django 2.2.10 on 2026-10-18 17:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0006_auto_20200206_2021'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskNotification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('status', models.CharField(choices=[('To do', 'To do'), ('In progress', 'In progress'), ('Done', 'Done')], max_length=15)),
+                ('overdue', models.BooleanField(default=False)),
+                ('sent_at', models.DateTimeField(auto_now=True)),
+                ('developer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_notifications', to=settings.AUTH_USER_MODEL)),
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification', to='projects.Task')),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.10 on 2026-10-18 17:42
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def schedule_reminders(apps, schema_editor):
+    Task = apps.get_model('projects', 'Task')
+    window = datetime.timedelta(days=getattr(settings, 'TASK_REMINDER_WINDOW_DAYS', 3))
+    open_tasks = Task.objects.filter(developer__isnull=False).exclude(status='Done')
+    for due_date in open_tasks.values_list('due_date', flat=True).distinct():
+        open_tasks.filter(due_date=due_date).update(remind_on=due_date - window)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_tasknotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='remind_on',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(schedule_reminders, migrations.RunPython.noop),
+    ]
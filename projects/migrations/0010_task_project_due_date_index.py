@@ -0,0 +1,17 @@
+# Generated by Django 2.2.10 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'due_date', 'id'], name='task_project_due_date_id'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.10 on 2026-10-18 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_task_project_due_date_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='remind_on',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status'], name='task_project_status'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['developer', 'status'], name='task_developer_status'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(_negated=True, status='Done'), fields=['due_date'], name='task_open_due_date'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(remind_on__isnull=False), fields=['remind_on'], name='task_remind_on'),
+        ),
+    ]
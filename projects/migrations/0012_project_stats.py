@@ -0,0 +1,40 @@
+# Generated by Django 2.2.10 on 2026-10-18 17:54
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0011_task_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='projects.Project')),
+                ('to_do', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+                ('overdue', models.IntegerField(default=0)),
+                ('overdue_as_of', models.DateField(default=datetime.date.today)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DeveloperTaskStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_tasks', models.IntegerField(default=0)),
+                ('developer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='developer_stats', to='projects.Project')),
+            ],
+            options={
+                'unique_together': {('project', 'developer')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0014_taskimportjob'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_project_status',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'id'], name='task_project_id'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'due_date', 'id'], name='task_project_status_due_date'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(_negated=True, status='Done'), fields=['project', 'due_date', 'id'], name='task_project_open_due_date'),
+        ),
+    ]
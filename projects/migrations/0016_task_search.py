@@ -0,0 +1,103 @@
+from django.db import migrations
+
+# the search index as of this migration, projects.search may change later
+
+POSTGRESQL_INSTALL = (
+    'ALTER TABLE projects_task ADD COLUMN search_vector tsvector',
+    """
+    CREATE FUNCTION projects_task_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER projects_task_search_vector BEFORE INSERT OR UPDATE OF title, description
+    ON projects_task FOR EACH ROW EXECUTE PROCEDURE projects_task_search_vector()
+    """,
+    # fills the column of the existing rows through the trigger
+    'UPDATE projects_task SET title = title',
+    'CREATE INDEX task_search_vector ON projects_task USING GIN (search_vector)',
+)
+
+POSTGRESQL_UNINSTALL = (
+    'DROP TRIGGER projects_task_search_vector ON projects_task',
+    'DROP FUNCTION projects_task_search_vector()',
+    'ALTER TABLE projects_task DROP COLUMN search_vector',
+)
+
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_task_search_insert AFTER INSERT ON projects_task BEGIN
+        INSERT INTO projects_task_search (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_task_search_delete AFTER DELETE ON projects_task BEGIN
+        INSERT INTO projects_task_search (projects_task_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_task_search_update AFTER UPDATE OF title, description ON projects_task
+    BEGIN
+        INSERT INTO projects_task_search (projects_task_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO projects_task_search (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+)
+
+SQLITE_INSTALL = (
+    "CREATE VIRTUAL TABLE projects_task_search USING fts5("
+    "title, description, content='projects_task', content_rowid='id')",
+    # matches in the title weigh ten times those in the description
+    "INSERT INTO projects_task_search (projects_task_search, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    "INSERT INTO projects_task_search (projects_task_search) VALUES ('rebuild')",
+) + SQLITE_TRIGGERS
+
+SQLITE_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS projects_task_search_insert',
+    'DROP TRIGGER IF EXISTS projects_task_search_delete',
+    'DROP TRIGGER IF EXISTS projects_task_search_update',
+    'DROP TABLE projects_task_search',
+)
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def install(apps, schema_editor):
+    """
+    A tsvector column with a GIN index kept up to date by a trigger on PostgreSQL,
+    an FTS5 table kept up to date by triggers on SQLite
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_INSTALL)
+    elif vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_INSTALL)
+
+
+def uninstall(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_UNINSTALL)
+    elif vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_UNINSTALL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0015_task_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0016_task_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['developer', 'due_date', 'id'], name='task_developer_due_date_id'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0017_task_developer_due_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('status', 'status'), ('developer', 'developer'), ('due_date', 'due_date')], max_length=10)),
+                ('old_value', models.CharField(max_length=32, null=True)),
+                ('new_value', models.CharField(max_length=32, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='projects.Project')),
+                ('task', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='activity', to='projects.Task')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='taskactivity',
+            index=models.Index(fields=['task', 'id'], name='activity_task_id'),
+        ),
+        migrations.AddIndex(
+            model_name='taskactivity',
+            index=models.Index(fields=['project', 'id'], name='activity_project_id'),
+        ),
+    ]
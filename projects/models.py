@@ -1,4 +1,7 @@
-from django.db import models
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import models, transaction
+from django.utils import timezone
 
 import datetime
 
@@ -17,11 +20,34 @@ class Project(models.Model):
     description = models.TextField(max_length=3000)
     status = models.CharField(choices=PROJECT_STATUSES, max_length=10, default='Opened')
     members = models.ManyToManyField(User, related_name='projects')
+    # bumped on every change of the project, its members or its tasks
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
 
 
+class TaskQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk inserts skip Task.save(), the reminders of the new tasks are scheduled here
+        objs = list(objs)
+        for task in objs:
+            task.remind_on = task.reminder_date()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def schedule_reminders(self):
+        """
+        Recomputes remind_on of the tasks, with one UPDATE per distinct due date
+        """
+        window = datetime.timedelta(days=settings.TASK_REMINDER_WINDOW_DAYS)
+        self.filter(models.Q(developer__isnull=True) | models.Q(status='Done')).update(remind_on=None)
+        scheduled = self.filter(developer__isnull=False).exclude(status='Done')
+        for due_date in scheduled.order_by().values_list('due_date', flat=True).distinct():
+            scheduled.filter(due_date=due_date).update(remind_on=due_date - window)
+
+
 class Task(models.Model):
     TASK_STATUSES = (
         ('To do', 'To do'),
@@ -33,8 +59,231 @@ class Task(models.Model):
     description = models.TextField(max_length=3000)
     due_date = models.DateField(default=datetime.date.today()+datetime.timedelta(days=7))
     status = models.CharField(choices=TASK_STATUSES, max_length=15, default='To do')
-    developer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='tasks')
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
+    # the composite indexes below start with these columns
+    developer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, db_index=False, related_name='tasks')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_index=False, related_name='tasks')
+    remind_on = models.DateField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # task list ordering and keyset pagination
+            models.Index(fields=['project', 'due_date', 'id'], name='task_project_due_date_id'),
+            # filter and ordering combinations of projects.filters.TASK_LIST_INDEXES
+            models.Index(fields=['project', 'id'], name='task_project_id'),
+            models.Index(fields=['project', 'status', 'due_date', 'id'], name='task_project_status_due_date'),
+            models.Index(fields=['project', 'due_date', 'id'], condition=~models.Q(status='Done'),
+                         name='task_project_open_due_date'),
+            models.Index(fields=['developer', 'status'], name='task_developer_status'),
+            # the caller's task list across projects and its keyset pagination
+            models.Index(fields=['developer', 'due_date', 'id'], name='task_developer_due_date_id'),
+            models.Index(fields=['due_date'], condition=~models.Q(status='Done'), name='task_open_due_date'),
+            models.Index(fields=['remind_on'], condition=models.Q(remind_on__isnull=False),
+                         name='task_remind_on'),
+        ]
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        task = super().from_db(db, field_names, values)
+        # the stats signal handlers take the state replaced by the next save from here
+        task._loaded_values = {name: task.__dict__[name] for name in field_names if name in task.__dict__}
+        return task
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self._reminder_changed(update_fields):
+            self.remind_on = self.reminder_date()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'remind_on'}
+        # the signal handlers updating the project stats run in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def _reminder_changed(self, update_fields=None):
+        """
+        Whether the save writes a due date, developer or status other than the loaded one.
+        An unchanged task keeps its remind_on, which is moved past the deadline once reminded.
+        """
+        names = ('due_date', 'developer_id', 'status')
+        if update_fields is not None:
+            saved = {self._meta.get_field(name).attname for name in update_fields}
+            names = [name for name in names if name in saved]
+        loaded = getattr(self, '_loaded_values', {})
+        return self._state.adding or any(name not in loaded or loaded[name] != getattr(self, name)
+                                         for name in names)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+    def reminder_date(self):
+        """
+        Date the deadline reminder is due, None if the task needs no reminder
+        """
+        if self.developer_id is None or self.status == 'Done':
+            return None
+        return self.due_date - datetime.timedelta(days=settings.TASK_REMINDER_WINDOW_DAYS)
+
+
+class TaskActivity(models.Model):
+    """
+    Append-only log of the status, developer and due date changes of tasks, written in batches by projects.activity.
+    The rows outlive their task, the references have no database constraint.
+    """
+    ACTIVITY_FIELDS = (
+        ('status', 'status'),
+        ('developer', 'developer'),
+        ('due_date', 'due_date'),
+    )
+
+    # only the composite indexes below, every index is written on each insert
+    task = models.ForeignKey(Task, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                             related_name='activity')
+    project = models.ForeignKey(Project, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                                related_name='+')
+    actor = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True,
+                              related_name='+')
+    field = models.CharField(choices=ACTIVITY_FIELDS, max_length=10)
+    old_value = models.CharField(max_length=32, null=True)
+    new_value = models.CharField(max_length=32, null=True)
+    # time of the change, the row itself may be written later
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # per task and per project history, newest first
+            models.Index(fields=['task', 'id'], name='activity_task_id'),
+            models.Index(fields=['project', 'id'], name='activity_project_id'),
+        ]
+
+    def __str__(self):
+        return '{} {}: {} -> {}'.format(self.task_id, self.field, self.old_value, self.new_value)
+
+
+class ProjectStats(models.Model):
+    """
+    Task counts of a project, kept up to date by projects.stats on every task write
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    to_do = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    # open tasks due before overdue_as_of, rolled forward on the first access of a day
+    overdue = models.IntegerField(default=0)
+    overdue_as_of = models.DateField(default=datetime.date.today)
+
+    def __str__(self):
+        return 'Stats of {}'.format(self.project_id)
+
+    @property
+    def total(self):
+        return self.to_do + self.in_progress + self.done
+
+    @property
+    def developers(self):
+        return DeveloperTaskStats.objects.filter(project_id=self.project_id, open_tasks__gt=0).order_by('developer_id')
+
+
+class DeveloperTaskStats(models.Model):
+    """
+    Number of open tasks assigned to a developer in a project
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='developer_stats')
+    developer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_stats')
+    open_tasks = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('project', 'developer')
+
+    def __str__(self):
+        return '{} in {}'.format(self.developer_id, self.project_id)
+
+
+class TaskImportJob(models.Model):
+    """
+    Import of tasks from an uploaded CSV or NDJSON file, processed by projects.tasks.task_import_tasks
+    """
+    IMPORT_FORMATS = (
+        ('csv', 'csv'),
+        ('ndjson', 'ndjson'),
+    )
+    IMPORT_STATUSES = (
+        ('Pending', 'Pending'),
+        ('Running', 'Running'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed'),
+    )
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='import_jobs')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    file = models.FileField(upload_to='task_imports/')
+    format = models.CharField(choices=IMPORT_FORMATS, max_length=10)
+    status = models.CharField(choices=IMPORT_STATUSES, max_length=10, default='Pending')
+    processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # JSON list of the first settings.TASK_IMPORT_MAX_ERRORS invalid rows
+    errors = models.TextField(default='[]')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return '{} ({})'.format(self.file.name, self.status)
+
+
+class TaskNotification(models.Model):
+    """
+    Ledger of the last deadline reminder sent for a task
+    """
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, related_name='notification')
+    developer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_notifications')
+    due_date = models.DateField()
+    status = models.CharField(choices=Task.TASK_STATUSES, max_length=15)
+    overdue = models.BooleanField(default=False)
+    sent_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '{} -> {}'.format(self.task_id, self.developer_id)
+
+    def matches(self, task, today):
+        return (self.developer_id, self.due_date, self.status, self.overdue) == \
+               (task.developer_id, task.due_date, task.status, task.due_date < today)
+
+
+class OutgoingEmail(models.Model):
+    """
+    Transactional outbox: emails are written here by application code and sent by the outbox dispatcher
+    """
+    EMAIL_STATUSES = (
+        ('Pending', 'Pending'),
+        ('Sent', 'Sent'),
+        ('Failed', 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField()
+    status = models.CharField(choices=EMAIL_STATUSES, max_length=10, default='Pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_attempt'),
+        ]
+
+    def __str__(self):
+        return '{} -> {}'.format(self.subject, self.recipients)
+
+    def message(self, connection=None):
+        return EmailMessage(self.subject, self.body, self.from_email, self.recipients.split(','),
+                            connection=connection)
@@ -0,0 +1,147 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset (cursor) mode.
+
+    ?pagination=cursor returns the first page, the next/previous links carry an opaque ?cursor=.
+    Cursor pages seek on the queryset ordering, which must end with a unique field,
+    so fetching a deep page costs the same as the first one. The total count is only
+    computed with ?count=true.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    cursor_mode = False
+
+    def use_cursor(self, request):
+        return self.cursor_query_param in request.query_params or \
+            request.query_params.get(self.mode_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.cursor_mode = True
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        self.count = queryset.count() if request.query_params.get(self.count_query_param) == 'true' else None
+        position, reverse = self.decode_cursor(request, queryset)
+
+        ordering = [self.invert(field) for field in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek(ordering, position))
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        content = [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]
+        if self.count is not None:
+            content.insert(0, ('count', self.count))
+        return Response(OrderedDict(content))
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next or self.last is None:
+            return None
+        return self.cursor_link(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous or self.first is None:
+            return None
+        return self.cursor_link(self.first, reverse=True)
+
+    def get_ordering(self, queryset):
+        ordering = tuple(field.replace('pk', 'id') if field.lstrip('-') == 'pk' else field
+                         for field in queryset.query.order_by)
+        if not ordering or ordering[-1].lstrip('-') != 'id':
+            ordering += ('id', )
+        return ordering
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def seek(ordering, position):
+        """
+        Rows after `position` in `ordering`: (a > x) or (a = x and b > y) or ...
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = '{}__{}'.format(name, 'lt' if field.startswith('-') else 'gt')
+            step = Q(**{lookup: position[index]})
+            for previous_index in range(index):
+                step &= Q(**{ordering[previous_index].lstrip('-'): position[previous_index]})
+            condition |= step
+        # redundant bound on the leading column, lets the database start an index range scan there
+        first = ordering[0]
+        bound = Q(**{'{}__{}'.format(first.lstrip('-'), 'lte' if first.startswith('-') else 'gte'): position[0]})
+        return bound & condition
+
+    def position(self, item):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = item[name] if isinstance(item, dict) else getattr(item, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    @staticmethod
+    def encode_cursor(position, reverse=False):
+        cursor = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        return urlsafe_b64encode(cursor.encode()).decode().rstrip('=')
+
+    def cursor_link(self, item, reverse):
+        url = remove_query_param(self.request.build_absolute_uri(), self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.position(item), reverse))
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode())
+            position = cursor['p']
+            if len(position) != len(self.ordering):
+                raise ValueError
+            position = [queryset.model._meta.get_field(field.lstrip('-')).to_python(value)
+                        for field, value in zip(self.ordering, position)]
+            return position, bool(cursor.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
@@ -1,6 +1,6 @@
 from rest_framework import permissions
-from users.models import User
-from projects.models import Project
+from projects.membership import is_project_member
+from projects.versioning import project_version
 
 
 class IsManager(permissions.BasePermission):
@@ -17,17 +17,30 @@ class SafeOnly(permissions.BasePermission):
 
 
 class IsProjectMember(permissions.BasePermission):
+    """
+    Membership of the project of a fetched project or task, read from the is_member annotation
+    of the view queryset, see membership.with_membership
+    """
 
     def has_object_permission(self, request, view, obj):
-        return request.user in obj.members.all()
+        return obj.is_member
 
 
 class IsTaskProjectMember(permissions.BasePermission):
 
     def has_permission(self, request, view):
-        return request.user in Project.objects.get(id=view.kwargs['project_id']).members.all()
+        return is_project_member(request.user, view.kwargs['project_id'])
+
+
+class IsVersionedProjectMember(permissions.BasePermission):
+    """
+    Membership of the project of the URL, fetched with the project version of versioning.project_condition
+    """
+
+    def has_permission(self, request, view):
+        return project_version(request, view.kwargs['project_id']) is not None
 
 
 class IsTaskDeveloperOrManager(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return request.user == obj.developer or request.user.is_manager
+        return obj.developer_id == request.user.pk or request.user.is_manager
@@ -0,0 +1,114 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.response import Response
+
+from users import caching
+
+CACHED_LISTS = ('projects', 'tasks', 'users')
+COUNTERS = ('hits', 'misses')
+
+
+def _cache():
+    return caches[settings.LIST_RESPONSE_CACHE]
+
+
+def _generation_key(scope):
+    return 'generation:{}'.format(scope)
+
+
+def _counter_key(name, counter):
+    return 'counter:{}:{}'.format(name, counter)
+
+
+def generation(scope):
+    """
+    Current generation of a scope. A random token rather than a counter,
+    so an evicted generation can never bring old entries back.
+    """
+    cache = _cache()
+    key = _generation_key(scope)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        current = cache.get(key)
+    return current
+
+
+def invalidate_responses(scopes):
+    """
+    Drops the cached responses of the scopes by moving them to a new generation
+    """
+    keys = [_generation_key(scope) for scope in set(scopes)]
+    if not keys:
+        return
+
+    def bump():
+        _cache().set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+    caching.invalidate(bump)
+
+
+def project_tasks_scope(project_id):
+    return 'tasks:{}'.format(project_id)
+
+
+def _count(name, counter):
+    cache = _cache()
+    key = _counter_key(name, counter)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def cache_stats():
+    """
+    Hit and miss counts per cached list
+    """
+    counts = _cache().get_many([_counter_key(name, counter) for name in CACHED_LISTS for counter in COUNTERS])
+    stats = {}
+    for name in CACHED_LISTS:
+        hits, misses = (counts.get(_counter_key(name, counter), 0) for counter in COUNTERS)
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else None,
+        }
+    return stats
+
+
+class CachedListMixin:
+    """
+    Caches the list response data per user, query parameters and page until the
+    cache scope of the list is invalidated by the signal handlers in projects.signals.
+    """
+    cache_scope = None
+
+    def get_cache_scope(self):
+        return self.cache_scope
+
+    def response_cache_key(self, request, scope):
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return 'response:{}:{}:{}:{}'.format(scope, generation(scope), request.user.pk, url)
+
+    def list(self, request, *args, **kwargs):
+        scope = self.get_cache_scope()
+        name = scope.split(':')[0]
+        key = self.response_cache_key(request, scope)
+        data = _cache().get(key)
+        if data is not None:
+            _count(name, 'hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        _count(name, 'misses')
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            _cache().set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,94 @@
+import re
+
+from django.conf import settings
+from django.db import NotSupportedError, connection, connections
+
+from projects.models import Task
+
+# text search configuration of the PostgreSQL tsvector column and queries
+SEARCH_CONFIG = 'english'
+
+# the triggers of the SQLite index created by migration 0016_task_search
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_task_search_insert AFTER INSERT ON projects_task BEGIN
+        INSERT INTO projects_task_search (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_task_search_delete AFTER DELETE ON projects_task BEGIN
+        INSERT INTO projects_task_search (projects_task_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_task_search_update AFTER UPDATE OF title, description ON projects_task
+    BEGIN
+        INSERT INTO projects_task_search (projects_task_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO projects_task_search (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+)
+
+
+def restore_sqlite_triggers(using):
+    """
+    SQLite migrations altering the task table rebuild it and drop its triggers, recreate them
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'projects_task_search'")
+        if cursor.fetchone() is None:
+            return
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def search_terms(text):
+    return re.findall(r'\w+', text)
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def search_tasks(project_ids, text):
+    """
+    Tasks of the projects containing all the words of text, best ranked first.
+    Only the first settings.TASK_SEARCH_MAX_RESULTS matches found are ranked,
+    so a search for a common word costs the same as any other.
+    """
+    terms = search_terms(text)
+    project_ids = list(project_ids)
+    if not terms or not project_ids:
+        return Task.objects.none()
+    limit = settings.TASK_SEARCH_MAX_RESULTS
+    in_projects = _placeholders(project_ids)
+
+    if connection.vendor == 'postgresql':
+        query = ' '.join(terms)
+        return Task.objects.extra(
+            select={'rank': 'ts_rank(projects_task.search_vector, plainto_tsquery(%s, %s))'},
+            select_params=(SEARCH_CONFIG, query),
+            where=['projects_task.id IN (SELECT id FROM projects_task WHERE project_id IN ({}) '
+                   'AND search_vector @@ plainto_tsquery(%s, %s) LIMIT %s)'.format(in_projects)],
+            params=project_ids + [SEARCH_CONFIG, query, limit],
+        ).order_by('-rank', 'id')
+    if connection.vendor == 'sqlite':
+        # every term quoted, so the input cannot use the FTS5 query syntax
+        query = ' '.join('"{}"'.format(term) for term in terms)
+        return Task.objects.extra(
+            # FTS5 ranks are negative, the best match has the lowest one
+            select={'rank': '-projects_task_search.rank'},
+            tables=['projects_task_search'],
+            where=['projects_task_search.rowid = projects_task.id',
+                   'projects_task_search MATCH %s',
+                   # the FTS5 table cannot be aliased, the inner names shadow the outer ones.
+                   # CROSS JOIN keeps SQLite from walking every task of the projects instead of the matches
+                   'projects_task.id IN (SELECT projects_task_search.rowid FROM projects_task_search '
+                   'CROSS JOIN projects_task ON projects_task.id = projects_task_search.rowid '
+                   'WHERE projects_task_search MATCH %s AND projects_task.project_id IN ({}) LIMIT %s)'
+                   .format(in_projects)],
+            params=[query, query] + project_ids + [limit],
+        ).order_by('-rank', 'id')
+    raise NotSupportedError('Task search is not supported on {}.'.format(connection.vendor))
@@ -0,0 +1,60 @@
+from django.utils.module_loading import import_string
+
+from rest_framework import permissions
+
+
+def query_param_names(request, param):
+    return {name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and expansion for reads:
+    ?fields=id,title keeps only the listed fields,
+    ?expand=developer replaces a field by the nested representation declared in expandable_fields.
+
+    expandable_fields maps a field name to (serializer class or its dotted path, serializer kwargs,
+    'select_related' or 'prefetch_related'); views mixing in ExpandableQuerysetMixin load the
+    expanded relations with the given method instead of one query per row.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        # nested serializers get no request in their context and are left as they are
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return
+        for name in self.requested_expansions(request):
+            serializer_class, serializer_kwargs, _ = self.expandable_fields[name]
+            if isinstance(serializer_class, str):
+                serializer_class = import_string(serializer_class)
+            self.fields[name] = serializer_class(read_only=True, **serializer_kwargs)
+        fields = query_param_names(request, 'fields')
+        if fields:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_expansions(cls, request):
+        return query_param_names(request, 'expand') & set(cls.expandable_fields)
+
+    @classmethod
+    def expand_queryset(cls, queryset, request):
+        for name in cls.requested_expansions(request):
+            method = cls.expandable_fields[name][2]
+            queryset = getattr(queryset, method)(name)
+        return queryset
+
+
+class ExpandableQuerysetMixin:
+    """
+    Loads the relations expanded by a DynamicFieldsMixin serializer along with the queryset
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, DynamicFieldsMixin) and self.request.method in permissions.SAFE_METHODS:
+            queryset = serializer_class.expand_queryset(queryset, self.request)
+        return queryset
@@ -0,0 +1,104 @@
+import datetime
+
+from rest_framework import fields, relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from projects.serializers.dynamic import DynamicFieldsMixin, query_param_names
+
+_compiled = {}
+
+
+def _converter(field):
+    """
+    Representation of a non-null database value, mirroring field.to_representation.
+    None when the value is represented as it is.
+    """
+    if isinstance(field, (fields.ChoiceField, fields.CharField, fields.ReadOnlyField)):
+        return None
+    if isinstance(field, fields.IntegerField):
+        return int
+    if type(field) is fields.DateField and getattr(field, 'format', api_settings.DATE_FORMAT) == ISO_8601:
+        return datetime.date.isoformat
+    return field.to_representation
+
+
+def compile_fields(serializer_class):
+    """
+    [(field name, values() column, converter)] building the representation of serializer_class
+    from database rows, None when a field is not read from a single column
+    """
+    if serializer_class not in _compiled:
+        fast_sources = getattr(serializer_class, 'fast_sources', {})
+        model = serializer_class.Meta.model
+        mapping = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in fast_sources:
+                mapping.append((name, fast_sources[name], None))
+            elif isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+                mapping.append((name, model._meta.get_field(field.source).attname, None))
+            elif isinstance(field, (serializers.BaseSerializer, relations.RelatedField, relations.ManyRelatedField,
+                                    fields.SerializerMethodField, fields.ModelField)) or \
+                    field.source == '*' or '.' in field.source:
+                mapping = None
+                break
+            else:
+                mapping.append((name, field.source, _converter(field)))
+        _compiled[serializer_class] = mapping
+    return _compiled[serializer_class]
+
+
+def select_fields(mapping, request):
+    """
+    The part of a compiled mapping requested with ?fields=
+    """
+    names = query_param_names(request, 'fields')
+    return [field for field in mapping if field[0] in names] if names else mapping
+
+
+def iter_representation(mapping, rows):
+    for row in rows:
+        item = {}
+        for name, source, convert in mapping:
+            value = row[source]
+            item[name] = value if convert is None or value is None else convert(value)
+        yield item
+
+
+def fast_representation(mapping, rows):
+    return list(iter_representation(mapping, rows))
+
+
+class FastListMixin:
+    """
+    Lists from values() rows and the compiled field mapping of the serializer instead of
+    model instances and serializer fields, with the same output. ?fields= is supported,
+    ?expand= and serializers which cannot be compiled go through the serializer.
+    """
+
+    def get_fast_mapping(self):
+        serializer_class = self.get_serializer_class()
+        mapping = compile_fields(serializer_class)
+        if mapping is None:
+            return None
+        if issubclass(serializer_class, DynamicFieldsMixin):
+            if serializer_class.requested_expansions(self.request):
+                return None
+            mapping = select_fields(mapping, self.request)
+        return mapping
+
+    def list(self, request, *args, **kwargs):
+        mapping = self.get_fast_mapping()
+        if mapping is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        # the ordering columns are fetched as well for the cursor positions
+        columns = {source for _, source, _ in mapping} | \
+            {'id' if field.lstrip('-') == 'pk' else field.lstrip('-') for field in queryset.query.order_by}
+        rows = queryset.values(*columns)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast_representation(mapping, page))
+        return Response(fast_representation(mapping, rows))
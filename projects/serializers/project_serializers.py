@@ -1,10 +1,56 @@
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Count, Q
+from django.db.models.signals import m2m_changed
+from django.urls import reverse
+
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
 
-from projects.models import Project
+from projects.models import DeveloperTaskStats, Project, ProjectStats
+from projects.serializers.dynamic import DynamicFieldsMixin
+from projects.stats import project_stats
+from users.models import User
+from users.serializers import UserSerializer
+
+MEMBERS_INVARIANT_MESSAGE = 'Project need to have at least one manager and one developer.'
+
+
+class MemberIdsField(serializers.ListField):
+    """
+    User ids, resolved to the users with a single in_bulk query. Duplicates are ignored.
+    """
+    child = serializers.IntegerField()
+
+    def to_internal_value(self, data):
+        ids = list(dict.fromkeys(super().to_internal_value(data)))
+        users = User.objects.in_bulk(ids)
+        unknown = [user_id for user_id in ids if user_id not in users]
+        if unknown:
+            raise serializers.ValidationError('Unknown users: {}.'.format(', '.join(map(str, unknown))))
+        return [users[user_id] for user_id in ids]
+
+    def to_representation(self, value):
+        return [user.pk for user in value.all()]
+
+
+class MembersCountMixin(serializers.Serializer):
+    members_count = serializers.SerializerMethodField()
+
+    def get_members_count(self, obj):
+        # annotated by the list view, counted from the prefetched members when expanded
+        count = getattr(obj, 'members_count', None)
+        return obj.members.count() if count is None else count
 
 
-class ProjectSerializer(ModelSerializer):
+class ProjectSerializer(DynamicFieldsMixin, MembersCountMixin, ModelSerializer):
+    expandable_fields = {
+        'members': (UserSerializer, {'many': True}, 'prefetch_related'),
+    }
+    # the list view annotates members_count
+    fast_sources = {
+        'members_count': 'members_count',
+    }
 
     class Meta:
         model = Project
@@ -13,11 +59,13 @@ class ProjectSerializer(ModelSerializer):
             'title',
             'description',
             'status',
-            'members',
+            'members_count',
         )
 
 
 class CreateProjectSerializer(ModelSerializer):
+    members = MemberIdsField(allow_empty=False, max_length=settings.PROJECT_MEMBERS_MAX_ITEMS)
+
     class Meta:
         model = Project
         fields = (
@@ -37,17 +85,107 @@ class CreateProjectSerializer(ModelSerializer):
         if managers and devs:
             return attrs
         else:
-            raise serializers.ValidationError('Project need to have at least one manager and one developer.')
+            raise serializers.ValidationError(MEMBERS_INVARIANT_MESSAGE)
 
     def create(self, validated_data):
         project = Project(title=validated_data.get('title'),
                           description=validated_data.get('description'))
         project.save()
-        project.members.set(validated_data.get('members'))
+        project.members.add(*validated_data.get('members'))
         return project
 
 
-class ProjectDetailViewSerializer(ModelSerializer):
+class ProjectMembersSerializer(serializers.Serializer):
+    """
+    A batch of users added to or removed from a project. Only the difference with the current members
+    is written, with bulk inserts and deletes, and the number of queries does not grow with the batch.
+    """
+    ids = MemberIdsField(allow_empty=False, max_length=settings.PROJECT_MEMBERS_MAX_ITEMS)
+
+    @staticmethod
+    def lock(project):
+        # membership changes of a project are serialized, the invariant check sees the others' result
+        list(Project.objects.select_for_update().filter(pk=project.pk).values_list('pk'))
+
+    @staticmethod
+    def members_changed(project, action, user_ids):
+        through = Project.members.through
+        for stage in ('pre_', 'post_'):
+            m2m_changed.send(sender=through, action=stage + action, instance=project, reverse=False,
+                             model=User, pk_set=user_ids, using=router.db_for_write(through, instance=project))
+
+    def current_members(self, project):
+        return set(Project.members.through.objects.filter(project_id=project.pk,
+                                                          user_id__in=[user.pk for user in self.validated_data['ids']])
+                   .values_list('user_id', flat=True))
+
+    def add(self, project):
+        through = Project.members.through
+        with transaction.atomic():
+            self.lock(project)
+            current = self.current_members(project)
+            added = {user.pk for user in self.validated_data['ids']} - current
+            # the project detail PUT does not take the lock, rows it added meanwhile are skipped
+            through.objects.bulk_create([through(project_id=project.pk, user_id=user_id) for user_id in added],
+                                        batch_size=settings.PROJECT_MEMBERS_BATCH_SIZE, ignore_conflicts=True)
+            if added:
+                self.members_changed(project, 'add', added)
+        return {'added': len(added)}
+
+    def remove(self, project):
+        with transaction.atomic():
+            self.lock(project)
+            removed = self.current_members(project)
+            if not removed:
+                return {'removed': 0}
+            remaining = User.objects.filter(projects=project).exclude(id__in=removed).aggregate(
+                managers=Count('id', filter=Q(user_type='Manager')),
+                developers=Count('id', filter=Q(user_type='Developer')),
+            )
+            if not (remaining['managers'] and remaining['developers']):
+                raise serializers.ValidationError(MEMBERS_INVARIANT_MESSAGE)
+            Project.members.through.objects.filter(project_id=project.pk, user_id__in=removed).delete()
+            self.members_changed(project, 'remove', removed)
+        return {'removed': len(removed)}
+
+
+class DeveloperTaskStatsSerializer(ModelSerializer):
+
+    class Meta:
+        model = DeveloperTaskStats
+        fields = (
+            'developer',
+            'open_tasks',
+        )
+
+
+class ProjectStatsSerializer(DynamicFieldsMixin, ModelSerializer):
+    tasks = serializers.IntegerField(source='total', read_only=True)
+    open_by_developer = DeveloperTaskStatsSerializer(source='developers', many=True, read_only=True)
+
+    class Meta:
+        model = ProjectStats
+        fields = (
+            'tasks',
+            'to_do',
+            'in_progress',
+            'done',
+            'overdue',
+            'open_by_developer',
+        )
+
+
+class ProjectDetailViewSerializer(DynamicFieldsMixin, MembersCountMixin, ModelSerializer):
+    """
+    Tasks are linked to their paginated list and members are counted, ?expand=tasks,members embeds them
+    """
+    tasks = serializers.SerializerMethodField()
+    stats = serializers.SerializerMethodField()
+    expandable_fields = {
+        'members': (UserSerializer, {'many': True}, 'prefetch_related'),
+        'tasks': ('projects.serializers.task_serializers.TaskSerializer', {'many': True}, 'prefetch_related'),
+    }
+
     class Meta:
         model = Project
         fields = (
@@ -56,5 +194,18 @@ class ProjectDetailViewSerializer(ModelSerializer):
             'description',
             'status',
             'members',
+            'members_count',
             'tasks',
+            'stats',
         )
+        extra_kwargs = {
+            'members': {'write_only': True},
+        }
+
+    def get_tasks(self, obj):
+        url = reverse('projects:tasks_list', kwargs={'project_id': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_stats(self, obj):
+        return ProjectStatsSerializer(project_stats(obj.pk)).data
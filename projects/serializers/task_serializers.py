@@ -1,11 +1,28 @@
+import json
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
 
-from projects.models import Task, Project
-from users.models import User
+from projects.membership import is_project_member, project_user_types
+from projects.models import Task, TaskActivity, TaskImportJob
+from projects.serializers.dynamic import DynamicFieldsMixin
+from projects.signals import tasks_changed
+from projects.stats import task_states
+from users.serializers import UserSerializer
 
+TASK_EXPANSIONS = {
+    'developer': (UserSerializer, {}, 'select_related'),
+    'project': ('projects.serializers.project_serializers.ProjectSerializer', {}, 'select_related'),
+}
 
-class TaskSerializer(ModelSerializer):
+
+class TaskSerializer(DynamicFieldsMixin, ModelSerializer):
+    expandable_fields = TASK_EXPANSIONS
 
     class Meta:
         model = Task
@@ -20,6 +37,17 @@ class TaskSerializer(ModelSerializer):
         )
 
 
+class DeveloperTaskSerializer(TaskSerializer):
+    """
+    A task of the caller's task list across projects, with the title of its project
+    """
+    project_title = serializers.CharField(source='project.title', read_only=True)
+    fast_sources = {'project_title': 'project__title'}
+
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ('project_title', )
+
+
 class CreateTaskSerializer(ModelSerializer):
     class Meta:
         model = Task
@@ -33,7 +61,7 @@ class CreateTaskSerializer(ModelSerializer):
     def validate(self, attrs):
         user = attrs.get('developer')
         if user.is_developer:
-            if user in Project.objects.get(id=self.context['view'].kwargs['project_id']).members.all():
+            if is_project_member(user, self.context['view'].kwargs['project_id']):
                 return attrs
             else:
                 raise serializers.ValidationError('Assigned user must be project member.')
@@ -41,17 +69,121 @@ class CreateTaskSerializer(ModelSerializer):
             raise serializers.ValidationError('Assigned user must be developer.')
 
     def create(self, validated_data):
-        task = Task(title=validated_data.get('title'),
-                    description=validated_data.get('description'),
-                    due_date=validated_data.get('due_date'),
-                    developer=validated_data.get('developer'),
-                    project_id=self.context['view'].kwargs['project_id']
-                    )
+        # omitted fields keep the model defaults
+        task = Task(project_id=self.context['view'].kwargs['project_id'], **validated_data)
         task.save()
         return task
 
 
-class TaskDetailViewSerializer(ModelSerializer):
+class BulkCreateTaskSerializer(ModelSerializer):
+    """
+    One task of a bulk creation or import. Assigned developers are looked up in context['developers'],
+    loaded for the whole batch with a single query, the project is context['project_id'].
+    """
+    developer = serializers.IntegerField()
+
+    class Meta:
+        model = Task
+        fields = (
+            'title',
+            'description',
+            'due_date',
+            'developer',
+        )
+
+    def validate_developer(self, value):
+        if value not in self.context['developers']:
+            raise serializers.ValidationError('Invalid pk "{}" - object does not exist.'.format(value))
+        return value
+
+    def validate(self, attrs):
+        user_type, is_member = self.context['developers'][attrs.get('developer')]
+        if user_type != 'Developer':
+            raise serializers.ValidationError('Assigned user must be developer.')
+        if not is_member:
+            raise serializers.ValidationError('Assigned user must be project member.')
+        return attrs
+
+    def build(self):
+        """
+        Unsaved task for bulk_create
+        """
+        data = dict(self.validated_data)
+        # omitted fields keep the model defaults
+        return Task(developer_id=data.pop('developer'), project_id=self.context['project_id'], **data)
+
+
+class BulkTaskFieldsSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Task.TASK_STATUSES, required=False)
+    developer = serializers.IntegerField(required=False, allow_null=True)
+    due_date = serializers.DateField(required=False)
+
+    def to_lookups(self, data):
+        return {'developer_id' if field == 'developer' else field: value for field, value in data.items()}
+
+
+class BulkUpdateTaskSerializer(serializers.Serializer):
+    """
+    Applies the same changes to the tasks selected by ids and/or filter,
+    with the rules of TaskDetailViewSerializer.update
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False,
+                                max_length=settings.TASK_BULK_MAX_ITEMS)
+    filter = BulkTaskFieldsSerializer(required=False)
+    changes = BulkTaskFieldsSerializer()
+
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs.get('filter'):
+            raise serializers.ValidationError('Select tasks with ids or filter.')
+        changes = attrs.get('changes')
+        if not changes:
+            raise serializers.ValidationError('No changes given.')
+        if self.context['request'].user.is_developer and set(changes) != {'status'}:
+            raise serializers.ValidationError('You can change only task status as developer.')
+        developer_id = changes.get('developer')
+        if developer_id is not None:
+            user_type, is_member = project_user_types(self.context['view'].kwargs['project_id'],
+                                                      [developer_id]).get(developer_id, (None, False))
+            if user_type != 'Developer':
+                raise serializers.ValidationError('Assigned user must be developer.')
+            if not is_member:
+                raise serializers.ValidationError('Assigned user must be project member.')
+        return attrs
+
+    def get_queryset(self):
+        user = self.context['request'].user
+        tasks = Task.objects.filter(project_id=self.context['view'].kwargs['project_id'])
+        if user.is_developer:
+            tasks = tasks.filter(developer_id=user.pk)
+        if self.validated_data.get('ids'):
+            tasks = tasks.filter(id__in=self.validated_data['ids'])
+        if self.validated_data.get('filter'):
+            tasks = tasks.filter(**self.fields['filter'].to_lookups(self.validated_data['filter']))
+        return tasks
+
+    def save(self):
+        """
+        Updates the selected tasks with set-based UPDATEs in id batches, returns the affected counts
+        """
+        changes = self.fields['changes'].to_lookups(self.validated_data['changes'])
+        changes['updated_at'] = timezone.now()
+        updated = 0
+        batch_size = settings.TASK_BULK_BATCH_SIZE
+        with transaction.atomic():
+            # locked until the commit, so a task reassigned meanwhile is neither selected nor changed
+            ids = list(self.get_queryset().select_for_update().order_by('id').values_list('id', flat=True))
+            for start in range(0, len(ids), batch_size):
+                tasks = Task.objects.filter(id__in=ids[start:start + batch_size])
+                removed = task_states(tasks)
+                updated += tasks.update(**changes)
+                tasks.schedule_reminders()
+                tasks_changed.send(sender=Task, removed=removed, added=task_states(tasks),
+                                   actor_id=self.context['request'].user.pk)
+        return {'matched': len(ids), 'updated': updated}
+
+
+class TaskDetailViewSerializer(DynamicFieldsMixin, ModelSerializer):
+    expandable_fields = TASK_EXPANSIONS
 
     class Meta:
         model = Task
@@ -76,6 +208,73 @@ class TaskDetailViewSerializer(ModelSerializer):
                 raise serializers.ValidationError('You can change only task status as developer.')
             else:
                 setattr(instance, attr, value)
+        # recorded in the task activity
+        instance._actor_id = self.context['request'].user.pk
         instance.save()
         return instance
 
+
+class TaskImportJobSerializer(ModelSerializer):
+    """
+    Uploads a file to import, the format defaults to the file extension
+    """
+    format = serializers.ChoiceField(choices=TaskImportJob.IMPORT_FORMATS, required=False)
+    errors = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TaskImportJob
+        fields = (
+            'id',
+            'file',
+            'format',
+            'status',
+            'processed',
+            'created',
+            'failed',
+            'errors',
+            'created_at',
+            'finished_at',
+        )
+        read_only_fields = (
+            'status',
+            'processed',
+            'created',
+            'failed',
+            'created_at',
+            'finished_at',
+        )
+        extra_kwargs = {
+            'file': {'write_only': True},
+        }
+
+    def validate_file(self, value):
+        if value.size > settings.TASK_IMPORT_MAX_FILE_SIZE:
+            raise serializers.ValidationError(
+                'The file is larger than {} bytes.'.format(settings.TASK_IMPORT_MAX_FILE_SIZE))
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get('format'):
+            extension = os.path.splitext(attrs['file'].name)[1].lstrip('.').lower()
+            if extension not in dict(TaskImportJob.IMPORT_FORMATS):
+                raise serializers.ValidationError('Give the format of the file, csv or ndjson.')
+            attrs['format'] = extension
+        return attrs
+
+    def get_errors(self, obj):
+        return json.loads(obj.errors)
+
+
+class TaskActivitySerializer(ModelSerializer):
+
+    class Meta:
+        model = TaskActivity
+        fields = (
+            'id',
+            'task',
+            'field',
+            'old_value',
+            'new_value',
+            'actor',
+            'created_at',
+        )
@@ -0,0 +1,186 @@
+import threading
+
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from projects import activity, events, search, stats
+from projects.membership import invalidate_memberships
+from projects.models import Project, ProjectStats, Task
+from projects.response_cache import invalidate_responses, project_tasks_scope
+from projects.versioning import bump_project_versions
+from users.models import User
+from users.serializers import UserSerializer
+
+# sent inside the transaction of every task write, including the bulk ones,
+# with the stats.TaskState of the tasks before (removed) and after (added) the write,
+# and the id of the user making it, if known
+tasks_changed = Signal(providing_args=['removed', 'added', 'actor_id'])
+
+# {project id: states of its deleted tasks} of the projects being deleted by this thread
+_deleting = threading.local()
+
+
+def _deleted_tasks():
+    if not hasattr(_deleting, 'projects'):
+        _deleting.projects = {}
+    return _deleting.projects
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def project_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_memberships([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_memberships(instance.members.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_memberships(pk_set)
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def project_members_versions(sender, instance, action, reverse, pk_set, **kwargs):
+    # members are cleared inside a transaction, bumping before the clear is not visible early
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'pre_clear'):
+            bump_project_versions([instance.pk])
+    elif action == 'pre_clear':
+        bump_project_versions(instance.projects.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        bump_project_versions(pk_set)
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def project_members_responses(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_responses(['projects'])
+
+
+@receiver(pre_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    invalidate_memberships(instance.members.values_list('id', flat=True))
+    _deleted_tasks()[instance.pk] = []
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted_responses(sender, instance, **kwargs):
+    invalidate_responses(['projects', project_tasks_scope(instance.pk)])
+    # its stats are deleted with it, the tasks are sent at once instead of applying a delta per task
+    removed = _deleted_tasks().pop(instance.pk, [])
+    if removed:
+        tasks_changed.send(sender=Task, removed=removed, added=[])
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # the member list and the unassigned tasks change with the user
+    tasks = Task.objects.filter(developer=instance)
+    task_project_ids = list(tasks.values_list('project_id', flat=True).distinct())
+    bump_project_versions(list(instance.projects.values_list('id', flat=True)) + task_project_ids)
+    tasks.update(updated_at=timezone.now())
+    invalidate_responses(['projects'] + [project_tasks_scope(project_id) for project_id in task_project_ids])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_memberships([instance.pk])
+    invalidate_responses(['users'])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(UserSerializer.Meta.fields):
+        # last_login and the other unlisted fields
+        return
+    invalidate_responses(['users'])
+    if created:
+        return
+    # members and developers are embedded with ?expand=members,developer
+    project_ids = set(instance.projects.values_list('id', flat=True)) | \
+        set(instance.tasks.values_list('project_id', flat=True).distinct())
+    bump_project_versions(project_ids)
+    invalidate_responses(['projects'] + [project_tasks_scope(project_id) for project_id in project_ids])
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # task lists embed the project with ?expand=project, ids of deleted projects may be reused
+    invalidate_responses(['projects', project_tasks_scope(instance.pk)])
+    if created:
+        ProjectStats.objects.get_or_create(project=instance)
+    else:
+        bump_project_versions([instance.pk])
+
+
+def _tracks_stats(update_fields):
+    return update_fields is None or not set(stats.TaskState._fields).isdisjoint(
+        Task._meta.get_field(name).attname for name in update_fields)
+
+
+@receiver(pre_save, sender=Task)
+def task_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    if instance.pk is None or raw:
+        instance._stats_removed = []
+    elif _tracks_stats(update_fields):
+        # the state the task was loaded with, a save of a stale instance skews the stats until
+        # they are rebuilt (rebuild_project_stats) as it overwrites the newer state anyway
+        state = stats.loaded_state(instance)
+        instance._stats_removed = [state] if state else stats.task_states(Task.objects.filter(pk=instance.pk))
+    else:
+        # none of the tracked fields is written
+        instance._stats_removed = [stats.task_state(instance)]
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        tasks_changed.send(sender=Task, removed=instance._stats_removed, added=[stats.task_state(instance)],
+                           actor_id=getattr(instance, '_actor_id', None))
+        stats.remember_saved(instance, update_fields)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    state = stats.task_state(instance)
+    project_tasks = _deleted_tasks().get(state.project_id)
+    if project_tasks is not None:
+        # sent with the project, see project_deleted_responses
+        project_tasks.append(state)
+    else:
+        tasks_changed.send(sender=Task, removed=[state], added=[])
+
+
+@receiver(tasks_changed)
+def update_project_stats(sender, removed, added, **kwargs):
+    stats.record_changes(removed, added)
+
+
+@receiver(tasks_changed)
+def update_project_versions(sender, removed, added, **kwargs):
+    bump_project_versions(state.project_id for state in removed + added)
+
+
+@receiver(tasks_changed)
+def update_task_list_responses(sender, removed, added, **kwargs):
+    invalidate_responses(project_tasks_scope(state.project_id) for state in removed + added)
+
+
+@receiver(tasks_changed)
+def record_task_activity(sender, removed, added, actor_id=None, **kwargs):
+    activity.capture(removed, added, actor_id)
+
+
+@receiver(tasks_changed)
+def publish_task_events(sender, removed, added, **kwargs):
+    events.publish_task_events(removed, added)
+
+
+@receiver(post_migrate)
+def task_search_triggers(sender, app_config, using, **kwargs):
+    if app_config.name == 'projects' and connections[using].vendor == 'sqlite':
+        search.restore_sqlite_triggers(using)
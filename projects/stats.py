@@ -0,0 +1,144 @@
+import datetime
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from projects.models import DeveloperTaskStats, ProjectStats, Task
+
+TaskState = namedtuple('TaskState', ('project_id', 'status', 'developer_id', 'due_date', 'id'))
+
+STATUS_FIELDS = {
+    'To do': 'to_do',
+    'In progress': 'in_progress',
+    'Done': 'done',
+}
+
+
+def task_state(task):
+    return TaskState(task.project_id, task.status, task.developer_id, task.due_date, task.pk)
+
+
+def task_states(tasks):
+    return [TaskState(*values) for values in tasks.order_by().values_list(*TaskState._fields)]
+
+
+def loaded_state(task):
+    """
+    TaskState of the task as it was loaded or last saved, None if some of its fields were not loaded
+    """
+    loaded = getattr(task, '_loaded_values', {})
+    if any(name not in loaded for name in TaskState._fields[:-1]):
+        return None
+    return TaskState(*(loaded[name] for name in TaskState._fields[:-1]), task.pk)
+
+
+def remember_saved(task, update_fields=None):
+    """
+    Makes the saved fields of the task its loaded state
+    """
+    names = set(TaskState._fields[:-1])
+    if update_fields is not None:
+        names &= {Task._meta.get_field(name).attname for name in update_fields}
+    task._loaded_values = dict(getattr(task, '_loaded_values', {}), **{name: getattr(task, name) for name in names})
+
+
+def _open_tasks(project_id):
+    return Task.objects.filter(project_id=project_id).exclude(status='Done').order_by()
+
+
+def rebuild(project_id, today=None):
+    """
+    Recomputes the stats of a project from its tasks
+    """
+    today = today or datetime.date.today()
+    with transaction.atomic():
+        counts = dict(Task.objects.filter(project_id=project_id).order_by()
+                      .values_list('status').annotate(count=Count('id')))
+        stats = ProjectStats(project_id=project_id, overdue_as_of=today,
+                             overdue=_open_tasks(project_id).filter(due_date__lt=today).count(),
+                             **{field: counts.get(status, 0) for status, field in STATUS_FIELDS.items()})
+        stats.save()
+        DeveloperTaskStats.objects.filter(project_id=project_id).delete()
+        DeveloperTaskStats.objects.bulk_create([
+            DeveloperTaskStats(project_id=project_id, developer_id=developer_id, open_tasks=open_tasks)
+            for developer_id, open_tasks in _open_tasks(project_id).filter(developer__isnull=False)
+            .values_list('developer').annotate(count=Count('id'))
+        ])
+    return stats
+
+
+def _apply(stats, removed, added):
+    fields = Counter()
+    developers = Counter()
+    for sign, states in ((-1, removed), (1, added)):
+        for state in states:
+            fields[STATUS_FIELDS[state.status]] += sign
+            if state.status == 'Done':
+                continue
+            if state.developer_id is not None:
+                developers[state.developer_id] += sign
+            if state.due_date < stats.overdue_as_of:
+                fields['overdue'] += sign
+    for field, change in fields.items():
+        setattr(stats, field, getattr(stats, field) + change)
+    for developer_id, change in developers.items():
+        if not change:
+            continue
+        rows = DeveloperTaskStats.objects.filter(project_id=stats.project_id, developer_id=developer_id)
+        if not rows.update(open_tasks=F('open_tasks') + change):
+            DeveloperTaskStats.objects.create(project_id=stats.project_id, developer_id=developer_id,
+                                              open_tasks=change)
+
+
+def _roll_forward(stats, today):
+    """
+    Counts the open tasks which became overdue since the stats were last rolled forward
+    """
+    if stats.overdue_as_of >= today:
+        return
+    stats.overdue += _open_tasks(stats.project_id).filter(due_date__gte=stats.overdue_as_of,
+                                                          due_date__lt=today).count()
+    stats.overdue_as_of = today
+
+
+def record_changes(removed, added, today=None):
+    """
+    Updates the stats of the projects touched by a task write, given the task states
+    before (removed) and after (added) it. Must be called after the write, in its transaction.
+    """
+    today = today or datetime.date.today()
+    changes = defaultdict(lambda: ([], []))
+    for state in removed:
+        changes[state.project_id][0].append(state)
+    for state in added:
+        changes[state.project_id][1].append(state)
+    with transaction.atomic():
+        # lock in a fixed order so concurrent writes to several projects cannot deadlock
+        for project_id in sorted(changes):
+            stats = ProjectStats.objects.select_for_update().filter(project_id=project_id).first()
+            if stats is None:
+                # built from scratch by the next read
+                continue
+            # the overdue delta is taken at the old overdue_as_of, the roll forward then
+            # counts the tasks in their new state
+            _apply(stats, *changes[project_id])
+            _roll_forward(stats, today)
+            stats.save()
+
+
+def project_stats(project_id, today=None):
+    """
+    Stats of a project, one query unless they were not rolled forward today yet
+    """
+    today = today or datetime.date.today()
+    stats = ProjectStats.objects.filter(project_id=project_id).first()
+    if stats is not None and stats.overdue_as_of >= today:
+        return stats
+    with transaction.atomic():
+        stats = ProjectStats.objects.select_for_update().filter(project_id=project_id).first()
+        if stats is None:
+            return rebuild(project_id, today)
+        _roll_forward(stats, today)
+        stats.save()
+    return stats
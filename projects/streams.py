@@ -0,0 +1,152 @@
+import asyncio
+import json
+import re
+
+from asgiref.sync import sync_to_async
+
+from django.db import close_old_connections
+from django.http import HttpRequest
+
+from rest_framework import exceptions
+from rest_framework.views import APIView
+
+from projects import events
+from projects.models import Project
+from projects.permissions import IsTaskProjectMember
+
+STREAM_PATH = re.compile(r'^/api/projects/(?P<project_id>\d+)/events/$')
+
+
+class TaskEventsPermissionView(APIView):
+    """
+    Authentication and permission checks of the task event stream, which is served by TaskEventStream
+    """
+    permission_classes = (IsTaskProjectMember, )
+
+
+def authorize(scope, project_id):
+    """
+    (user, None) if the stream request is allowed, else (None, the error response of the API)
+    """
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = scope['path']
+    request.META['QUERY_STRING'] = scope.get('query_string', b'').decode('latin1')
+    for name, value in scope.get('headers', ()):
+        request.META['HTTP_' + name.decode('latin1').upper().replace('-', '_')] = value.decode('latin1')
+    view = TaskEventsPermissionView()
+    view.args = ()
+    view.kwargs = {'project_id': project_id}
+    view.headers = {}
+    view.request = view.initialize_request(request)
+    try:
+        view.perform_authentication(view.request)
+        view.check_permissions(view.request)
+        return view.request.user, None
+    except exceptions.APIException as exc:
+        return None, view.handle_exception(exc)
+    finally:
+        close_old_connections()
+
+
+def is_member(user_id, project_id):
+    # read from the database, the membership cache may not be invalidated yet
+    try:
+        return Project.members.through.objects.filter(project_id=project_id, user_id=user_id).exists()
+    finally:
+        close_old_connections()
+
+
+def sse(event, data):
+    return 'event: {}\ndata: {}\n\n'.format(event, json.dumps(data, separators=(',', ':'))).encode()
+
+
+def render(envelope):
+    if envelope is events.KEEPALIVE:
+        return b': keepalive\n\n'
+    if envelope is events.RESET:
+        return sse('reset', {'detail': 'Events were dropped, refetch the tasks.'})
+    return b''.join(sse(event['type'], event) for event in envelope.message)
+
+
+class TaskEventStream:
+    """
+    ASGI application streaming the task create, update and delete events of a project as Server-Sent Events,
+    at /api/projects/<project_id>/events/ for the project members. A stream is a coroutine waiting on its
+    subscription queue, idle streams hold no thread. The stream ends once the user leaves the project.
+    """
+
+    async def authorize(self, scope, project_id):
+        return await sync_to_async(authorize)(scope, project_id)
+
+    async def __call__(self, scope, receive, send):
+        project_id = int(STREAM_PATH.match(scope['path']).group('project_id'))
+        user, error = await self.authorize(scope, project_id)
+        if error is not None:
+            await self.respond(send, error.status_code, error.data)
+            return
+
+        subscription = events.Subscription((events.project_channel(project_id), events.user_channel(user.pk)),
+                                           asyncio.get_event_loop())
+        events.hub.subscribe(subscription)
+        events.backend().listen()
+        disconnect = asyncio.ensure_future(self.wait_disconnect(receive, subscription))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    # proxies must not buffer the stream
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': b': connected\n\n', 'more_body': True})
+            await self.stream(send, subscription, user, project_id)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            events.hub.unsubscribe(subscription)
+            disconnect.cancel()
+
+    async def stream(self, send, subscription, user, project_id):
+        user_channel = events.user_channel(user.pk)
+        while True:
+            envelope = await subscription.get()
+            if envelope is None:
+                return
+            if envelope.channel == user_channel:
+                if await sync_to_async(is_member)(user.pk, project_id):
+                    continue
+                await send({'type': 'http.response.body', 'more_body': True,
+                            'body': sse('closed', {'detail': 'You are no longer a member of the project.'})})
+                return
+            if envelope.body is None:
+                envelope.body = render(envelope)
+            await send({'type': 'http.response.body', 'body': envelope.body, 'more_body': True})
+
+    @staticmethod
+    async def wait_disconnect(receive, subscription):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        subscription.close()
+
+    @staticmethod
+    async def respond(send, status, content):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': json.dumps(content).encode()})
+
+
+def router(application, stream=None):
+    """
+    ASGI application serving the task event streams and passing every other request to application
+    """
+    stream = stream or TaskEventStream()
+
+    async def route(scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET' and STREAM_PATH.match(scope['path']):
+            return await stream(scope, receive, send)
+        return await application(scope, receive, send)
+
+    return route
@@ -1,17 +1,106 @@
 import datetime
+from collections import defaultdict
+from itertools import groupby
+from operator import attrgetter
 
+from celery import shared_task
 from celery.schedules import crontab
 from celery.utils.log import get_task_logger
 from celery.task import periodic_task
 
-from django.core.mail import send_mass_mail
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
 
-from projects.models import Task
-from src import settings
+from projects.imports import run_import
+from projects.mail import dispatch_outbox, enqueue_mass_mail
+from projects.models import Task, TaskImportJob, TaskNotification
 
 logger = get_task_logger(__name__)
 
 
+def reminder_queryset(today=None):
+    """
+    Tasks whose reminder is due. remind_on is kept up to date on every task write,
+    so this is an index lookup instead of a scan of all tasks.
+    """
+    today = today or datetime.date.today()
+    return Task.objects.filter(remind_on__lte=today, developer__isnull=False).exclude(status='Done')
+
+
+def needs_notification(task, today):
+    """
+    True if the task was never notified about or changed since the last reminder
+    """
+    try:
+        return not task.notification.matches(task, today)
+    except TaskNotification.DoesNotExist:
+        return True
+
+
+def reminder_message(task, today):
+    return ('Task deadline is coming!',
+            '{} days left until {} deadline!'.format((task.due_date - today).days, task.title),
+            settings.EMAIL_HOST_USER,
+            [task.developer.email])
+
+
+def digest_message(tasks, today):
+    overdue = ['{} was due {}'.format(task.title, task.due_date) for task in tasks if task.due_date < today]
+    upcoming = ['{} days left until {} deadline'.format((task.due_date - today).days, task.title)
+                for task in tasks if task.due_date >= today]
+    sections = []
+    if overdue:
+        sections.append('Overdue tasks:\n' + '\n'.join(overdue))
+    if upcoming:
+        sections.append('Upcoming deadlines:\n' + '\n'.join(upcoming))
+    return ('Task deadlines digest',
+            '\n\n'.join(sections),
+            settings.EMAIL_HOST_USER,
+            [tasks[0].developer.email])
+
+
+def record_notifications(tasks, today):
+    """
+    Stores the notified state of tasks in the ledger, replacing the previous entries
+    """
+    with transaction.atomic():
+        TaskNotification.objects.filter(task_id__in=[task.id for task in tasks]).delete()
+        TaskNotification.objects.bulk_create([
+            TaskNotification(task_id=task.id,
+                             developer_id=task.developer_id,
+                             due_date=task.due_date,
+                             status=task.status,
+                             overdue=task.due_date < today)
+            for task in tasks
+        ])
+
+
+def reschedule_reminders(scanned, today):
+    """
+    Moves reminders of scanned tasks to the day after the deadline, or drops them for overdue tasks
+    """
+    by_due_date = defaultdict(list)
+    for task_id, due_date in scanned:
+        by_due_date[due_date].append(task_id)
+    for due_date, ids in by_due_date.items():
+        remind_on = due_date + datetime.timedelta(days=1) if due_date >= today else None
+        Task.objects.filter(id__in=ids).update(remind_on=remind_on)
+
+
+def shard_bounds(first_id, last_id, shards):
+    """
+    Splits [first_id, last_id] into at most `shards` contiguous id ranges
+    """
+    size = max(1, -(-(last_id - first_id + 1) // shards))
+    return [(lo, min(lo + size - 1, last_id)) for lo in range(first_id, last_id + 1, size)]
+
+
+def shard_field(digest):
+    # a digest needs all tasks of a developer in one shard
+    return 'developer_id' if digest else 'id'
+
+
 @periodic_task(
     run_every=(crontab(minute='*/1440')),
     name="task_send_email",
@@ -19,15 +108,102 @@ logger = get_task_logger(__name__)
 )
 def task_send_email():
     """
-    Sends email notifications about tasks deadlines every day
-    """
-    messages_list = []
-    for task in Task.objects.all():
-        if task.developer and task.status != 'Done' :
-            messages_list.append(('Task deadline is coming!',
-                                  '{} days left until {} deadline!'
-                                  .format(task.due_date-datetime.datetime.today(), Task.title),
-                                  settings.EMAIL_HOST_USER,
-                                  Task.developer.email))
-    send_mass_mail(tuple(messages_list))
-    logger.info("Sent email to ")
+    Sends email notifications about tasks deadlines whose reminder is due.
+    Splits the due reminders into id range shards processed by separate workers.
+    """
+    digest = settings.TASK_REMINDER_DIGEST
+    field = shard_field(digest)
+    bounds = reminder_queryset().aggregate(first_id=Min(field), last_id=Max(field))
+    if bounds['first_id'] is None:
+        logger.info("No task deadlines to notify about")
+        return
+    shards = shard_bounds(bounds['first_id'], bounds['last_id'], settings.TASK_REMINDER_SHARDS)
+    for first_id, last_id in shards:
+        task_send_email_shard.delay(first_id, last_id, digest)
+    logger.info("Dispatched {} reminder shards for {} {}-{}".format(len(shards), field, bounds['first_id'],
+                                                                    bounds['last_id']))
+
+
+def _reminders(tasks, today, digest):
+    """
+    Yields (message, notified tasks, scanned tasks) per task, or per developer in digest mode.
+    message is None when none of the scanned tasks changed since the last reminder.
+    """
+    if not digest:
+        for task in tasks:
+            if needs_notification(task, today):
+                yield reminder_message(task, today), [task], [task]
+            else:
+                yield None, [], [task]
+        return
+    for _, developer_tasks in groupby(tasks, key=attrgetter('developer_id')):
+        # groupby reads the first task of the next developer before this group is done
+        developer_tasks = list(developer_tasks)
+        changed = [task for task in developer_tasks if needs_notification(task, today)]
+        yield (digest_message(changed, today) if changed else None), changed, developer_tasks
+
+
+def _send_batch(batch, scanned, today):
+    # the outbox rows commit together with the ledger, so a crash loses no reminder and queues none twice.
+    # The outbox delivers at-least-once: a dispatcher dying mid-send sends its claimed emails again.
+    with transaction.atomic():
+        sent = enqueue_mass_mail([message for message, _ in batch])
+        record_notifications([task for _, tasks in batch for task in tasks], today)
+        reschedule_reminders(scanned, today)
+    return sent
+
+
+@shared_task(name="task_send_email_shard")
+def task_send_email_shard(first_id, last_id, digest=False):
+    """
+    Sends deadline reminders for the shard [first_id, last_id], streaming rows in chunks.
+    In digest mode the shard is a developer id range and each developer gets one message.
+    """
+    today = datetime.date.today()
+    chunk_size = settings.TASK_REMINDER_CHUNK_SIZE
+    field = shard_field(digest)
+    tasks = reminder_queryset(today).filter(**{field + '__gte': first_id, field + '__lte': last_id})\
+        .select_related('developer', 'notification').order_by(field, 'id')
+    report = {'first_id': first_id, 'last_id': last_id, 'scanned': 0, 'sent': 0}
+    batch = []
+    scanned = []
+    for message, notified, group in _reminders(tasks.iterator(chunk_size=chunk_size), today, digest):
+        report['scanned'] += len(group)
+        # only tasks whose reminder is in this batch or needs none are rescheduled with it
+        scanned.extend((task.id, task.due_date) for task in group)
+        if message is not None:
+            batch.append((message, notified))
+        if len(batch) >= chunk_size:
+            report['sent'] += _send_batch(batch, scanned, today)
+            batch = []
+            scanned.clear()
+    report['sent'] += _send_batch(batch, scanned, today)
+    logger.info("Shard {} {}-{}: scanned {} tasks, queued {} emails".format(field, first_id, last_id,
+                                                                            report['scanned'], report['sent']))
+    return report
+
+
+@periodic_task(
+    run_every=(crontab(minute='*')),
+    name="task_dispatch_outbox",
+    ignore_result=True
+)
+def task_dispatch_outbox():
+    """
+    Drains the email outbox in batches
+    """
+    while True:
+        report = dispatch_outbox()
+        logger.info("Outbox batch: fetched {fetched}, sent {sent}, retried {retried}, failed {failed} "
+                    "in {send_seconds:.2f}s".format(**report))
+        if report['fetched'] < settings.OUTBOX_BATCH_SIZE:
+            return
+
+
+@shared_task(name="task_import_tasks")
+def task_import_tasks(job_id):
+    job = TaskImportJob.objects.get(pk=job_id)
+    run_import(job)
+    logger.info("Import {}: processed {}, created {}, failed {}".format(job.pk, job.processed, job.created,
+                                                                        job.failed))
+    return {'processed': job.processed, 'created': job.created, 'failed': job.failed}
@@ -0,0 +1,171 @@
+import datetime
+import json
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from projects import activity
+from projects.models import Project, Task, TaskActivity
+
+User = get_user_model()
+
+
+class TaskActivityCaptureTestCase(TransactionTestCase):
+    """
+    The activity is written after the commit, which needs real transactions
+    """
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        caches[settings.LIST_RESPONSE_CACHE].clear()
+        activity.buffer.take()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer))
+        self.today = datetime.date.today()
+        self.task = Task.objects.create(title='task', description='task descr', due_date=self.today,
+                                        project=self.project)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.manager).key)
+        self.url = reverse('projects:task_details', kwargs={'project_id': self.project.id, 'pk': self.task.id})
+
+    def tearDown(self):
+        activity.buffer.take()
+
+    def change_task(self, **changes):
+        response = self.client.patch(self.url, changes)
+        self.assertEqual(200, response.status_code, response.content)
+
+    @override_settings(TASK_ACTIVITY_BUFFER_SIZE=0)
+    def test_changed_fields_only(self):
+        self.change_task(developer=self.developer.id, status='In progress', title='changed title')
+        self.change_task(description='changed description')
+        rows = TaskActivity.objects.order_by('field').values_list('task_id', 'project_id', 'actor_id', 'field',
+                                                                  'old_value', 'new_value')
+        self.assertEqual(list(rows), [
+            (self.task.id, self.project.id, self.manager.id, 'developer', None, str(self.developer.id)),
+            (self.task.id, self.project.id, self.manager.id, 'status', 'To do', 'In progress'),
+        ])
+
+    @override_settings(TASK_ACTIVITY_BUFFER_SIZE=0)
+    def test_bulk_update(self):
+        other = Task.objects.create(title='other', description='descr', due_date=self.today, status='Done',
+                                    project=self.project)
+        week = self.today + datetime.timedelta(days=7)
+        response = self.client.patch(reverse('projects:bulk_update_tasks', kwargs={'project_id': self.project.id}),
+                                     {'ids': [self.task.id, other.id], 'changes': {'status': 'Done', 'due_date': week}},
+                                     format='json')
+        self.assertEqual(200, response.status_code, response.content)
+        rows = TaskActivity.objects.order_by('task_id', 'field').values_list('task_id', 'field', 'new_value')
+        self.assertEqual(list(rows), [(self.task.id, 'due_date', week.isoformat()),
+                                      (self.task.id, 'status', 'Done'),
+                                      (other.id, 'due_date', week.isoformat())])
+
+    @override_settings(TASK_ACTIVITY_BUFFER_SIZE=100, TASK_ACTIVITY_FLUSH_SECONDS=60)
+    def test_buffered_until_flush(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.change_task(status='In progress')
+        self.assertFalse([query for query in queries if 'projects_taskactivity' in query['sql']])
+        self.assertFalse(TaskActivity.objects.exists())
+        self.assertEqual(activity.buffer.flush(), 1)
+        self.assertEqual(TaskActivity.objects.get().new_value, 'In progress')
+
+    @override_settings(TASK_ACTIVITY_BUFFER_SIZE=2, TASK_ACTIVITY_FLUSH_SECONDS=60)
+    def test_flushed_when_full(self):
+        self.change_task(status='In progress')
+        self.change_task(status='Done')
+        deadline = time.monotonic() + 5
+        while TaskActivity.objects.count() < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(list(TaskActivity.objects.order_by('id').values_list('new_value', flat=True)),
+                         ['In progress', 'Done'])
+
+    @override_settings(TASK_ACTIVITY_BUFFER_SIZE=100, TASK_ACTIVITY_FLUSH_SECONDS=60)
+    def test_failed_flush_is_logged(self):
+        self.change_task(status='In progress')
+        with mock.patch.object(TaskActivity.objects, 'bulk_create', side_effect=RuntimeError), \
+                self.assertLogs('projects.activity', 'ERROR') as logs:
+            self.assertEqual(activity.buffer.flush(), 0)
+        self.assertIn('1 rows dropped', logs.output[0])
+        self.assertEqual(activity.buffer.take(), [])
+
+    @override_settings(TASK_ACTIVITY_BUFFER_SIZE=0)
+    def test_no_activity_of_rolled_back_changes(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.task.status = 'Done'
+            self.task.save()
+            raise RuntimeError
+        self.assertFalse(TaskActivity.objects.exists())
+        self.assertEqual(activity.buffer.take(), [])
+
+
+class TaskActivityAPIViewTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.other_developer = User.objects.create(
+            username="other_developer",
+            user_type="Developer",
+            email="other@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.developer, ))
+        self.tasks = [Task.objects.create(title='task {}'.format(number), description='descr',
+                                          project=self.project) for number in range(2)]
+        TaskActivity.objects.bulk_create([
+            TaskActivity(task=self.tasks[number % 2], project=self.project, actor=self.developer, field='status',
+                         old_value='To do', new_value='In progress')
+            for number in range(15)
+        ])
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.developer).key)
+        self.url = reverse('projects:project_activity', kwargs={'project_id': self.project.id})
+
+    def test_project_history_newest_first(self):
+        expected = list(TaskActivity.objects.order_by('-id').values_list('id', flat=True))
+        content = json.loads(self.client.get(self.url, {'pagination': 'cursor'}).content)
+        ids = [row['id'] for row in content['results']]
+        ids += [row['id'] for row in json.loads(self.client.get(content['next']).content)['results']]
+        self.assertEqual(ids, expected)
+
+    def test_task_history(self):
+        url = reverse('projects:task_activity', kwargs={'project_id': self.project.id, 'pk': self.tasks[1].id})
+        content = json.loads(self.client.get(url).content)
+        self.assertEqual(content['count'], 7)
+        self.assertEqual({row['task'] for row in content['results']}, {self.tasks[1].id})
+
+    def test_members_only(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.other_developer).key)
+        self.assertEqual(403, self.client.get(self.url).status_code)
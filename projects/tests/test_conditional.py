@@ -0,0 +1,120 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.models import Project, Task
+
+User = get_user_model()
+
+
+class ConditionalGetTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.outsider = User.objects.create(
+            username="outsider",
+            user_type="Developer",
+            email="outsider@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer))
+        self.task = Task.objects.create(title='task', description='descr', developer=self.developer,
+                                        due_date=datetime.date.today() + datetime.timedelta(days=7),
+                                        project=self.project)
+        self.manager_token = Token.objects.create(user=self.manager)
+        self.outsider_token = Token.objects.create(user=self.outsider)
+        self.api_authentication(self.manager_token)
+        self.tasks_url = reverse('projects:tasks_list', kwargs={'project_id': self.project.id})
+        self.task_url = reverse('projects:task_details', kwargs={'project_id': self.project.id,
+                                                                 'pk': self.task.id})
+        self.project_url = reverse('projects:project_details', kwargs={'pk': self.project.id})
+
+    def api_authentication(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        return response['ETag']
+
+    def test_unchanged_task_list_is_not_queried(self):
+        etag = self.etag(self.tasks_url)
+        # project version lookup only, the token is cached
+        with self.assertNumQueries(1):
+            response = self.client.get(self.tasks_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+        self.assertFalse(response.content)
+
+    def test_etag_depends_on_query(self):
+        self.assertNotEqual(self.etag(self.tasks_url), self.etag(self.tasks_url + '?page=1'))
+
+    def test_task_writes_change_list_etag(self):
+        etag = self.etag(self.tasks_url)
+        self.task.status = 'In progress'
+        self.task.save()
+        response = self.client.get(self.tasks_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        etag = response['ETag']
+
+        url = reverse('projects:bulk_update_tasks', kwargs={'project_id': self.project.id})
+        self.client.patch(url, {'ids': [self.task.id], 'changes': {'status': 'Done'}}, format='json')
+        self.assertNotEqual(etag, self.etag(self.tasks_url))
+
+    def test_last_modified(self):
+        response = self.client.get(self.tasks_url)
+        response = self.client.get(self.tasks_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(304, response.status_code)
+
+    def test_project_etag_changes_with_members(self):
+        etag = self.etag(self.project_url)
+        self.assertEqual(304, self.client.get(self.project_url, HTTP_IF_NONE_MATCH=etag).status_code)
+        self.project.members.add(self.outsider)
+        self.assertEqual(200, self.client.get(self.project_url, HTTP_IF_NONE_MATCH=etag).status_code)
+
+    def test_task_detail(self):
+        etag = self.etag(self.task_url)
+        self.assertEqual(304, self.client.get(self.task_url, HTTP_IF_NONE_MATCH=etag).status_code)
+        self.task.title = 'changed'
+        self.task.save()
+        self.assertEqual(200, self.client.get(self.task_url, HTTP_IF_NONE_MATCH=etag).status_code)
+
+    def test_expanded_task_detail(self):
+        url = self.task_url + '?expand=developer,project'
+        etag = self.etag(url)
+        self.assertEqual(304, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
+        self.developer.username = 'renamed'
+        self.developer.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        etag = response['ETag']
+        self.project.title = 'renamed'
+        self.project.save()
+        self.assertEqual(200, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
+
+    def test_permissions_are_checked_first(self):
+        etag = self.etag(self.project_url)
+        self.api_authentication(self.outsider_token)
+        self.assertEqual(403, self.client.get(self.project_url, HTTP_IF_NONE_MATCH=etag).status_code)
+        self.assertEqual(403, self.client.get(self.tasks_url, HTTP_IF_NONE_MATCH=etag).status_code)
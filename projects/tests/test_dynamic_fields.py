@@ -0,0 +1,89 @@
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.models import Project, Task
+
+User = get_user_model()
+
+
+class DynamicFieldsTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        caches[settings.LIST_RESPONSE_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developers = [User.objects.create(username="developer {}".format(number),
+                                               user_type="Developer",
+                                               email="test{}@sdsf.com".format(number),
+                                               password=make_password("1111"))
+                           for number in range(3)]
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set([self.manager] + self.developers)
+        for number in range(6):
+            Task.objects.create(title='task {}'.format(number), description='descr',
+                                developer=self.developers[number % 3],
+                                due_date=datetime.date.today() + datetime.timedelta(days=number),
+                                project=self.project)
+        self.manager_token = Token.objects.create(user=self.manager)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.manager_token.key)
+        self.project_url = reverse('projects:project_details', kwargs={'pk': self.project.id})
+        self.tasks_url = reverse('projects:tasks_list', kwargs={'project_id': self.project.id})
+
+    def test_project_detail_links_collections(self):
+        content = json.loads(self.client.get(self.project_url).content)
+        self.assertNotIn('members', content)
+        self.assertEqual(content['members_count'], 4)
+        self.assertTrue(content['tasks'].endswith(self.tasks_url))
+
+    def test_project_detail_expand(self):
+        content = json.loads(self.client.get(self.project_url, {'expand': 'members,tasks'}).content)
+        self.assertEqual([member['username'] for member in content['members']][0], 'manager')
+        self.assertEqual(len(content['tasks']), 6)
+        self.assertEqual(content['members_count'], 4)
+
+    def test_sparse_fields(self):
+        content = json.loads(self.client.get(self.tasks_url, {'fields': 'id,title'}).content)
+        self.assertEqual(set(content['results'][0]), {'id', 'title'})
+        content = json.loads(self.client.get(self.project_url, {'fields': 'title,unknown'}).content)
+        self.assertEqual(content, {'title': 'abc'})
+
+    def test_expanded_relations_are_loaded_in_one_query(self):
+        self.client.get(self.tasks_url)
+        # project version, count, page with the developers joined
+        with self.assertNumQueries(3):
+            response = self.client.get(self.tasks_url, {'expand': 'developer'})
+        developer = json.loads(response.content)['results'][0]['developer']
+        self.assertEqual(developer['username'], 'developer 0')
+
+        with self.assertNumQueries(3):
+            # count, page, prefetched members
+            self.client.get(reverse('projects:projects_list'), {'expand': 'members'})
+
+    def test_members_stay_writable(self):
+        response = self.client.patch(self.project_url, {'members': [self.manager.id, self.developers[0].id]})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(json.loads(response.content)['members_count'], 2)
+
+    def test_user_changes_reach_expanded_lists(self):
+        self.client.get(self.tasks_url, {'expand': 'developer'})
+        self.developers[0].username = 'renamed'
+        self.developers[0].save()
+        response = self.client.get(self.tasks_url, {'expand': 'developer'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(json.loads(response.content)['results'][0]['developer']['username'], 'renamed')
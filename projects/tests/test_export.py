@@ -0,0 +1,97 @@
+import csv
+import datetime
+import io
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.models import Project, Task
+
+User = get_user_model()
+
+
+class TaskExportAPIViewTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        caches[settings.LIST_RESPONSE_CACHE].clear()
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.outsider = User.objects.create(
+            username="outsider",
+            user_type="Developer",
+            email="outsider@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.developer, ))
+        self.today = datetime.date.today()
+        for number in range(6):
+            Task.objects.create(title='task, "{}"'.format(number), description='line\nbreak',
+                                developer=self.developer if number % 2 else None,
+                                status=Task.TASK_STATUSES[number % 3][0],
+                                due_date=self.today + datetime.timedelta(days=number), project=self.project)
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.api_authentication(self.developer_token)
+
+    def api_authentication(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def url(self, export_format):
+        return reverse('projects:export_tasks', kwargs={'project_id': self.project.id,
+                                                        'export_format': export_format})
+
+    def content(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response = self.client.get(self.url('csv'))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(self.content(response))))
+        self.assertEqual(rows[0], ['id', 'title', 'description', 'due_date', 'status', 'developer', 'project'])
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1][1:5], ['task, "0"', 'line\nbreak', str(self.today), 'To do'])
+        self.assertEqual(rows[1][5], '')
+
+    def test_ndjson_with_filters(self):
+        response = self.client.get(self.url('ndjson'), {'developer': self.developer.id,
+                                                        'due_after': str(self.today + datetime.timedelta(days=2))})
+        items = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([item['title'] for item in items], ['task, "3"', 'task, "5"'])
+        self.assertEqual(items[0]['developer'], self.developer.id)
+
+    def test_sparse_fields(self):
+        response = self.client.get(self.url('ndjson'), {'status': 'Done', 'fields': 'id,status'})
+        items = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([set(item) for item in items], [{'id', 'status'}] * 2)
+
+    def test_list_uses_the_same_filters(self):
+        response = self.client.get(reverse('projects:tasks_list', kwargs={'project_id': self.project.id}),
+                                   {'unassigned': 'true', 'due_before': str(self.today + datetime.timedelta(days=2))})
+        self.assertEqual([task['title'] for task in json.loads(response.content)['results']],
+                         ['task, "0"', 'task, "2"'])
+
+    def test_invalid_filter(self):
+        response = self.client.get(self.url('csv'), {'due_after': 'tomorrow'})
+        self.assertEqual(400, response.status_code)
+
+    def test_unknown_format(self):
+        self.assertEqual(404, self.client.get(self.url('xml')).status_code)
+
+    def test_not_member(self):
+        self.api_authentication(Token.objects.create(user=self.outsider))
+        self.assertEqual(403, self.client.get(self.url('csv')).status_code)
@@ -0,0 +1,83 @@
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db.models import Count
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.models import Project, Task
+from projects.serializers.fast import compile_fields
+from projects.serializers.project_serializers import ProjectSerializer
+from projects.serializers.task_serializers import TaskSerializer
+from users.serializers import UserRetrieveUpdateDestroySerializer
+
+User = get_user_model()
+
+
+class FastListSerializationTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        caches[settings.LIST_RESPONSE_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer))
+        Project.objects.create(title='empty', description='no members').members.set((self.manager, ))
+        Project.objects.create(title='other', description='not listed')
+        for number in range(5):
+            Task.objects.create(title='task {}'.format(number), description='descr',
+                                developer=self.developer if number % 2 else None,
+                                status=Task.TASK_STATUSES[number % 3][0],
+                                due_date=datetime.date.today() + datetime.timedelta(days=number),
+                                project=self.project)
+        self.manager_token = Token.objects.create(user=self.manager)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.manager_token.key)
+
+    def results(self, url, params=None):
+        return json.loads(self.client.get(url, params).content)['results']
+
+    def serialized(self, serializer_class, queryset):
+        return json.loads(json.dumps(serializer_class(queryset, many=True).data))
+
+    def test_serializers_compile(self):
+        for serializer_class in (TaskSerializer, ProjectSerializer, UserRetrieveUpdateDestroySerializer):
+            self.assertIsNotNone(compile_fields(serializer_class))
+
+    def test_task_list_matches_serializer(self):
+        url = reverse('projects:tasks_list', kwargs={'project_id': self.project.id})
+        self.assertEqual(self.results(url), self.serialized(TaskSerializer, Task.objects.order_by('due_date', 'id')))
+
+    def test_project_list_matches_serializer(self):
+        projects = Project.objects.filter(id__in=self.manager.projects.values('id')) \
+            .annotate(members_count=Count('members')).order_by('id')
+        self.assertEqual(self.results(reverse('projects:projects_list')),
+                         self.serialized(ProjectSerializer, projects))
+
+    def test_user_list_matches_serializer(self):
+        self.assertEqual(self.results(reverse('users:users_list')),
+                         self.serialized(UserRetrieveUpdateDestroySerializer, User.objects.order_by('id')))
+
+    def test_sparse_fields(self):
+        url = reverse('projects:tasks_list', kwargs={'project_id': self.project.id})
+        self.assertEqual(self.results(url, {'fields': 'due_date,id'})[0],
+                         {'id': Task.objects.order_by('due_date', 'id')[0].id,
+                          'due_date': str(datetime.date.today())})
@@ -0,0 +1,147 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.imports import run_import
+from projects.models import Project, Task, TaskImportJob
+from projects.stats import project_stats
+from projects.tasks import task_import_tasks
+
+User = get_user_model()
+
+
+class TaskImportTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, TASK_IMPORT_BATCH_SIZE=2)
+        self.settings_override.enable()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.other_developer = User.objects.create(
+            username="other_developer",
+            user_type="Developer",
+            email="testdev@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer))
+        self.due_date = str(datetime.date.today() + datetime.timedelta(days=7))
+        self.manager_token = Token.objects.create(user=self.manager)
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.api_authentication(self.manager_token)
+        self.url = reverse('projects:import_tasks', kwargs={'project_id': self.project.id})
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def api_authentication(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def upload(self, name, content, **data):
+        return self.client.post(self.url, dict(data, file=SimpleUploadedFile(name, content.encode())),
+                                format='multipart')
+
+    def import_file(self, name, content, **data):
+        """
+        Uploads the file, runs the queued import like the worker would and returns the job from its detail URL
+        """
+        response = self.upload(name, content, **data)
+        self.assertEqual(202, response.status_code, response.content)
+        job = json.loads(response.content)
+        self.assertEqual(job['status'], 'Pending')
+        run_import(TaskImportJob.objects.get(pk=job['id']))
+        url = reverse('projects:import_job', kwargs={'project_id': self.project.id, 'pk': job['id']})
+        return json.loads(self.client.get(url).content)
+
+    def test_csv_import(self):
+        lines = ['title,description,due_date,developer']
+        lines += ['task {},descr,{},{}'.format(number, self.due_date, self.developer.id) for number in range(3)]
+        lines += ['not member,descr,{},{}'.format(self.due_date, self.other_developer.id),
+                  'manager,descr,{},{}'.format(self.due_date, self.manager.id),
+                  'bad date,descr,someday,{}'.format(self.developer.id)]
+        job = self.import_file('tasks.csv', '\n'.join(lines))
+        self.assertEqual((job['status'], job['processed'], job['created'], job['failed']), ('Done', 6, 3, 3))
+        self.assertEqual([error['line'] for error in job['errors']], [5, 6, 7])
+        self.assertEqual(job['errors'][0]['errors']['non_field_errors'][0], 'Assigned user must be project member.')
+        self.assertEqual(job['errors'][1]['errors']['non_field_errors'][0], 'Assigned user must be developer.')
+        self.assertIn('due_date', job['errors'][2]['errors'])
+
+        tasks = Task.objects.filter(project=self.project, developer=self.developer)
+        self.assertEqual(tasks.count(), 3)
+        self.assertFalse(tasks.filter(remind_on__isnull=True).exists())
+        self.assertEqual(project_stats(self.project.id).to_do, 3)
+
+    def test_ndjson_import(self):
+        lines = [json.dumps({'title': 'task', 'description': 'descr', 'due_date': self.due_date,
+                             'developer': self.developer.id}),
+                 '{not json',
+                 '',
+                 json.dumps([1, 2])]
+        job = self.import_file('tasks.ndjson', '\n'.join(lines))
+        self.assertEqual((job['processed'], job['created'], job['failed']), (3, 1, 2))
+        self.assertEqual([error['line'] for error in job['errors']], [2, 4])
+
+    def test_job_status(self):
+        job = self.import_file('tasks.txt', 'title,description,due_date,developer\n', format='csv')
+        url = reverse('projects:import_job', kwargs={'project_id': self.project.id, 'pk': job['id']})
+        self.api_authentication(self.developer_token)
+        content = json.loads(self.client.get(url).content)
+        self.assertEqual((content['status'], content['processed']), ('Done', 0))
+
+    def test_import_queued_on_commit(self):
+        with mock.patch('projects.views.task_views.transaction.on_commit') as on_commit, \
+                mock.patch.object(task_import_tasks, 'delay') as delay:
+            job = json.loads(self.upload('tasks.csv', 'title,description,due_date,developer\n').content)
+            delay.assert_not_called()
+            on_commit.call_args[0][0]()
+        delay.assert_called_once_with(job['id'])
+
+    def test_file_deleted_when_done(self):
+        job = self.import_file('tasks.ndjson', json.dumps({'title': 'a', 'description': 'b',
+                                                           'developer': self.developer.id}))
+        self.assertEqual(job['status'], 'Done')
+        self.assertEqual(TaskImportJob.objects.get(pk=job['id']).file.name, '')
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'task_imports')), [])
+
+    @override_settings(TASK_IMPORT_MAX_FILE_SIZE=10)
+    def test_file_size_limit(self):
+        response = self.upload('tasks.csv', 'title,description,due_date,developer\n')
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(json.loads(response.content), {'file': ['The file is larger than 10 bytes.']})
+
+    def test_format_required(self):
+        response = self.upload('tasks.txt', 'title\n')
+        self.assertEqual(400, response.status_code)
+
+    def test_import_as_developer(self):
+        self.api_authentication(self.developer_token)
+        self.assertEqual(403, self.upload('tasks.csv', 'title\n').status_code)
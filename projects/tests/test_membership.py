@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.test import TestCase
+
+from projects.membership import is_project_member
+from projects.models import Project
+
+User = get_user_model()
+
+
+class ProjectMembershipCacheTestCase(TestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+
+    def test_cached_lookup_needs_no_query(self):
+        self.project.members.add(self.developer)
+        with self.assertNumQueries(1):
+            self.assertTrue(is_project_member(self.developer, self.project.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_project_member(self.developer, self.project.id))
+            self.assertFalse(is_project_member(self.developer, self.project.id + 1))
+
+    def test_invalidated_on_membership_changes(self):
+        self.assertFalse(is_project_member(self.developer, self.project.id))
+        self.project.members.add(self.developer)
+        self.assertTrue(is_project_member(self.developer, self.project.id))
+        self.project.members.remove(self.developer)
+        self.assertFalse(is_project_member(self.developer, self.project.id))
+        self.developer.projects.add(self.project)
+        self.assertTrue(is_project_member(self.developer, self.project.id))
+        self.project.members.clear()
+        self.assertFalse(is_project_member(self.developer, self.project.id))
+
+    def test_invalidated_on_project_delete(self):
+        self.project.members.add(self.developer)
+        self.assertTrue(is_project_member(self.developer, self.project.id))
+        project_id = self.project.id
+        self.project.delete()
+        self.assertFalse(is_project_member(self.developer, project_id))
@@ -0,0 +1,122 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.mail import ConnectionPool, TokenBucket, claim_outbox, dispatch_outbox, enqueue_mass_mail
+from projects.models import OutgoingEmail
+
+User = get_user_model()
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketTestCase(TestCase):
+
+    def test_burst_then_rate_limited(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            bucket.take()
+        self.assertEqual(clock.now, 0)
+        bucket.take()
+        self.assertAlmostEqual(clock.now, 0.5)
+
+
+class DispatchOutboxTestCase(TestCase):
+
+    def setUp(self):
+        self.pool = ConnectionPool(2)
+        self.bucket = TokenBucket(rate=1000, capacity=1000)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_enqueued_mail_is_sent_in_batches(self):
+        enqueue_mass_mail([('subject {}'.format(i), 'body', 'from@example.com', ['to@example.com'])
+                           for i in range(3)])
+        self.assertEqual(len(mail.outbox), 0)
+        report = dispatch_outbox(batch_size=2, pool=self.pool, bucket=self.bucket)
+        self.assertEqual((report['fetched'], report['sent']), (2, 2))
+        report = dispatch_outbox(batch_size=2, pool=self.pool, bucket=self.bucket)
+        self.assertEqual((report['fetched'], report['sent']), (1, 1))
+        self.assertEqual([message.subject for message in mail.outbox], ['subject 0', 'subject 1', 'subject 2'])
+        self.assertFalse(OutgoingEmail.objects.filter(status='Pending').exists())
+
+    def test_failed_send_is_retried_with_backoff(self):
+        enqueue_mass_mail([('subject', 'body', 'from@example.com', ['to@example.com'])])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=OSError('connection refused')):
+            report = dispatch_outbox(pool=self.pool, bucket=self.bucket)
+        self.assertEqual(report['retried'], 1)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('Pending', 1))
+        self.assertEqual(email.last_error, 'connection refused')
+        # not due before the backoff expires
+        self.assertEqual(dispatch_outbox(pool=self.pool, bucket=self.bucket)['fetched'], 0)
+
+    def test_send_gives_up_after_max_attempts(self):
+        enqueue_mass_mail([('subject', 'body', 'from@example.com', ['to@example.com'])])
+        OutgoingEmail.objects.update(attempts=4)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=OSError('connection refused')):
+            report = dispatch_outbox(pool=self.pool, bucket=self.bucket)
+        self.assertEqual(report['failed'], 1)
+        self.assertEqual(OutgoingEmail.objects.get().status, 'Failed')
+
+    def test_claimed_emails_are_skipped_while_sending(self):
+        enqueue_mass_mail([('subject', 'body', 'from@example.com', ['to@example.com'])])
+        claimed = []
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=lambda messages: claimed.extend(claim_outbox(10))):
+            self.assertEqual(dispatch_outbox(pool=self.pool, bucket=self.bucket)['sent'], 1)
+        self.assertEqual(claimed, [])
+
+    def test_expired_claim_is_sent_again(self):
+        enqueue_mass_mail([('subject', 'body', 'from@example.com', ['to@example.com'])])
+        # the dispatcher died after claiming the email
+        self.assertEqual(len(claim_outbox(10)), 1)
+        self.assertEqual(dispatch_outbox(pool=self.pool, bucket=self.bucket)['fetched'], 0)
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_outbox(pool=self.pool, bucket=self.bucket)['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class OutboxStatsAPIViewTestCase(APITestCase):
+    url = reverse('projects:outbox_stats')
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username="admin",
+            user_type="Manager",
+            email='admin@dgd.sf',
+            is_staff=True,
+            password=make_password("1111"),
+        )
+        self.admin_token = Token.objects.create(user=self.admin)
+
+    def test_queue_depth(self):
+        enqueue_mass_mail([('subject', 'body', 'from@example.com', ['to@example.com'])])
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.admin_token.key)
+        response = self.client.get(self.url)
+        content = json.loads(response.content)
+        self.assertEqual(content['queue_depth'], 1)
+        self.assertEqual(content['due'], 1)
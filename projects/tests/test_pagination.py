@@ -0,0 +1,131 @@
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.models import Project, Task
+
+User = get_user_model()
+
+
+class TaskListCursorPaginationTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.developer, ))
+        today = datetime.date.today()
+        # several tasks share a due date so the id tiebreaker is needed
+        Task.objects.bulk_create([
+            Task(title='task {}'.format(number), description='descr', developer=self.developer,
+                 due_date=today + datetime.timedelta(days=number % 4), project=self.project)
+            for number in range(25)
+        ])
+        self.expected = list(Task.objects.order_by('due_date', 'id').values_list('id', flat=True))
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.developer_token.key)
+        self.url = reverse('projects:tasks_list', kwargs={'project_id': self.project.id})
+
+    def test_walk_forward_and_back(self):
+        content = json.loads(self.client.get(self.url, {'pagination': 'cursor'}).content)
+        self.assertNotIn('count', content)
+        self.assertIsNone(content['previous'])
+        pages = [[task['id'] for task in content['results']]]
+        while content['next']:
+            content = json.loads(self.client.get(content['next']).content)
+            pages.append([task['id'] for task in content['results']])
+        self.assertEqual([task_id for page in pages for task_id in page], self.expected)
+        self.assertEqual(len(pages), 3)
+
+        content = json.loads(self.client.get(content['previous']).content)
+        self.assertEqual([task['id'] for task in content['results']], pages[1])
+
+    def test_count_on_request(self):
+        content = json.loads(self.client.get(self.url, {'pagination': 'cursor', 'count': 'true'}).content)
+        self.assertEqual(content['count'], 25)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+        self.assertEqual(404, response.status_code)
+
+    def test_page_number_mode_by_default(self):
+        content = json.loads(self.client.get(self.url, {'page': 2}).content)
+        self.assertEqual(content['count'], 25)
+        self.assertEqual([task['id'] for task in content['results']], self.expected[10:20])
+
+
+class TaskListFilterTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        caches[settings.LIST_RESPONSE_CACHE].clear()
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.developer, ))
+        self.today = datetime.date.today()
+        Task.objects.bulk_create([
+            Task(title='task {}'.format(number), description='descr', developer=self.developer,
+                 due_date=self.today + datetime.timedelta(days=number % 6 - 3),
+                 status=Task.TASK_STATUSES[number % 3][0], project=self.project)
+            for number in range(18)
+        ])
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.developer_token.key)
+        self.url = reverse('projects:tasks_list', kwargs={'project_id': self.project.id})
+
+    def ids(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(200, response.status_code, response.content)
+        return [task['id'] for task in json.loads(response.content)['results']]
+
+    def test_several_statuses_ordered_by_status(self):
+        expected = list(Task.objects.filter(status__in=['To do', 'Done'])
+                        .order_by('-status', '-due_date', '-id').values_list('id', flat=True)[:10])
+        self.assertEqual(self.ids({'status': ['To do', 'Done'], 'ordering': '-status'}), expected)
+
+    def test_overdue(self):
+        expected = list(Task.objects.filter(due_date__lt=self.today).exclude(status='Done')
+                        .order_by('due_date', 'id').values_list('id', flat=True))
+        self.assertEqual(self.ids({'overdue': 'true'}), expected)
+
+    def test_descending_due_date_with_cursor(self):
+        content = json.loads(self.client.get(self.url, {'ordering': '-due_date', 'pagination': 'cursor'}).content)
+        ids = [task['id'] for task in content['results']]
+        ids += [task['id'] for task in json.loads(self.client.get(content['next']).content)['results']]
+        self.assertEqual(ids, list(Task.objects.order_by('-due_date', '-id').values_list('id', flat=True)))
+
+    def test_unsupported_combination(self):
+        for params in ({'status': 'To do', 'ordering': 'id'},
+                       {'due_after': str(self.today), 'ordering': 'status'},
+                       {'ordering': 'id,status'},
+                       {'unassigned': 'false', 'status': 'To do', 'ordering': 'id'}):
+            with self.subTest(params=params):
+                self.assertEqual(400, self.client.get(self.url, params).status_code)
+
+    def test_any_combination_of_a_developer_tasks(self):
+        expected = list(Task.objects.filter(due_date__gte=self.today)
+                        .order_by('id').values_list('id', flat=True))
+        self.assertEqual(self.ids({'developer': self.developer.id, 'due_after': str(self.today),
+                                   'ordering': 'id'}), expected)
@@ -1,13 +1,18 @@
 import json
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
 from django.urls import reverse
 
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 
+from projects.membership import is_project_member
 from projects.models import *
+from projects.serializers.project_serializers import ProjectMembersSerializer
 
 User = get_user_model()
 
@@ -35,6 +40,9 @@ class ProjectListAPIViewTestCase(APITestCase):
                                                     description='asdasdasd',
                                                     ))
 
+        self.projects[0].members.set((self.manager, self.developer))
+        self.projects[1].members.set((self.manager, ))
+
         self.manager_token = Token.objects.create(user=self.manager)
         self.developer_token = Token.objects.create(user=self.developer)
 
@@ -57,8 +65,9 @@ class ProjectListAPIViewTestCase(APITestCase):
     def test_view_list_with_login_as_dev(self):
         self.api_authentication(self.developer_token)
         response = self.client.get(self.url)
+        # only the projects the developer is a member of
         content = json.loads(response.content).get("count")
-        self.assertTrue(content == len(self.projects))
+        self.assertTrue(content == 1)
         content = json.loads(response.content).get("results")[0].get("title")
         self.assertTrue(content == self.projects[0].title)
 
@@ -212,3 +221,85 @@ class ProjectDetailAPIViewTestCase(APITestCase):
                                          'members': [self.manager.id, ]})
         content = json.loads(response.content).get('detail')
         self.assertTrue(content == 'You do not have permission to perform this action.')
+
+
+class ProjectMembersAPIViewTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='test project',
+                                              description='test description',
+                                              )
+        self.project.members.set((self.manager, self.developer))
+        self.manager_token = Token.objects.create(user=self.manager)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.manager_token.key)
+        self.add_url = reverse('projects:add_project_members', kwargs={'pk': self.project.id})
+        self.remove_url = reverse('projects:remove_project_members', kwargs={'pk': self.project.id})
+
+    def create_developers(self, count):
+        User.objects.bulk_create([User(username='developer {}'.format(number), email='{}@dev.com'.format(number),
+                                       user_type='Developer') for number in range(count)])
+        return list(User.objects.filter(username__startswith='developer ').values_list('id', flat=True))
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        ids = self.create_developers(1000)
+        self.client.post(self.add_url, {'ids': ids[:10]}, format='json')
+        # project, in_bulk, savepoint, lock, current members, insert, version bump, release;
+        # SQLite splits in_bulk and the insert in two batches of its parameter limit
+        with self.assertNumQueries(10):
+            response = self.client.post(self.add_url, {'ids': ids}, format='json')
+        self.assertEqual(json.loads(response.content), {'added': 990})
+        self.assertEqual(self.project.members.count(), 1002)
+        self.assertTrue(is_project_member(User.objects.get(pk=ids[-1]), self.project.id))
+
+    def test_remove(self):
+        ids = self.create_developers(3)
+        self.client.post(self.add_url, {'ids': ids}, format='json')
+        response = self.client.post(self.remove_url, {'ids': ids[:2]}, format='json')
+        self.assertEqual(json.loads(response.content), {'removed': 2})
+        response = self.client.post(self.remove_url, {'ids': ids}, format='json')
+        self.assertEqual(json.loads(response.content), {'removed': 1})
+        self.assertEqual(set(self.project.members.all()), {self.manager, self.developer})
+
+    def test_removing_non_members_changes_nothing(self):
+        outsider = self.create_developers(1)
+        self.project.members.remove(self.developer)
+        response = self.client.post(self.remove_url, {'ids': outsider}, format='json')
+        self.assertEqual(json.loads(response.content), {'removed': 0})
+
+    def test_members_added_meanwhile_are_skipped(self):
+        ids = self.create_developers(2)
+        self.project.members.add(ids[0])
+        # as if the detail PUT added the member after the current members were read
+        with mock.patch.object(ProjectMembersSerializer, 'current_members', return_value=set()):
+            response = self.client.post(self.add_url, {'ids': ids}, format='json')
+        self.assertEqual(200, response.status_code, response.content)
+        self.assertEqual(self.project.members.count(), 4)
+
+    def test_manager_and_developer_remain(self):
+        response = self.client.post(self.remove_url, {'ids': [self.developer.id]}, format='json')
+        self.assertEqual(json.loads(response.content), ['Project need to have at least one manager and one developer.'])
+        self.assertEqual(self.project.members.count(), 2)
+
+    def test_unknown_users(self):
+        response = self.client.post(self.add_url, {'ids': [self.developer.id, 0]}, format='json')
+        self.assertEqual(json.loads(response.content), {'ids': ['Unknown users: 0.']})
+
+    def test_managers_of_the_project_only(self):
+        developer_token = Token.objects.create(user=self.developer)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + developer_token.key)
+        self.assertEqual(403, self.client.post(self.add_url, {'ids': [self.manager.id]}, format='json').status_code)
+        self.project.members.remove(self.manager)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.manager_token.key)
+        self.assertEqual(403, self.client.post(self.add_url, {'ids': [self.manager.id]}, format='json').status_code)
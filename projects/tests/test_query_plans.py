@@ -0,0 +1,139 @@
+import datetime
+import re
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase
+
+from projects.filters import TaskFilter
+from projects.models import Project, Task, TaskActivity
+from projects.pagination import KeysetPagination
+from projects.tasks import reminder_queryset
+from projects.views.task_views import TaskDetailView, TaskListAPIView
+
+User = get_user_model()
+
+SEQUENTIAL_SCANS = {
+    'postgresql': re.compile(r'Seq Scan on projects_task(activity)?\b'),
+    'sqlite': re.compile(r'\bSCAN (TABLE )?projects_task(activity)?\b'),
+}
+
+SORTS = {
+    'postgresql': re.compile(r'^\s*(->\s*)?(Incremental )?Sort\b', re.M),
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+}
+
+
+class TaskQueryPlanTestCase(TestCase):
+    """
+    Fails when a query of the task views or the reminder job has to scan the whole task table
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date.today()
+        cls.developer = User.objects.create(username="developer", user_type="Developer", email="test@sdsf.com")
+        cls.projects = [Project.objects.create(title='project {}'.format(number), description='descr')
+                        for number in range(5)]
+        for project in cls.projects:
+            project.members.add(cls.developer)
+        statuses = [status for status, _ in Task.TASK_STATUSES]
+        Task.objects.bulk_create([
+            Task(title='task {}'.format(number), description='descr',
+                 due_date=cls.today + datetime.timedelta(days=number % 60 - 10),
+                 status=statuses[number % 3],
+                 developer=cls.developer if number % 4 else None,
+                 remind_on=cls.today if number % 50 == 0 else None,
+                 project=cls.projects[number % 5])
+            for number in range(2000)
+        ])
+        TaskActivity.objects.bulk_create([
+            TaskActivity(task_id=number % 100 + 1, project=cls.projects[number % 5], field='status',
+                         old_value='To do', new_value='Done')
+            for number in range(2000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor not in SEQUENTIAL_SCANS:
+            self.skipTest('No query plan check for {}'.format(connection.vendor))
+        if connection.vendor == 'postgresql':
+            # the seeded table is small enough for the planner to prefer a scan anyway,
+            # with scans disabled it still falls back to one only if no index applies
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertIndexed(self, queryset, ordered=False):
+        plan = queryset.explain()
+        self.assertIsNone(SEQUENTIAL_SCANS[connection.vendor].search(plan),
+                          'Sequential scan in\n{}\nfor\n{}'.format(plan, queryset.query))
+        if ordered:
+            self.assertIsNone(SORTS[connection.vendor].search(plan),
+                              'Sort in\n{}\nfor\n{}'.format(plan, queryset.query))
+
+    def view_queryset(self, view_class, **kwargs):
+        view = view_class()
+        view.request = RequestFactory().get('/')
+        view.request.user = self.developer
+        view.kwargs = kwargs
+        return view.get_queryset()
+
+    def test_task_list(self):
+        tasks = self.view_queryset(TaskListAPIView, project_id=self.projects[0].id)
+        self.assertIndexed(tasks[:10])
+
+    def test_task_list_next_cursor_page(self):
+        tasks = self.view_queryset(TaskListAPIView, project_id=self.projects[0].id)
+        position = [self.today, 100]
+        self.assertIndexed(tasks.filter(KeysetPagination.seek(('due_date', 'id'), position))[:11])
+
+    def test_task_detail(self):
+        tasks = self.view_queryset(TaskDetailView, project_id=self.projects[0].id)
+        self.assertIndexed(tasks.filter(pk=1))
+
+    def test_project_tasks_by_status(self):
+        self.assertIndexed(Task.objects.filter(project_id=self.projects[0].id, status='In progress'))
+
+    def test_developer_tasks_by_status(self):
+        self.assertIndexed(Task.objects.filter(developer_id=self.developer.id, status='To do'))
+
+    def test_developer_tasks_across_projects(self):
+        project_ids = [project.id for project in self.projects]
+        tasks = self.developer.tasks.filter(project_id__in=project_ids).order_by('due_date', 'id')
+        self.assertIndexed(tasks.values('id', 'project__title')[:11], ordered=True)
+
+    def test_open_tasks_by_due_date(self):
+        self.assertIndexed(Task.objects.exclude(status='Done').filter(due_date__lt=self.today))
+
+    def test_due_reminders(self):
+        self.assertIndexed(reminder_queryset(self.today).select_related('developer', 'notification')
+                           .order_by('developer_id', 'id'))
+
+    def test_task_list_filters(self):
+        tasks = self.view_queryset(TaskListAPIView, project_id=self.projects[0].id)
+        week = str(self.today + datetime.timedelta(days=7))
+        combinations = [
+            {'due_after': str(self.today), 'due_before': week},
+            {'ordering': '-id'},
+            {'ordering': 'status'},
+            {'status': ['In progress'], 'due_before': week},
+            {'status': ['To do', 'Done'], 'ordering': '-status'},
+            {'overdue': 'true', 'ordering': '-due_date'},
+        ]
+        for params in combinations:
+            with self.subTest(params=params):
+                filterset = TaskFilter(QueryDict(urlencode(params, doseq=True)), queryset=tasks)
+                self.assertTrue(filterset.is_valid(), filterset.errors)
+                self.assertIndexed(filterset.qs[:11], ordered=True)
+
+        filterset = TaskFilter(QueryDict(urlencode({'developer': self.developer.id, 'ordering': 'status'})),
+                               queryset=tasks)
+        self.assertIndexed(filterset.qs[:11])
+
+    def test_activity_history(self):
+        history = TaskActivity.objects.filter(project_id=self.projects[0].id).order_by('-id')
+        self.assertIndexed(history[:11], ordered=True)
+        self.assertIndexed(history.filter(task_id=1)[:11], ordered=True)
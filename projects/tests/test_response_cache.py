@@ -0,0 +1,113 @@
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.models import Project, Task
+
+User = get_user_model()
+
+
+class ListResponseCacheTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        caches[settings.LIST_RESPONSE_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer))
+        self.manager_token = Token.objects.create(user=self.manager)
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.api_authentication(self.manager_token)
+        self.tasks_url = reverse('projects:tasks_list', kwargs={'project_id': self.project.id})
+
+    def api_authentication(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def create_task(self):
+        return Task.objects.create(title='task', description='descr', developer=self.developer,
+                                   due_date=datetime.date.today(), project=self.project)
+
+    def test_task_list_hit_skips_the_query(self):
+        self.create_task()
+        self.assertEqual(self.client.get(self.tasks_url)['X-Cache'], 'MISS')
+        # project version lookup only, the token is cached
+        with self.assertNumQueries(1):
+            response = self.client.get(self.tasks_url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(json.loads(response.content)['count'], 1)
+
+    def test_keys_include_user_and_query(self):
+        self.client.get(self.tasks_url)
+        self.assertEqual(self.client.get(self.tasks_url + '?page=1')['X-Cache'], 'MISS')
+        self.api_authentication(self.developer_token)
+        self.assertEqual(self.client.get(self.tasks_url)['X-Cache'], 'MISS')
+
+    def test_task_writes_invalidate_task_list(self):
+        self.client.get(self.tasks_url)
+        task = self.create_task()
+        response = self.client.get(self.tasks_url)
+        self.assertEqual((response['X-Cache'], json.loads(response.content)['count']), ('MISS', 1))
+        self.client.get(self.tasks_url)
+        task.delete()
+        response = self.client.get(self.tasks_url)
+        self.assertEqual((response['X-Cache'], json.loads(response.content)['count']), ('MISS', 0))
+
+    def test_other_projects_stay_cached(self):
+        other = Project.objects.create(title='other', description='descr')
+        other.members.add(self.manager)
+        other_url = reverse('projects:tasks_list', kwargs={'project_id': other.id})
+        self.client.get(other_url)
+        self.create_task()
+        self.assertEqual(self.client.get(other_url)['X-Cache'], 'HIT')
+
+    def test_members_change_invalidates_project_list(self):
+        url = reverse('projects:projects_list')
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        self.project.members.remove(self.developer)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(json.loads(response.content)['results'][0]['members_count'], 1)
+
+    def test_new_user_invalidates_user_list(self):
+        url = reverse('users:users_list')
+        self.client.get(url)
+        User.objects.create(username="another", user_type="Developer", email="another@sdsf.com")
+        response = self.client.get(url)
+        self.assertEqual((response['X-Cache'], json.loads(response.content)['count']), ('MISS', 3))
+
+    def test_login_keeps_user_list(self):
+        url = reverse('users:users_list')
+        self.client.get(url)
+        update_last_login(None, self.developer)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+    def test_stats(self):
+        self.client.get(self.tasks_url)
+        self.client.get(self.tasks_url)
+        admin = User.objects.create(username="admin", user_type="Manager", email="admin@sdsf.com", is_staff=True)
+        self.client.force_authenticate(admin)
+        content = json.loads(self.client.get(reverse('projects:response_cache_stats')).content)
+        self.assertEqual(content['tasks'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
@@ -0,0 +1,68 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.models import Project, Task
+
+User = get_user_model()
+
+
+class TaskSearchAPIViewTestCase(APITestCase):
+    url = reverse('projects:search_tasks')
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.developer, ))
+        self.other_project = Project.objects.create(title='other',
+                                                    description='asdasdasd',
+                                                    )
+        self.in_description = Task.objects.create(title='Release notes', description='Fix the login page',
+                                                  project=self.project)
+        self.in_title = Task.objects.create(title='Login page crashes', description='Seen on mobile',
+                                            project=self.project)
+        Task.objects.create(title='Login page', description='Not a member', project=self.other_project)
+        Task.objects.create(title='Dashboard', description='Charts', project=self.project)
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.developer_token.key)
+
+    def search(self, text):
+        response = self.client.get(self.url, {'q': text})
+        self.assertEqual(200, response.status_code, response.content)
+        return [task['id'] for task in json.loads(response.content)['results']]
+
+    def test_ranked_matches_of_member_projects(self):
+        self.assertEqual(self.search('login page'), [self.in_title.id, self.in_description.id])
+        self.assertEqual(self.search('login mobile'), [self.in_title.id])
+
+    def test_follows_task_writes(self):
+        self.in_title.title = 'Signup page crashes'
+        self.in_title.save()
+        self.in_description.delete()
+        self.assertEqual(self.search('login'), [])
+        self.assertEqual(self.search('signup'), [self.in_title.id])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(self.search('"login" page*'), [self.in_title.id, self.in_description.id])
+
+    def test_no_words(self):
+        self.assertEqual(400, self.client.get(self.url, {'q': ' - '}).status_code)
+
+    def test_not_authenticated(self):
+        self.client.credentials()
+        self.assertIn(self.client.get(self.url, {'q': 'login'}).status_code, (401, 403))
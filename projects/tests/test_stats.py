@@ -0,0 +1,165 @@
+import datetime
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects.models import DeveloperTaskStats, Project, ProjectStats, Task
+from projects.serializers.project_serializers import ProjectStatsSerializer
+from projects.stats import project_stats, rebuild
+
+User = get_user_model()
+
+
+class ProjectStatsTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.other_developer = User.objects.create(
+            username="other_developer",
+            user_type="Developer",
+            email="testdev@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer, self.other_developer))
+        self.today = datetime.date.today()
+        self.manager_token = Token.objects.create(user=self.manager)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.manager_token.key)
+
+    def create_task(self, developer, days, status='To do'):
+        return Task.objects.create(title='task', description='descr', developer=developer, status=status,
+                                   due_date=self.today + datetime.timedelta(days=days), project=self.project)
+
+    def stats(self):
+        return ProjectStatsSerializer(project_stats(self.project.id)).data
+
+    def assertConsistent(self):
+        stats = self.stats()
+        self.assertEqual(stats, ProjectStatsSerializer(rebuild(self.project.id)).data)
+        return stats
+
+    def test_created_with_project(self):
+        self.assertTrue(ProjectStats.objects.filter(project=self.project).exists())
+        self.assertEqual(self.stats()['tasks'], 0)
+
+    def test_task_writes(self):
+        task = self.create_task(self.developer, -1)
+        self.create_task(self.other_developer, 5, status='In progress')
+        self.create_task(None, 5, status='Done')
+        stats = self.assertConsistent()
+        self.assertEqual((stats['tasks'], stats['to_do'], stats['in_progress'], stats['done'], stats['overdue']),
+                         (3, 1, 1, 1, 1))
+        self.assertEqual(stats['open_by_developer'], [{'developer': self.developer.id, 'open_tasks': 1},
+                                                      {'developer': self.other_developer.id, 'open_tasks': 1}])
+
+        task.status = 'Done'
+        task.save()
+        stats = self.assertConsistent()
+        self.assertEqual((stats['to_do'], stats['done'], stats['overdue']), (0, 2, 0))
+        self.assertEqual(len(stats['open_by_developer']), 1)
+
+        task.delete()
+        self.assertEqual(self.assertConsistent()['tasks'], 2)
+
+    def test_loaded_task_is_not_selected_again(self):
+        task = Task.objects.get(pk=self.create_task(self.developer, 1).pk)
+        for status in ('In progress', 'Done'):
+            task.status = status
+            with CaptureQueriesContext(connection) as queries:
+                task.save()
+            self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "projects_task"')])
+        stats = self.assertConsistent()
+        self.assertEqual((stats['to_do'], stats['in_progress'], stats['done']), (0, 0, 1))
+
+    def test_deferred_task(self):
+        task = Task.objects.only('id', 'title').get(pk=self.create_task(self.developer, 1).pk)
+        task.status = 'Done'
+        task.save()
+        self.assertEqual(self.assertConsistent()['done'], 1)
+
+    def test_project_delete_does_not_depend_on_task_count(self):
+        def delete_queries(tasks):
+            project = Project.objects.create(title='deleted', description='descr')
+            for number in range(tasks):
+                Task.objects.create(title='task', description='descr', developer=self.developer, project=project)
+            with CaptureQueriesContext(connection) as queries:
+                project.delete()
+            return len(queries)
+
+        self.assertEqual(delete_queries(1), delete_queries(20))
+        self.assertFalse(DeveloperTaskStats.objects.exclude(project=self.project).exists())
+        self.create_task(self.developer, 1).delete()
+        self.assertEqual(self.assertConsistent()['tasks'], 0)
+
+    def test_overdue_rolls_forward(self):
+        self.create_task(self.developer, 2)
+        self.create_task(self.developer, 2, status='Done')
+        self.assertEqual(self.stats()['overdue'], 0)
+        later = self.today + datetime.timedelta(days=5)
+        self.assertEqual(project_stats(self.project.id, later).overdue, 1)
+        self.assertEqual(ProjectStats.objects.get(project=self.project).overdue_as_of, later)
+
+    def test_bulk_writes(self):
+        url = reverse('projects:bulk_tasks', kwargs={'project_id': self.project.id})
+        items = [{'title': 'task {}'.format(number), 'description': 'descr', 'developer': self.developer.id,
+                  'due_date': str(self.today + datetime.timedelta(days=number - 2))} for number in range(5)]
+        self.client.post(url, items, format='json')
+        stats = self.assertConsistent()
+        self.assertEqual((stats['to_do'], stats['overdue']), (5, 2))
+
+        url = reverse('projects:bulk_update_tasks', kwargs={'project_id': self.project.id})
+        self.client.patch(url, {'filter': {'status': 'To do'}, 'changes': {'developer': self.other_developer.id}},
+                          format='json')
+        stats = self.assertConsistent()
+        self.assertEqual(stats['open_by_developer'], [{'developer': self.other_developer.id, 'open_tasks': 5}])
+
+    def test_stats_endpoint_reads_do_not_depend_on_task_count(self):
+        url = reverse('projects:project_stats', kwargs={'pk': self.project.id})
+        self.create_task(self.developer, 1)
+        self.client.get(url)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        for _ in range(20):
+            self.create_task(self.developer, 1)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(json.loads(response.content)['tasks'], 21)
+
+    def test_project_detail_includes_stats(self):
+        self.create_task(self.developer, 1)
+        response = self.client.get(reverse('projects:project_details', kwargs={'pk': self.project.id}))
+        self.assertEqual(json.loads(response.content)['stats']['to_do'], 1)
+
+    def test_rebuild_command(self):
+        self.create_task(self.developer, 1)
+        ProjectStats.objects.filter(project=self.project).update(to_do=10)
+        DeveloperTaskStats.objects.all().delete()
+        call_command('rebuild_project_stats', stdout=StringIO())
+        stats = self.stats()
+        self.assertEqual(stats['to_do'], 1)
+        self.assertEqual(len(stats['open_by_developer']), 1)
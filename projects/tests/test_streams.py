@@ -0,0 +1,169 @@
+import asyncio
+import datetime
+import json
+
+from asgiref.testing import ApplicationCommunicator
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from rest_framework.authtoken.models import Token
+
+from projects import events
+from projects.models import Project, Task
+from projects.signals import tasks_changed
+from projects.stats import TaskState, task_state
+from projects.streams import router
+
+User = get_user_model()
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+async def not_found(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+class TaskEventStreamTestCase(TransactionTestCase):
+    """
+    The streams are authorized in a worker thread and see committed data only
+    """
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        caches[settings.TOKEN_AUTH_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer))
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.application = router(not_found)
+        self.communicators = []
+
+    def tearDown(self):
+        for communicator in self.communicators:
+            run(communicator.send_input({'type': 'http.disconnect'}))
+            run(communicator.wait(1))
+
+    def connect(self, token=None, path=None):
+        headers = [(b'authorization', 'Token {}'.format(token.key).encode())] if token else []
+        communicator = ApplicationCommunicator(self.application, {
+            'type': 'http',
+            'method': 'GET',
+            'path': path or '/api/projects/{}/events/'.format(self.project.id),
+            'query_string': b'',
+            'headers': headers,
+        })
+        self.communicators.append(communicator)
+        return communicator
+
+    def open_stream(self, token):
+        communicator = self.connect(token)
+        start = run(communicator.receive_output(5))
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(run(communicator.receive_output(1))['body'], b': connected\n\n')
+        return communicator
+
+    def read_events(self, communicator):
+        body = run(communicator.receive_output(1))['body'].decode()
+        parsed = []
+        for block in body.strip().split('\n\n'):
+            event, data = block.split('\n')
+            parsed.append((event[len('event: '):], json.loads(data[len('data: '):])))
+        return parsed
+
+    def test_task_events(self):
+        stream = self.open_stream(self.developer_token)
+        task = Task.objects.create(title='task', description='descr', due_date=datetime.date(2030, 1, 1),
+                                   project=self.project)
+        self.assertEqual(self.read_events(stream), [('task.created', {
+            'type': 'task.created', 'id': task.id, 'status': 'To do', 'developer': None, 'due_date': '2030-01-01',
+        })])
+        task.status = 'Done'
+        task.save()
+        self.assertEqual(self.read_events(stream)[0][1]['status'], 'Done')
+        task_id = task.id
+        task.delete()
+        self.assertEqual(self.read_events(stream), [('task.deleted', {
+            'type': 'task.deleted', 'id': task_id, 'status': 'Done', 'developer': None, 'due_date': '2030-01-01',
+        })])
+
+    def test_tasks_created_without_ids_reset_the_stream(self):
+        stream = self.open_stream(self.developer_token)
+        # SQLite bulk_create does not set the ids
+        tasks = Task.objects.bulk_create([Task(title='task', description='descr', project=self.project)])
+        tasks_changed.send(sender=Task, removed=[], added=[task_state(task) for task in tasks])
+        self.assertEqual([event for event, _ in self.read_events(stream)], ['reset'])
+
+    def test_events_of_other_projects_are_not_sent(self):
+        stream = self.open_stream(self.developer_token)
+        other_project = Project.objects.create(title='other', description='descr')
+        Task.objects.create(title='task', description='descr', project=other_project)
+        Task.objects.create(title='task', description='descr', project=self.project)
+        self.assertEqual(self.read_events(stream)[0][1]['type'], 'task.created')
+        self.assertTrue(run(stream.receive_nothing(0.2)))
+
+    def test_members_only(self):
+        other = User.objects.create(username="other", user_type="Developer", email="other@sdsf.com")
+        for token in (Token.objects.create(user=other), None):
+            with self.subTest(token=token):
+                communicator = self.connect(token)
+                self.assertEqual(run(communicator.receive_output(5))['status'], 403)
+                self.assertIn('detail', json.loads(run(communicator.receive_output(1))['body']))
+
+    def test_closed_when_removed_from_project(self):
+        stream = self.open_stream(self.developer_token)
+        self.project.members.remove(self.developer)
+        self.assertEqual(self.read_events(stream)[0][0], 'closed')
+        self.assertEqual(run(stream.receive_output(1)), {'type': 'http.response.body', 'body': b''})
+
+    def test_membership_of_others_keeps_the_stream(self):
+        stream = self.open_stream(self.developer_token)
+        self.project.members.remove(self.manager)
+        self.assertTrue(run(stream.receive_nothing(0.2)))
+
+    @override_settings(TASK_EVENTS_QUEUE_SIZE=2)
+    def test_slow_client_is_told_to_refetch(self):
+        stream = self.open_stream(self.developer_token)
+        for number in range(5):
+            events.hub.dispatch(events.project_channel(self.project.id), [{'type': 'task.updated', 'id': number}])
+        self.assertEqual(self.read_events(stream)[0][0], 'reset')
+
+    def test_keepalive(self):
+        stream = self.open_stream(self.developer_token)
+        events.hub.keepalive(asyncio.get_event_loop())
+        self.assertEqual(run(stream.receive_output(1))['body'], b': keepalive\n\n')
+
+    def test_other_requests_are_passed_on(self):
+        communicator = self.connect(self.developer_token, path='/api/projects/')
+        self.assertEqual(run(communicator.receive_output(1))['status'], 404)
+
+
+class TaskEventsTestCase(SimpleTestCase):
+
+    def test_event_types(self):
+        due_date = datetime.date(2030, 1, 1)
+        removed = [TaskState(1, 'To do', None, due_date, 10), TaskState(1, 'To do', None, due_date, 11)]
+        added = [TaskState(1, 'Done', None, due_date, 10), TaskState(2, 'To do', None, due_date, None)]
+        project_events = events.task_events(removed, added)
+        self.assertEqual({project_id: [(event['type'], event.get('id')) for event in project_events[project_id]]
+                          for project_id in project_events},
+                         {1: [('task.updated', 10), ('task.deleted', 11)], 2: [('reset', None)]})
@@ -1,7 +1,13 @@
 import json
+from contextlib import contextmanager
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APITestCase
@@ -142,6 +148,14 @@ class CreateTaskAPIViewTestCase(APITestCase):
         content = json.loads(response.content).get("title")
         self.assertTrue(content == 'task')
 
+    def test_create_task_without_due_date(self):
+        self.api_authentication(self.manager_token)
+        response = self.client.post(self.url, {'title': 'task',
+                                               'developer': self.developer.id,
+                                               'description': 'task descr'})
+        self.assertEqual(201, response.status_code, response.content)
+        self.assertEqual(Task.objects.get(title='task').due_date, Task._meta.get_field('due_date').get_default())
+
     def test_create_task_as_manager_with_manager_as_developer(self):
         self.api_authentication(self.manager_token)
         response = self.client.post(self.url, {'title': 'task',
@@ -258,3 +272,209 @@ class TaskDetailAPIViewTestCase(APITestCase):
                                               })
         content = json.loads(response.content).get('status')
         self.assertTrue(content == 'In progress')
+
+
+class BulkCreateTaskAPIViewTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.other_developer = User.objects.create(
+            username="other_developer",
+            user_type="Developer",
+            email="testdev@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer))
+        self.manager_token = Token.objects.create(user=self.manager)
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.url = reverse('projects:bulk_tasks', kwargs={'project_id': self.project.id})
+
+    def api_authentication(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def task_data(self, number, developer):
+        return {'title': 'task {}'.format(number),
+                'description': 'task descr',
+                'due_date': str(datetime.date.today() + datetime.timedelta(days=7)),
+                'developer': developer.id}
+
+    def test_bulk_create_as_developer(self):
+        self.api_authentication(self.developer_token)
+        response = self.client.post(self.url, [self.task_data(0, self.developer)], format='json')
+        self.assertEqual(403, response.status_code)
+
+    def test_bulk_create(self):
+        self.api_authentication(self.manager_token)
+        response = self.client.post(self.url, [self.task_data(number, self.developer) for number in range(3)],
+                                    format='json')
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(json.loads(response.content), {'created': 3, 'errors': []})
+        self.assertEqual(Task.objects.filter(project=self.project, developer=self.developer).count(), 3)
+        self.assertFalse(Task.objects.filter(remind_on__isnull=True).exists())
+
+    def test_bulk_create_without_due_date(self):
+        self.api_authentication(self.manager_token)
+        data = self.task_data(0, self.developer)
+        del data['due_date']
+        response = self.client.post(self.url, [data], format='json')
+        self.assertEqual(201, response.status_code, response.content)
+        self.assertEqual(Task.objects.get(project=self.project).due_date,
+                         Task._meta.get_field('due_date').get_default())
+
+    def test_query_count_does_not_grow_with_batch(self):
+        self.api_authentication(self.manager_token)
+        # warm up the membership cache
+        self.client.post(self.url, [self.task_data(0, self.developer)], format='json')
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, [self.task_data(0, self.developer)], format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(self.url, [self.task_data(number, self.developer) for number in range(100)],
+                             format='json')
+        self.assertEqual(len(small), len(large))
+
+    def test_invalid_items_are_reported(self):
+        self.api_authentication(self.manager_token)
+        items = [self.task_data(0, self.developer),
+                 self.task_data(1, self.other_developer),
+                 self.task_data(2, self.manager),
+                 dict(self.task_data(3, self.developer), developer=0)]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(207, response.status_code)
+        content = json.loads(response.content)
+        self.assertEqual(content['created'], 1)
+        self.assertEqual([error['index'] for error in content['errors']], [1, 2, 3])
+        self.assertEqual(content['errors'][0]['errors']['non_field_errors'][0],
+                         'Assigned user must be project member.')
+        self.assertEqual(content['errors'][1]['errors']['non_field_errors'][0],
+                         'Assigned user must be developer.')
+        self.assertIn('developer', content['errors'][2]['errors'])
+
+    def test_atomic_batch_fails_as_a_whole(self):
+        self.api_authentication(self.manager_token)
+        items = [self.task_data(0, self.developer), self.task_data(1, self.other_developer)]
+        response = self.client.post(self.url + '?atomic=true', items, format='json')
+        self.assertEqual(400, response.status_code)
+        self.assertFalse(Task.objects.filter(project=self.project).exists())
+
+
+class BulkUpdateTaskAPIViewTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.other_developer = User.objects.create(
+            username="other_developer",
+            user_type="Developer",
+            email="testdev@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer, self.other_developer))
+        self.due_date = datetime.date.today() + datetime.timedelta(days=7)
+        for number, developer in enumerate((self.developer, self.developer, self.other_developer)):
+            task = Task(title='task {}'.format(number), description='task descr', due_date=self.due_date,
+                        developer=developer, project=self.project)
+            task.remind_on = task.reminder_date()
+            task.save()
+        self.manager_token = Token.objects.create(user=self.manager)
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.url = reverse('projects:bulk_update_tasks', kwargs={'project_id': self.project.id})
+
+    def api_authentication(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def test_bulk_status_update(self):
+        self.api_authentication(self.manager_token)
+        ids = list(Task.objects.values_list('id', flat=True))
+        response = self.client.patch(self.url, {'ids': ids, 'changes': {'status': 'Done'}}, format='json')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(json.loads(response.content), {'matched': 3, 'updated': 3})
+        self.assertEqual(Task.objects.filter(status='Done', remind_on__isnull=True).count(), 3)
+
+    def test_bulk_update_by_filter(self):
+        self.api_authentication(self.manager_token)
+        response = self.client.patch(self.url, {'filter': {'developer': self.other_developer.id},
+                                                'changes': {'developer': self.developer.id}}, format='json')
+        self.assertEqual(json.loads(response.content), {'matched': 1, 'updated': 1})
+        self.assertEqual(Task.objects.filter(developer=self.developer).count(), 3)
+
+    def test_unassign_clears_reminders(self):
+        self.api_authentication(self.manager_token)
+        response = self.client.patch(self.url, {'filter': {'status': 'To do'}, 'changes': {'developer': None}},
+                                     format='json')
+        self.assertEqual(json.loads(response.content), {'matched': 3, 'updated': 3})
+        self.assertFalse(Task.objects.filter(remind_on__isnull=False).exists())
+
+    def test_assign_non_member(self):
+        self.project.members.remove(self.other_developer)
+        self.api_authentication(self.manager_token)
+        response = self.client.patch(self.url, {'filter': {'status': 'To do'},
+                                                'changes': {'developer': self.other_developer.id}}, format='json')
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(json.loads(response.content)['non_field_errors'][0], 'Assigned user must be project member.')
+
+    def test_developer_can_change_only_status(self):
+        self.api_authentication(self.developer_token)
+        response = self.client.patch(self.url, {'filter': {'status': 'To do'},
+                                                'changes': {'due_date': str(self.due_date)}}, format='json')
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(json.loads(response.content)['non_field_errors'][0],
+                         'You can change only task status as developer.')
+
+    def test_developer_changes_only_own_tasks(self):
+        self.api_authentication(self.developer_token)
+        response = self.client.patch(self.url, {'filter': {'status': 'To do'},
+                                                'changes': {'status': 'In progress'}}, format='json')
+        self.assertEqual(json.loads(response.content), {'matched': 2, 'updated': 2})
+        self.assertEqual(Task.objects.get(developer=self.other_developer).status, 'To do')
+
+    def test_tasks_reassigned_before_the_lock_are_skipped(self):
+        self.api_authentication(self.developer_token)
+        task = Task.objects.filter(developer=self.developer).first()
+        atomic = transaction.atomic
+
+        @contextmanager
+        def reassigned_first():
+            # another request reassigns the task before this one takes its locks
+            Task.objects.filter(pk=task.pk).update(developer=self.other_developer)
+            with atomic():
+                yield
+
+        with mock.patch('projects.serializers.task_serializers.transaction.atomic', reassigned_first):
+            response = self.client.patch(self.url, {'filter': {'status': 'To do'},
+                                                    'changes': {'status': 'In progress'}}, format='json')
+        self.assertEqual(json.loads(response.content), {'matched': 1, 'updated': 1})
+        self.assertEqual(Task.objects.get(pk=task.pk).status, 'To do')
+
+    def test_selection_required(self):
+        self.api_authentication(self.manager_token)
+        response = self.client.patch(self.url, {'changes': {'status': 'Done'}}, format='json')
+        self.assertEqual(400, response.status_code)
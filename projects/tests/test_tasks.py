@@ -0,0 +1,180 @@
+import datetime
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from projects import tasks
+from projects.mail import dispatch_outbox
+from projects.models import Project, Task, TaskNotification
+from projects.tasks import reminder_queryset, shard_bounds, task_send_email, task_send_email_shard
+
+User = get_user_model()
+
+
+class TaskSendEmailTestCase(TestCase):
+
+    def setUp(self):
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        today = datetime.date.today()
+        self.soon = Task.objects.create(title='soon', description='descr', developer=self.developer,
+                                        due_date=today + datetime.timedelta(days=1), project=self.project)
+        self.done = Task.objects.create(title='done', description='descr', developer=self.developer,
+                                        due_date=today, status='Done', project=self.project)
+        self.unassigned = Task.objects.create(title='unassigned', description='descr',
+                                              due_date=today, project=self.project)
+        self.later = Task.objects.create(title='later', description='descr', developer=self.developer,
+                                         due_date=today + datetime.timedelta(days=30), project=self.project)
+
+    def test_shard_bounds(self):
+        self.assertEqual(shard_bounds(1, 10, 3), [(1, 4), (5, 8), (9, 10)])
+        self.assertEqual(shard_bounds(5, 5, 8), [(5, 5)])
+
+    def test_shard_sends_only_open_assigned_tasks_in_window(self):
+        report = task_send_email_shard(self.soon.id, self.later.id)
+        self.assertEqual(report['scanned'], 1)
+        self.assertEqual(report['sent'], 1)
+        dispatch_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.developer.email])
+        self.assertIn('1 days left until soon deadline!', mail.outbox[0].body)
+
+    @override_settings(TASK_REMINDER_DIGEST=False)
+    def test_periodic_task_dispatches_shards(self):
+        with mock.patch.object(task_send_email_shard, 'delay') as delay:
+            task_send_email()
+        delay.assert_called_once_with(self.soon.id, self.soon.id, False)
+
+    @override_settings(TASK_REMINDER_DIGEST=True)
+    def test_periodic_task_dispatches_developer_shards_in_digest_mode(self):
+        with mock.patch.object(task_send_email_shard, 'delay') as delay:
+            task_send_email()
+        delay.assert_called_once_with(self.developer.id, self.developer.id, True)
+
+    def test_digest_groups_tasks_of_developer(self):
+        overdue = Task.objects.create(title='overdue', description='descr', developer=self.developer,
+                                      due_date=datetime.date.today() - datetime.timedelta(days=2),
+                                      remind_on=datetime.date.today(), project=self.project)
+        report = task_send_email_shard(self.developer.id, self.developer.id, True)
+        self.assertEqual(report['scanned'], 2)
+        self.assertEqual(report['sent'], 1)
+        dispatch_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Overdue tasks:\noverdue was due', mail.outbox[0].body)
+        self.assertIn('1 days left until soon deadline', mail.outbox[0].body)
+        self.assertEqual(TaskNotification.objects.filter(task__in=(self.soon, overdue)).count(), 2)
+
+    @override_settings(TASK_REMINDER_CHUNK_SIZE=1)
+    def test_batches_reschedule_only_their_developers(self):
+        other = User.objects.create(username="other", user_type="Developer", email="other@sdsf.com")
+        other_task = Task.objects.create(title='other', description='descr', developer=other,
+                                         due_date=self.soon.due_date, project=self.project)
+        Task.objects.filter(id=other_task.id).update(remind_on=datetime.date.today())
+        batches = []
+        send_batch = tasks._send_batch
+
+        def record_batch(batch, scanned, today):
+            batches.append(([task.id for _, notified in batch for task in notified],
+                            [task_id for task_id, _ in scanned]))
+            return send_batch(batch, scanned, today)
+
+        with mock.patch.object(tasks, '_send_batch', side_effect=record_batch):
+            task_send_email_shard(min(self.developer.id, other.id), max(self.developer.id, other.id), True)
+        self.assertEqual([scanned for notified, scanned in batches], [notified for notified, scanned in batches])
+        self.assertEqual(sorted(task_id for _, scanned in batches for task_id in scanned),
+                         [self.soon.id, other_task.id])
+
+    def test_ledger_skips_unchanged_tasks(self):
+        Task.objects.filter(id=self.soon.id).update(remind_on=datetime.date.today())
+        task_send_email_shard(self.developer.id, self.developer.id, True)
+        Task.objects.filter(id=self.soon.id).update(remind_on=datetime.date.today())
+        report = task_send_email_shard(self.developer.id, self.developer.id, True)
+        self.assertEqual(report['scanned'], 1)
+        self.assertEqual(report['sent'], 0)
+        self.soon.status = 'In progress'
+        self.soon.save()
+        report = task_send_email_shard(self.developer.id, self.developer.id, True)
+        self.assertEqual(report['sent'], 1)
+        dispatch_outbox()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_sent_reminders_are_rescheduled_after_deadline(self):
+        task_send_email_shard(self.developer.id, self.developer.id, True)
+        self.soon.refresh_from_db()
+        self.assertEqual(self.soon.remind_on, self.soon.due_date + datetime.timedelta(days=1))
+        report = task_send_email_shard(self.developer.id, self.developer.id, True)
+        self.assertEqual(report['scanned'], 0)
+
+
+class TaskReminderSchedulingTestCase(APITestCase):
+
+    def setUp(self):
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email='sdfsdg@dgd.sf',
+            password=make_password("1111"),
+        )
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="test@sdsf.com",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc',
+                                              description='asdasdasd',
+                                              )
+        self.project.members.set((self.manager, self.developer))
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.manager_token = Token.objects.create(user=self.manager)
+
+    def api_authentication(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def test_reminder_scheduled_on_create_and_cancelled_when_done(self):
+        due_date = datetime.date.today() + datetime.timedelta(days=10)
+        self.api_authentication(self.manager_token)
+        response = self.client.post(reverse('projects:create_task', kwargs={'project_id': self.project.id}),
+                                    {'title': 'task',
+                                     'developer': self.developer.id,
+                                     'description': 'task descr',
+                                     'due_date': due_date})
+        self.assertEqual(201, response.status_code)
+        task = Task.objects.get(project=self.project, title='task')
+        self.assertEqual(task.remind_on, due_date - datetime.timedelta(days=settings.TASK_REMINDER_WINDOW_DAYS))
+
+        self.api_authentication(self.developer_token)
+        self.client.patch(reverse('projects:task_details', kwargs={'project_id': self.project.id,
+                                                                   'pk': task.id}),
+                          {'status': 'Done'})
+        task.refresh_from_db()
+        self.assertIsNone(task.remind_on)
+
+    def test_reminder_scheduled_outside_the_api(self):
+        task = Task.objects.create(title='task', description='descr', developer=self.developer,
+                                   due_date=datetime.date.today() + datetime.timedelta(days=1), project=self.project)
+        self.assertIn(task, reminder_queryset())
+        # a reminded task keeps its rescheduled remind_on until the reminder fields change
+        Task.objects.filter(id=task.id).update(remind_on=task.due_date + datetime.timedelta(days=1))
+        task = Task.objects.get(id=task.id)
+        task.title = 'renamed'
+        task.save()
+        self.assertNotIn(task, reminder_queryset())
+        task.developer = None
+        task.save(update_fields=['developer'])
+        self.assertIsNone(Task.objects.get(id=task.id).remind_on)
@@ -1,18 +1,34 @@
 from django.urls import path, include
 
-from projects.views import project_views, task_views
+from projects.views import (activity_views, cache_views, export_views, outbox_views, project_views, search_views,
+                            task_views)
 
 app_name = 'projects'
 
 task_patterns = [
     path('tasks/', task_views.TaskListAPIView.as_view(), name="tasks_list"),
     path('tasks/create/', task_views.TaskCreateAPIView.as_view(), name="create_task"),
+    path('tasks/bulk/', task_views.TaskBulkCreateAPIView.as_view(), name="bulk_tasks"),
+    path('tasks/bulk/update/', task_views.TaskBulkUpdateAPIView.as_view(), name="bulk_update_tasks"),
+    path('tasks/import/', task_views.TaskImportAPIView.as_view(), name="import_tasks"),
+    path('tasks/import/<int:pk>/', task_views.TaskImportJobDetailView.as_view(), name="import_job"),
+    path('tasks/export/<export_format>/', export_views.TaskExportAPIView.as_view(), name="export_tasks"),
+    path('tasks/<int:pk>/activity/', activity_views.TaskActivityAPIView.as_view(), name="task_activity"),
     path('tasks/<pk>/', task_views.TaskDetailView.as_view(), name="task_details"),
+    path('activity/', activity_views.ProjectActivityAPIView.as_view(), name="project_activity"),
 ]
 
 urlpatterns = [
     path('projects/', project_views.ProjectListAPIView.as_view(), name="projects_list"),
     path('projects/create/', project_views.ProjectCreateAPIView.as_view(), name="create_project"),
+    path('projects/<int:pk>/stats/', project_views.ProjectStatsAPIView.as_view(), name="project_stats"),
+    path('projects/<int:pk>/members/add/', project_views.ProjectMembersAddAPIView.as_view(),
+         name="add_project_members"),
+    path('projects/<int:pk>/members/remove/', project_views.ProjectMembersRemoveAPIView.as_view(),
+         name="remove_project_members"),
     path('projects/<pk>/', project_views.ProjectDetailView.as_view(), name="project_details"),
     path('projects/<int:project_id>/', include(task_patterns)),
+    path('tasks/search/', search_views.TaskSearchAPIView.as_view(), name="search_tasks"),
+    path('outbox/stats/', outbox_views.OutboxStatsAPIView.as_view(), name="outbox_stats"),
+    path('cache/stats/', cache_views.ResponseCacheStatsAPIView.as_view(), name="response_cache_stats"),
 ]
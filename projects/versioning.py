@@ -0,0 +1,114 @@
+import datetime
+import hashlib
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from projects.membership import membership
+from projects.models import Project, Task
+
+
+def bump_project_versions(project_ids):
+    """
+    Marks the projects, their task lists included, as changed
+    """
+    project_ids = set(project_ids)
+    if project_ids:
+        Project.objects.filter(pk__in=project_ids).update(version=F('version') + 1, updated_at=timezone.now())
+
+
+def make_etag(request, *parts):
+    """
+    Strong ETag of a representation: the version parts, the requested URL and the accepted formats
+    """
+    key = ':'.join(str(part) for part in parts + (request.get_full_path(), request.META.get('HTTP_ACCEPT', '')))
+    return '"{}"'.format(hashlib.md5(key.encode()).hexdigest())
+
+
+def project_version(request, project_id):
+    """
+    (version, updated_at) of the project, None when it does not exist or the user may not see it.
+    Fetched once per request, with the membership, for the permission check, the ETag and Last-Modified.
+    """
+    if not hasattr(request, '_project_version'):
+        request._project_version = None
+        try:
+            version = Project.objects.filter(pk=project_id).annotate(is_member=membership(request.user)) \
+                .values_list('version', 'updated_at', 'is_member').first()
+        except ValueError:
+            version = None
+        if version and version[2]:
+            request._project_version = version[:2]
+    return request._project_version
+
+
+def project_condition(project_kwarg, daily=False):
+    """
+    Answers conditional GETs of a resource that changes with its project version
+    without calling the view. Must decorate a handler, so permissions are checked first.
+    daily is for representations which also change with the date, like the overdue stats.
+    """
+    def etag(request, *args, **kwargs):
+        version = project_version(request, kwargs[project_kwarg])
+        if not version:
+            return None
+        parts = ('project', kwargs[project_kwarg], version[0])
+        return make_etag(request, *(parts + (datetime.date.today(), ) if daily else parts))
+
+    def last_modified(request, *args, **kwargs):
+        version = project_version(request, kwargs[project_kwarg])
+        if not version:
+            return None
+        if daily:
+            midnight = timezone.make_aware(datetime.datetime.combine(datetime.date.today(), datetime.time()))
+            return max(version[1], midnight)
+        return version[1]
+
+    return method_decorator(condition(etag_func=etag, last_modified_func=last_modified))
+
+
+def _task_version(request, project_id, pk):
+    """
+    (updated_at, project version, project updated_at) of the task, None when it does not exist
+    or the user may not see it
+    """
+    if not hasattr(request, '_task_version'):
+        request._task_version = None
+        try:
+            version = Task.objects.filter(project_id=project_id, pk=int(pk)) \
+                .annotate(is_member=membership(request.user, 'project_id')) \
+                .values_list('updated_at', 'project__version', 'project__updated_at', 'developer_id', 'is_member') \
+                .first()
+        except ValueError:
+            version = None
+        # same rules as IsProjectMember and IsTaskDeveloperOrManager, others get the view's 403
+        if version and version[4] and (request.user.is_manager or version[3] == request.user.pk):
+            request._task_version = version[:3]
+    return request._task_version
+
+
+def _expands(request):
+    return any(name.strip() for name in request.GET.get('expand', '').split(','))
+
+
+def task_condition():
+    """
+    Answers conditional GETs of a task from its updated_at. An expanded developer or project
+    changes with the project version, renaming them bumps it.
+    """
+    def etag(request, *args, **kwargs):
+        version = _task_version(request, kwargs['project_id'], kwargs['pk'])
+        if not version:
+            return None
+        parts = ('task', kwargs['pk'], version[0].isoformat())
+        return make_etag(request, *(parts + ('project', version[1]) if _expands(request) else parts))
+
+    def last_modified(request, *args, **kwargs):
+        version = _task_version(request, kwargs['project_id'], kwargs['pk'])
+        if not version:
+            return None
+        return max(version[0], version[2]) if _expands(request) else version[0]
+
+    return method_decorator(condition(etag_func=etag, last_modified_func=last_modified))
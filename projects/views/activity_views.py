@@ -0,0 +1,27 @@
+from projects.models import TaskActivity
+from projects.permissions import IsTaskProjectMember
+from projects.serializers.task_serializers import TaskActivitySerializer
+
+from rest_framework import generics
+
+
+class ProjectActivityAPIView(generics.ListAPIView):
+    """
+    Status, developer and due date changes of the tasks of a project, newest first.
+    Changes show up once the activity buffer is flushed, see projects.activity.
+    """
+    serializer_class = TaskActivitySerializer
+    permission_classes = (IsTaskProjectMember, )
+
+    def get_queryset(self):
+        return TaskActivity.objects.filter(project_id=self.kwargs['project_id']).order_by('-id')
+
+
+class TaskActivityAPIView(ProjectActivityAPIView):
+    """
+    Status, developer and due date changes of a task, newest first
+    """
+
+    def get_queryset(self):
+        return TaskActivity.objects.filter(project_id=self.kwargs['project_id'], task_id=self.kwargs['pk'])\
+            .order_by('-id')
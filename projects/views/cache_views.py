@@ -0,0 +1,11 @@
+from projects.response_cache import cache_stats
+
+from rest_framework import permissions, views
+from rest_framework.response import Response
+
+
+class ResponseCacheStatsAPIView(views.APIView):
+    permission_classes = (permissions.IsAdminUser, )
+
+    def get(self, request):
+        return Response(cache_stats())
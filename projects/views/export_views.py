@@ -0,0 +1,81 @@
+import csv
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from django_filters.rest_framework import DjangoFilterBackend
+
+from projects.filters import TaskFilter
+from projects.membership import member_scoped
+from projects.models import Task
+from projects.permissions import IsTaskProjectMember
+from projects.serializers.fast import compile_fields, iter_representation, select_fields
+from projects.serializers.task_serializers import TaskSerializer
+
+from rest_framework import generics
+from rest_framework.exceptions import NotFound
+from rest_framework.negotiation import BaseContentNegotiation
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    The export format is given by the URL, errors are rendered with the first renderer
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class Echo:
+    """
+    File-like object handing back what csv.writer writes to it
+    """
+
+    def write(self, value):
+        return value
+
+
+class TaskExportAPIView(generics.GenericAPIView):
+    """
+    Streams all tasks of a project matching the task list filters as CSV or NDJSON,
+    read in chunks from a server-side cursor so memory does not grow with the project
+    """
+    serializer_class = TaskSerializer
+    permission_classes = (IsTaskProjectMember, )
+    filter_backends = (DjangoFilterBackend, )
+    filterset_class = TaskFilter
+    content_negotiation_class = IgnoreClientContentNegotiation
+    content_types = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    def get_queryset(self):
+        return member_scoped(Task.objects.filter(project_id=self.kwargs['project_id']), self.request.user) \
+            .order_by('due_date', 'id')
+
+    def csv_lines(self, mapping, items):
+        writer = csv.writer(Echo())
+        yield writer.writerow([name for name, _, _ in mapping])
+        for item in items:
+            yield writer.writerow(item.values())
+
+    def ndjson_lines(self, mapping, items):
+        for item in items:
+            yield json.dumps(item) + '\n'
+
+    def get(self, request, project_id, export_format):
+        if export_format not in self.content_types:
+            raise NotFound()
+        mapping = select_fields(compile_fields(self.get_serializer_class()), request)
+        rows = self.filter_queryset(self.get_queryset()).values(*{source for _, source, _ in mapping}) \
+            .iterator(chunk_size=settings.TASK_EXPORT_CHUNK_SIZE)
+        lines = getattr(self, export_format + '_lines')(mapping, iter_representation(mapping, rows))
+        response = StreamingHttpResponse(lines, content_type=self.content_types[export_format])
+        response['Content-Disposition'] = 'attachment; filename="project-{}-tasks.{}"'.format(project_id,
+                                                                                             export_format)
+        return response
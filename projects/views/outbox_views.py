@@ -0,0 +1,11 @@
+from projects.mail import outbox_stats
+
+from rest_framework import permissions, views
+from rest_framework.response import Response
+
+
+class OutboxStatsAPIView(views.APIView):
+    permission_classes = (permissions.IsAdminUser, )
+
+    def get(self, request):
+        return Response(outbox_stats())
@@ -1,15 +1,28 @@
+from django.db.models import Count
+
+from projects.serializers.dynamic import ExpandableQuerysetMixin
+from projects.serializers.fast import FastListMixin
 from projects.serializers.project_serializers import ProjectSerializer, CreateProjectSerializer, \
-    ProjectDetailViewSerializer
+    ProjectDetailViewSerializer, ProjectStatsSerializer, ProjectMembersSerializer
+from projects.membership import member_projects, with_membership
 from projects.models import Project
 from projects.permissions import IsManager, IsProjectMember, SafeOnly
+from projects.response_cache import CachedListMixin
+from projects.stats import project_stats
+from projects.versioning import project_condition
 
 from rest_framework import generics
+from rest_framework.response import Response
 
 
-class ProjectListAPIView(generics.ListAPIView):
+class ProjectListAPIView(CachedListMixin, FastListMixin, ExpandableQuerysetMixin, generics.ListAPIView):
     serializer_class = ProjectSerializer
     permission_classes = (SafeOnly, )
-    queryset = Project.objects.all()
+    cache_scope = 'projects'
+
+    def get_queryset(self):
+        return Project.objects.filter(id__in=member_projects(self.request.user)) \
+            .annotate(members_count=Count('members')).order_by('id')
 
 
 class ProjectCreateAPIView(generics.CreateAPIView):
@@ -17,8 +30,63 @@ class ProjectCreateAPIView(generics.CreateAPIView):
     permission_classes = (IsManager, )
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectDetailView(ExpandableQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProjectDetailViewSerializer
     lookup_field = 'pk'
-    queryset = Project.objects.all()
     permission_classes = (IsProjectMember, IsManager | SafeOnly, )
+
+    def get_queryset(self):
+        return with_membership(Project.objects.all(), self.request.user)
+
+    @project_condition('pk', daily=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class ProjectStatsAPIView(generics.RetrieveAPIView):
+    """
+    Task counts of a project, read from the stats table instead of aggregating the tasks
+    """
+    serializer_class = ProjectStatsSerializer
+    lookup_field = 'pk'
+    permission_classes = (IsProjectMember, )
+
+    def get_queryset(self):
+        return with_membership(Project.objects.all(), self.request.user)
+
+    @project_condition('pk', daily=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        project = self.get_object()
+        return Response(self.get_serializer(project_stats(project.pk)).data)
+
+
+class ProjectMembersAddAPIView(generics.GenericAPIView):
+    """
+    Adds a batch of users, {"ids": [...]}, to the project. Current members are skipped.
+    """
+    serializer_class = ProjectMembersSerializer
+    permission_classes = (IsManager, IsProjectMember)
+
+    def get_queryset(self):
+        return with_membership(Project.objects.all(), self.request.user)
+
+    def post(self, request, *args, **kwargs):
+        project = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.add(project))
+
+
+class ProjectMembersRemoveAPIView(ProjectMembersAddAPIView):
+    """
+    Removes a batch of users, {"ids": [...]}, from the project, as long as a manager and a developer remain
+    """
+
+    def post(self, request, *args, **kwargs):
+        project = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.remove(project))
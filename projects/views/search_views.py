@@ -0,0 +1,27 @@
+from projects.membership import member_project_ids
+from projects.search import search_terms, search_tasks
+from projects.serializers.dynamic import ExpandableQuerysetMixin
+from projects.serializers.task_serializers import TaskSerializer
+
+from rest_framework import generics, permissions, status
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+
+class TaskSearchAPIView(ExpandableQuerysetMixin, generics.ListAPIView):
+    """
+    Full-text search over the titles and descriptions of the tasks of the user's projects:
+    ?q= words, all of which must match. Results are ranked, title matches first.
+    """
+    serializer_class = TaskSerializer
+    permission_classes = (permissions.IsAuthenticated, )
+    # the rank ordering cannot be resumed from a cursor
+    pagination_class = PageNumberPagination
+
+    def get_queryset(self):
+        return search_tasks(member_project_ids(self.request.user), self.request.query_params.get('q', ''))
+
+    def list(self, request, *args, **kwargs):
+        if not search_terms(request.query_params.get('q', '')):
+            return Response({'q': ['Enter the words to search for.']}, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
@@ -1,17 +1,44 @@
-from projects.serializers.task_serializers import TaskDetailViewSerializer, TaskSerializer, CreateTaskSerializer
-from projects.models import Task
+from django.conf import settings
+from django.db import transaction
+
+from projects.serializers.task_serializers import TaskDetailViewSerializer, TaskSerializer, CreateTaskSerializer, \
+    BulkCreateTaskSerializer, BulkUpdateTaskSerializer, TaskImportJobSerializer
+from projects.filters import TaskFilter
+from projects.membership import member_scoped, project_user_types, with_membership
+from projects.serializers.dynamic import ExpandableQuerysetMixin
+from projects.serializers.fast import FastListMixin
+from projects.models import Task, TaskImportJob
 from projects.permissions import *
+from projects.response_cache import CachedListMixin, project_tasks_scope
+from projects.signals import tasks_changed
+from projects.stats import task_state
+from projects.tasks import task_import_tasks
+from projects.versioning import project_condition, task_condition
+
+from django_filters.rest_framework import DjangoFilterBackend
 
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.response import Response
 
 
-class TaskListAPIView(generics.ListAPIView):
+class TaskListAPIView(CachedListMixin, FastListMixin, ExpandableQuerysetMixin, generics.ListAPIView):
     serializer_class = TaskSerializer
     lookup_field = 'project_id'
-    permission_classes = (IsTaskProjectMember, )
+    permission_classes = (IsVersionedProjectMember, )
+    filter_backends = (DjangoFilterBackend, )
+    filterset_class = TaskFilter
 
     def get_queryset(self):
-        return Task.objects.filter(project_id=self.kwargs['project_id'])
+        return member_scoped(Task.objects.filter(project_id=self.kwargs['project_id']), self.request.user) \
+            .order_by('due_date', 'id')
+
+    def get_cache_scope(self):
+        return project_tasks_scope(self.kwargs['project_id'])
+
+    @project_condition('project_id')
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
 class TaskCreateAPIView(generics.CreateAPIView):
@@ -19,11 +46,107 @@ class TaskCreateAPIView(generics.CreateAPIView):
     permission_classes = (IsManager, IsTaskProjectMember)
 
 
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TaskBulkCreateAPIView(generics.GenericAPIView):
+    """
+    Creates a list of tasks in one transaction. Invalid items are reported by index and skipped,
+    unless ?atomic=true is given, in which case nothing is created.
+    """
+    serializer_class = BulkCreateTaskSerializer
+    permission_classes = (IsManager, IsTaskProjectMember)
+    developers = None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['developers'] = self.developers
+        context['project_id'] = self.kwargs['project_id']
+        return context
+
+    @staticmethod
+    def developer_ids(items):
+        ids = set()
+        for item in items:
+            try:
+                ids.add(int(item.get('developer')))
+            except (AttributeError, TypeError, ValueError):
+                pass
+        return ids
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Expected a list of tasks.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.TASK_BULK_MAX_ITEMS:
+            return Response({'detail': 'At most {} tasks can be created at once.'.format(settings.TASK_BULK_MAX_ITEMS)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        self.developers = project_user_types(self.kwargs['project_id'], self.developer_ids(items))
+        tasks = []
+        errors = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                tasks.append(serializer.build())
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        if errors and (not tasks or request.query_params.get('atomic') == 'true'):
+            return Response({'created': 0, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=settings.TASK_BULK_BATCH_SIZE)
+            tasks_changed.send(sender=Task, removed=[], added=[task_state(task) for task in tasks])
+        return Response({'created': len(tasks), 'errors': errors},
+                        status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED)
+
+
+class TaskBulkUpdateAPIView(generics.GenericAPIView):
+    """
+    Changes status, developer or due date of many tasks at once. Developers can only change
+    the status of their own tasks.
+    """
+    serializer_class = BulkUpdateTaskSerializer
+    permission_classes = (IsTaskProjectMember, )
+
+    def patch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save())
+
+
+class TaskImportAPIView(generics.CreateAPIView):
+    """
+    Uploads a CSV or NDJSON file of tasks, imported in the background. The response is the job,
+    its progress is followed at the job detail URL.
+    """
+    serializer_class = TaskImportJobSerializer
+    permission_classes = (IsManager, IsTaskProjectMember)
+    parser_classes = (MultiPartParser, FormParser)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(project_id=self.kwargs['project_id'], created_by_id=request.user.pk)
+        # the worker must find the committed job
+        transaction.on_commit(lambda: task_import_tasks.delay(job.pk))
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class TaskImportJobDetailView(generics.RetrieveAPIView):
+    serializer_class = TaskImportJobSerializer
+    permission_classes = (IsTaskProjectMember, )
+
+    def get_queryset(self):
+        return TaskImportJob.objects.filter(project_id=self.kwargs['project_id'])
+
+
+class TaskDetailView(ExpandableQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TaskDetailViewSerializer
     lookup_field = 'pk'
-    permission_classes = (IsTaskProjectMember, IsTaskDeveloperOrManager)
+    permission_classes = (IsProjectMember, IsTaskDeveloperOrManager)
 
     def get_queryset(self):
-        return Task.objects.filter(project_id=self.kwargs['project_id'])
+        return with_membership(Task.objects.filter(project_id=self.kwargs['project_id']), self.request.user,
+                               'project_id')
 
+    @task_condition()
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
@@ -2,6 +2,7 @@
 ASGI config for src project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The task event streams are served here, see projects.streams.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
@@ -9,8 +10,19 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'src.settings')
 
-application = get_asgi_application()
+try:
+    from django.core.asgi import get_asgi_application
+except ImportError:
+    # Django < 3.0 has no ASGI handler, its requests run in a thread pool
+    from asgiref.wsgi import WsgiToAsgi
+    from django.core.wsgi import get_wsgi_application
+
+    django_application = WsgiToAsgi(get_wsgi_application())
+else:
+    django_application = get_asgi_application()
+
+from projects.streams import router  # noqa: E402, the apps are loaded above
+
+application = router(django_application)
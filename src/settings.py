@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
+import datetime
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework.authtoken',
     'drf_yasg',
+    'django_filters',
 
     'celery',
 
@@ -98,6 +100,63 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# locmem caches evict the least recently used entries above MAX_ENTRIES,
+# point them to a shared backend (memcached, redis) when running several processes
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    # the other workers keep granting or denying access to a project for up to TIMEOUT seconds after
+    # a membership change, see users.caching.invalidate
+    'membership': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'membership',
+        'TIMEOUT': 5,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    # the other workers accept a logged out token or the old user for up to TIMEOUT seconds,
+    # see users.caching.invalidate
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tokens',
+        'TIMEOUT': 5,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # revoked and outdated JWTs until they expire. The JWT mode refuses to start with a per-process
+    # backend, see users.checks
+    'jwt_denylist': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'jwt_denylist',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+
+PROJECT_MEMBERSHIP_CACHE = 'membership'
+# cache of the project, task and user list responses
+LIST_RESPONSE_CACHE = 'responses'
+# authenticated tokens and their users
+TOKEN_AUTH_CACHE = 'tokens'
+JWT_DENYLIST_CACHE = 'jwt_denylist'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -142,7 +201,7 @@ AUTH_USER_MODEL = 'users.User'
 
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'projects.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -150,10 +209,17 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
 }
 
+# Opt-in JWT mode, see users.jwt. Access tokens carry user_type and project ids. Enabled by appending
+# 'users.jwt.JWTClaimsAuthentication' to DEFAULT_AUTHENTICATION_CLASSES, with a shared 'jwt_denylist' cache
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': datetime.timedelta(minutes=5),
+    'REFRESH_TOKEN_LIFETIME': datetime.timedelta(days=1),
+}
+
 REST_REGISTRATION = {
     'REGISTER_VERIFICATION_ENABLED': False,
     'RESET_PASSWORD_VERIFICATION_ENABLED': False,
@@ -166,6 +232,47 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/Minsk'
 
+# Project member endpoints, users added or removed at once
+PROJECT_MEMBERS_MAX_ITEMS = 5000
+PROJECT_MEMBERS_BATCH_SIZE = 500
+
+# Task activity log, buffered in process and written with bulk_create once this many
+# changes are buffered or the oldest is this many seconds old. 0 writes every change on commit.
+TASK_ACTIVITY_BUFFER_SIZE = 500
+TASK_ACTIVITY_FLUSH_SECONDS = 5
+
+# writes the task activity unbuffered during the tests
+TEST_RUNNER = 'src.test_runner.TestRunner'
+
+# Task event streams of src.asgi. LocalBackend only reaches the streams of the process making the change,
+# with several processes use 'projects.events.PostgresBackend'.
+TASK_EVENTS_BACKEND = 'projects.events.LocalBackend'
+# messages queued for a slow client before it is told to refetch
+TASK_EVENTS_QUEUE_SIZE = 100
+TASK_EVENTS_KEEPALIVE_SECONDS = 15
+# task events per message, a NOTIFY payload must stay under 8000 bytes
+TASK_EVENTS_BATCH_SIZE = 50
+
+# Bulk task endpoints
+TASK_BULK_MAX_ITEMS = 5000
+TASK_BULK_BATCH_SIZE = 500
+# rows fetched per round trip by the streaming task export
+TASK_EXPORT_CHUNK_SIZE = 2000
+# rows validated and written together by the task import, invalid rows reported at most
+TASK_IMPORT_BATCH_SIZE = 1000
+TASK_IMPORT_MAX_ERRORS = 100
+# bytes, larger uploads are rejected. The files are deleted once their import is over
+TASK_IMPORT_MAX_FILE_SIZE = 50 * 1024 * 1024
+# matches of a task search that are ranked and paginated, bounds the cost of common words
+TASK_SEARCH_MAX_RESULTS = 1000
+
+# Deadline reminders
+TASK_REMINDER_WINDOW_DAYS = 3
+TASK_REMINDER_SHARDS = 8
+TASK_REMINDER_CHUNK_SIZE = 500
+# one message per developer instead of one per task
+TASK_REMINDER_DIGEST = True
+
 # Emails
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_USE_TLS = True
@@ -173,3 +280,16 @@ EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_HOST_USER = 'mail@example.com'
 EMAIL_HOST_PASSWORD = 'password'
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Email outbox dispatcher
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_POOL_SIZE = 2
+# messages per second and burst size of the send rate limiter
+OUTBOX_SEND_RATE = 10
+OUTBOX_SEND_BURST = 20
+OUTBOX_MAX_ATTEMPTS = 5
+# seconds a dispatcher holds the emails it claimed, they are sent again if it dies before recording the sends
+OUTBOX_CLAIM_SECONDS = 300
+# seconds before the first retry, doubled on each further attempt
+OUTBOX_RETRY_BACKOFF = 60
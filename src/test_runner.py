@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Writes the task activity unbuffered, rows buffered by one test would be written in another's database.
+    The tests of the buffer enable it with override_settings.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.TASK_ACTIVITY_BUFFER_SIZE = 0
+
+    def teardown_test_environment(self, **kwargs):
+        from projects import activity
+        activity.buffer.take()
+        super().teardown_test_environment(**kwargs)
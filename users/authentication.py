@@ -0,0 +1,48 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from users import caching
+
+
+def _cache():
+    return caches[settings.TOKEN_AUTH_CACHE]
+
+
+def _key(token_key):
+    # the token itself stays out of a shared cache backend
+    return 'token:{}'.format(hashlib.sha256(token_key.encode()).hexdigest())
+
+
+def invalidate_tokens(token_keys):
+    keys = [_key(token_key) for token_key in token_keys]
+    if not keys:
+        return
+    caching.invalidate(lambda: _cache().delete_many(keys))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication keeping token -> user in settings.TOKEN_AUTH_CACHE, so an authenticated
+    request needs no query. Entries are dropped when the token is deleted or the user is saved or
+    deleted, see users.signals.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = _cache()
+        token = cache.get(_key(key))
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            if token.user.is_active:
+                cache.set(_key(key), token)
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return token.user, token
@@ -0,0 +1,15 @@
+from django.db import transaction
+
+
+def invalidate(clear):
+    """
+    Runs clear now and again once the current transaction commits.
+
+    Clearing only before the commit is not enough: a concurrent request may still read the old rows
+    and cache them again until the transaction commits. The caches are per process (locmem) by
+    default, so clear only reaches the entries of the process making the change, the other processes
+    keep serving theirs until they expire. Keep the timeout of such a cache at a few seconds, or point
+    it to a shared backend (memcached, redis) and raise it.
+    """
+    clear()
+    transaction.on_commit(clear)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+JWT_AUTHENTICATION = 'users.jwt.JWTClaimsAuthentication'
+
+# caches whose entries only the process writing them sees
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def jwt_denylist_check(app_configs, **kwargs):
+    """
+    The JWT mode needs a denylist shared by all processes, a revoked or outdated access token
+    is accepted by every process which did not see the change until it expires
+    """
+    if JWT_AUTHENTICATION not in settings.REST_FRAMEWORK.get('DEFAULT_AUTHENTICATION_CLASSES', ()):
+        return []
+    if settings.CACHES[settings.JWT_DENYLIST_CACHE]['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        'The JWT denylist cache {!r} is local to the process.'.format(settings.JWT_DENYLIST_CACHE),
+        hint='Point it to a shared backend (memcached, redis) or remove {} from '
+             'DEFAULT_AUTHENTICATION_CLASSES.'.format(JWT_AUTHENTICATION),
+        id='users.E001',
+    )]
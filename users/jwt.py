@@ -0,0 +1,115 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTTokenUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users import caching
+
+
+def _cache():
+    return caches[settings.JWT_DENYLIST_CACHE]
+
+
+def _revoked_key(jti):
+    return 'jwt_revoked:{}'.format(jti)
+
+
+def _stale_key(user_id):
+    return 'jwt_stale:{}'.format(user_id)
+
+
+def access_token(user, refresh):
+    """
+    An access token of the refresh token carrying the user type and project ids of user
+    """
+    access = refresh.access_token
+    # a float, so a token issued right after its claims became outdated is told apart
+    access['iat'] = time.time()
+    access['user_type'] = user.user_type
+    access['project_ids'] = sorted(user.projects.values_list('id', flat=True))
+    return access
+
+
+def issue_tokens(user):
+    refresh = RefreshToken.for_user(user)
+    return {'refresh': str(refresh), 'access': str(access_token(user, refresh))}
+
+
+def revoke(token):
+    """
+    Denies the token until it expires, so the denylist only holds tokens that would still be accepted
+    """
+    timeout = math.ceil(token['exp'] - time.time())
+    if timeout > 0:
+        _cache().set(_revoked_key(token[jwt_settings.JTI_CLAIM]), True, timeout)
+
+
+def is_revoked(token):
+    return _cache().get(_revoked_key(token[jwt_settings.JTI_CLAIM])) is not None
+
+
+def mark_claims_stale(user_ids):
+    """
+    Denies the access tokens issued to the users so far, their user type or projects changed.
+    The clients get fresh claims from the refresh endpoint.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    timeout = math.ceil(jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+
+    def mark():
+        now = time.time()
+        _cache().set_many({_stale_key(user_id): now for user_id in user_ids}, timeout)
+
+    caching.invalidate(mark)
+
+
+class ClaimsUser(TokenUser):
+    """
+    The user of a JWT, answering is_manager and the membership checks from the token claims
+    """
+
+    @cached_property
+    def user_type(self):
+        return self.token.get('user_type')
+
+    @property
+    def is_manager(self):
+        return self.user_type == 'Manager'
+
+    @property
+    def is_developer(self):
+        return self.user_type == 'Developer'
+
+    @cached_property
+    def project_ids(self):
+        return frozenset(self.token.get('project_ids', ()))
+
+
+class JWTClaimsAuthentication(JWTTokenUserAuthentication):
+    """
+    Stateless authentication with the access tokens of users.views.JWTLoginAPIView. The user is built
+    from the token claims, only the denylist of settings.JWT_DENYLIST_CACHE is looked up.
+    """
+
+    def get_user(self, validated_token):
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('Token contained no recognizable user identification')
+        keys = (_revoked_key(validated_token[jwt_settings.JTI_CLAIM]),
+                _stale_key(validated_token[jwt_settings.USER_ID_CLAIM]))
+        denied = _cache().get_many(keys)
+        if keys[0] in denied:
+            raise exceptions.AuthenticationFailed('Token is revoked.', code='token_revoked')
+        if keys[1] in denied and validated_token.get('iat', 0) <= denied[keys[1]]:
+            raise exceptions.AuthenticationFailed('Token claims are outdated, refresh it.', code='token_outdated')
+        return ClaimsUser(validated_token)
@@ -3,15 +3,21 @@ from django.contrib.auth import authenticate
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
+from projects.serializers.dynamic import DynamicFieldsMixin
+from .jwt import is_revoked
 from .models import User
 
 
-class UserSerializer(ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, ModelSerializer):
 
     class Meta:
         model = User
         fields = (
+            'id',
             'username',
             'user_type',
             'email',
@@ -65,7 +71,31 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Cannot log in with provided credentials')
 
 
-class UserRetrieveUpdateDestroySerializer(serializers.ModelSerializer):
+class JWTRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=True)
+
+    def __init__(self, *args, **kwargs):
+        super(JWTRefreshSerializer, self).__init__(*args, **kwargs)
+        self.user = None
+
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(str(error))
+        if is_revoked(token):
+            raise serializers.ValidationError('Token is revoked.')
+        return token
+
+    def validate(self, attrs):
+        self.user = User.objects.filter(pk=attrs['refresh'][jwt_settings.USER_ID_CLAIM], is_active=True).first()
+        if self.user:
+            return attrs
+        else:
+            raise serializers.ValidationError('User inactive or deleted.')
+
+
+class UserRetrieveUpdateDestroySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('username',
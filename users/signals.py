@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from users.authentication import invalidate_tokens
+from users.jwt import mark_claims_stale
+from users.models import User
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def user_token_changed(sender, instance, created, update_fields, **kwargs):
+    # deactivation, a new user_type and any other change reach the cached user,
+    # the last_login update of a login does not
+    if not created and update_fields != frozenset(['last_login']):
+        invalidate_tokens(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+        mark_claims_stale([instance.pk])
@@ -1,12 +1,24 @@
+import datetime
 import json
+from unittest import mock
 
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.hashers import make_password
-from django.contrib.auth import login
 
 from rest_framework.authtoken.models import Token
-from rest_framework.test import APITestCase
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.views import APIView
 
+from projects.models import Project, Task
+from users.authentication import CachedTokenAuthentication
+from users.checks import JWT_AUTHENTICATION, jwt_denylist_check
+from users.jwt import JWTClaimsAuthentication
 from users.models import User
 
 
@@ -158,9 +170,9 @@ class UserDetailAPIViewTestCase(APITestCase):
         content = json.loads(response.content).get('username')
         self.assertTrue(content == "developer")
         response = self.client.put(url, {'username': 'dev1',
-                                              'email': self.developer.email,
-                                              'user_type': self.developer.user_type,
-                                              'password': self.developer.password})
+                                         'email': self.developer.email,
+                                         'user_type': self.developer.user_type,
+                                         'password': self.developer.password})
         content = json.loads(response.content).get('username')
         self.assertTrue(content == "dev1")
 
@@ -183,3 +195,214 @@ class UserDetailAPIViewTestCase(APITestCase):
                                          'password': self.developer.password})
         content = json.loads(response.content).get('username')
         self.assertTrue(content == "dev1")
+
+
+class MyTaskListAPIViewTestCase(APITestCase):
+    url = reverse('users:my_tasks')
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="sdfsdg@sdgsdx.xcs",
+            password=make_password("1111"),
+        )
+        self.other_developer = User.objects.create(
+            username="other",
+            user_type="Developer",
+            email="other@sdgsdx.xcs",
+            password=make_password("1111"),
+        )
+        self.today = datetime.date.today()
+        self.projects = [Project.objects.create(title='project {}'.format(number), description='descr')
+                         for number in range(3)]
+        for project in self.projects[:2]:
+            project.members.set((self.developer, self.other_developer))
+        # the last project no longer has the developer as a member
+        for number in range(18):
+            Task.objects.create(title='task {}'.format(number), description='descr',
+                                due_date=self.today + datetime.timedelta(days=number - 4),
+                                status=Task.TASK_STATUSES[number % 3][0],
+                                developer=self.developer, project=self.projects[number % 3])
+        Task.objects.create(title='not mine', description='descr', developer=self.other_developer,
+                            project=self.projects[0])
+        self.expected = Task.objects.filter(developer=self.developer, project__in=self.projects[:2]) \
+            .order_by('due_date', 'id')
+        self.developer_token = Token.objects.create(user=self.developer)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.developer_token.key)
+
+    def test_tasks_across_projects(self):
+        content = json.loads(self.client.get(self.url, {'pagination': 'cursor'}).content)
+        self.assertEqual(content['results'][0]['project_title'], self.expected[0].project.title)
+        results = content['results']
+        while content['next']:
+            content = json.loads(self.client.get(content['next']).content)
+            results += content['results']
+        self.assertEqual([task['id'] for task in results], [task.id for task in self.expected])
+
+    def test_single_list_query(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            # the task page, the token is cached
+            response = self.client.get(self.url, {'pagination': 'cursor'})
+        self.assertEqual(200, response.status_code)
+
+    def test_filters(self):
+        response = self.client.get(self.url, {'status': ['To do', 'In progress'], 'overdue': 'true',
+                                              'ordering': '-due_date'})
+        expected = self.expected.filter(due_date__lt=self.today).exclude(status='Done').order_by('-due_date', '-id')
+        self.assertEqual([task['id'] for task in json.loads(response.content)['results']],
+                         [task.id for task in expected])
+
+    def test_not_authenticated(self):
+        self.client.credentials()
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+    url = reverse('users:users_list')
+
+    def setUp(self):
+        caches[settings.TOKEN_AUTH_CACHE].clear()
+        self.manager = User.objects.create(
+            username="manager",
+            user_type="Manager",
+            email="sfsdf@sdfds.com",
+            password=make_password("1111"),
+        )
+        self.token = Token.objects.create(user=self.manager)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def detail(self):
+        return json.loads(self.client.get(self.url).content).get('detail')
+
+    def test_cached_lookup_needs_no_query(self):
+        authentication = CachedTokenAuthentication()
+        with self.assertNumQueries(1):
+            self.assertEqual(authentication.authenticate_credentials(self.token.key)[0], self.manager)
+        with self.assertNumQueries(0):
+            self.assertEqual(authentication.authenticate_credentials(self.token.key)[0], self.manager)
+
+    def test_user_changes_are_seen(self):
+        self.assertEqual(200, self.client.get(self.url).status_code)
+        self.manager.user_type = 'Developer'
+        self.manager.save()
+        self.assertEqual(403, self.client.get(self.url).status_code)
+        self.manager.is_active = False
+        self.manager.save()
+        self.assertEqual(self.detail(), 'User inactive or deleted.')
+
+    def test_deleted_token_is_rejected(self):
+        self.assertEqual(200, self.client.get(self.url).status_code)
+        self.token.delete()
+        self.assertEqual(self.detail(), 'Invalid token.')
+
+    def test_logout_deletes_the_token(self):
+        self.assertEqual(200, self.client.get(self.url).status_code)
+        self.client.get(reverse('users:logout'))
+        self.assertFalse(Token.objects.filter(user=self.manager).exists())
+        self.assertEqual(self.detail(), 'Invalid token.')
+
+
+class JWTAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.PROJECT_MEMBERSHIP_CACHE].clear()
+        caches[settings.JWT_DENYLIST_CACHE].clear()
+        # the JWT mode is opt-in, enabled the way DEFAULT_AUTHENTICATION_CLASSES would
+        authentication = mock.patch.object(APIView, 'authentication_classes',
+                                           api_settings.DEFAULT_AUTHENTICATION_CLASSES + [JWTClaimsAuthentication])
+        authentication.start()
+        self.addCleanup(authentication.stop)
+        self.developer = User.objects.create(
+            username="developer",
+            user_type="Developer",
+            email="sdfsdg@sdgsdx.xcs",
+            password=make_password("1111"),
+        )
+        self.project = Project.objects.create(title='abc', description='asdasdasd')
+        self.other_project = Project.objects.create(title='other', description='asdasdasd')
+        self.project.members.set((self.developer, ))
+        self.tokens = self.login()
+
+    def login(self):
+        response = self.client.post(reverse('users:jwt_login'), {'username': 'developer', 'password': '1111'})
+        self.assertEqual(200, response.status_code)
+        return json.loads(response.content)
+
+    def get(self, url, access):
+        return self.client.get(url, HTTP_AUTHORIZATION='Bearer ' + access)
+
+    def tasks_url(self, project):
+        return reverse('projects:tasks_list', kwargs={'project_id': project.id})
+
+    def test_claims_answer_permissions_without_queries(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION='Bearer ' + self.tokens['access'])
+        with self.assertNumQueries(0):
+            user, _ = JWTClaimsAuthentication().authenticate(request)
+        self.assertEqual((user.pk, user.is_developer, user.project_ids),
+                         (self.developer.pk, True, frozenset([self.project.id])))
+
+        self.assertEqual(200, self.get(self.tasks_url(self.project), self.tokens['access']).status_code)
+        self.assertEqual(403, self.get(self.tasks_url(self.other_project), self.tokens['access']).status_code)
+        self.assertEqual(403, self.get(reverse('users:users_list'), self.tokens['access']).status_code)
+
+    def test_membership_from_claims(self):
+        urls = [reverse('projects:projects_list'),
+                reverse('projects:project_details', kwargs={'pk': self.project.id}),
+                self.tasks_url(self.project)]
+        with CaptureQueriesContext(connection) as queries:
+            for url in urls:
+                self.assertEqual(200, self.get(url, self.tokens['access']).status_code)
+        # the members are still counted, the membership of the user is not looked up
+        membership = '"user_id" = {}'.format(self.developer.id)
+        self.assertFalse([query for query in queries if membership in query['sql']])
+        content = json.loads(self.get(urls[0], self.tokens['access']).content)
+        self.assertEqual([project['id'] for project in content['results']], [self.project.id])
+        url = reverse('projects:project_details', kwargs={'pk': self.other_project.id})
+        self.assertEqual(403, self.get(url, self.tokens['access']).status_code)
+
+    def test_outdated_claims_need_a_refresh(self):
+        self.other_project.members.add(self.developer)
+        response = self.get(self.tasks_url(self.other_project), self.tokens['access'])
+        self.assertEqual(json.loads(response.content)['detail'], 'Token claims are outdated, refresh it.')
+
+        response = self.client.post(reverse('users:jwt_refresh'), {'refresh': self.tokens['refresh']})
+        access = json.loads(response.content)['access']
+        self.assertEqual(200, self.get(self.tasks_url(self.other_project), access).status_code)
+
+    def test_revoke(self):
+        response = self.client.post(reverse('users:jwt_revoke'), {'refresh': self.tokens['refresh']},
+                                    HTTP_AUTHORIZATION='Bearer ' + self.tokens['access'])
+        self.assertEqual(204, response.status_code)
+        response = self.get(self.tasks_url(self.project), self.tokens['access'])
+        self.assertEqual(json.loads(response.content)['detail'], 'Token is revoked.')
+        response = self.client.post(reverse('users:jwt_refresh'), {'refresh': self.tokens['refresh']})
+        self.assertEqual(400, response.status_code)
+
+    def test_inactive_user_cannot_refresh(self):
+        self.developer.is_active = False
+        self.developer.save()
+        response = self.client.post(reverse('users:jwt_refresh'), {'refresh': self.tokens['refresh']})
+        self.assertEqual(400, response.status_code)
+
+
+class JWTDenylistCheckTestCase(SimpleTestCase):
+
+    def jwt_settings(self, backend):
+        caches_setting = dict(settings.CACHES)
+        caches_setting[settings.JWT_DENYLIST_CACHE] = {'BACKEND': backend}
+        rest_framework = dict(settings.REST_FRAMEWORK, DEFAULT_AUTHENTICATION_CLASSES=[JWT_AUTHENTICATION])
+        return override_settings(CACHES=caches_setting, REST_FRAMEWORK=rest_framework)
+
+    def test_process_local_denylist(self):
+        with self.jwt_settings('django.core.cache.backends.locmem.LocMemCache'):
+            self.assertEqual([error.id for error in jwt_denylist_check(None)], ['users.E001'])
+
+    def test_shared_denylist(self):
+        with self.jwt_settings('django.core.cache.backends.memcached.MemcachedCache'):
+            self.assertEqual(jwt_denylist_check(None), [])
+
+    def test_jwt_mode_disabled(self):
+        self.assertEqual(jwt_denylist_check(None), [])
@@ -7,6 +7,10 @@ urlpatterns = [
     path('register/', views.UserRegistrationAPIView.as_view(), name="registration"),
     path('login/', views.UserLoginAPIView.as_view(), name="login"),
     path('logout/', views.Logout.as_view(), name="logout"),
+    path('jwt/login/', views.JWTLoginAPIView.as_view(), name="jwt_login"),
+    path('jwt/refresh/', views.JWTRefreshAPIView.as_view(), name="jwt_refresh"),
+    path('jwt/revoke/', views.JWTRevokeAPIView.as_view(), name="jwt_revoke"),
     path('users/', views.UserListAPIView.as_view(), name="users_list"),
+    path('users/me/tasks/', views.MyTaskListAPIView.as_view(), name="my_tasks"),
     path('users/<pk>/', views.UserDetailView.as_view(), name="user_details"),
 ]
@@ -1,32 +1,63 @@
 from .serializers import *
-from rest_framework import generics, views
+from rest_framework import generics, permissions, views
 from .permissions import IsManager, IsOwnerOrManager
 from rest_framework import status
 from rest_framework.response import Response
 
 from django.contrib.auth import login, logout
 
+from rest_framework.authtoken.models import Token
 
-from .serializers import UserLoginSerializer, UserRegistrationSerializer, UserRetrieveUpdateDestroySerializer
+from django_filters.rest_framework import DjangoFilterBackend
+
+from projects.filters import DeveloperTaskFilter
+from projects.models import Task
+from projects.membership import member_project_ids
+from projects.response_cache import CachedListMixin
+from projects.serializers.dynamic import ExpandableQuerysetMixin
+from projects.serializers.fast import FastListMixin
+from projects.serializers.task_serializers import DeveloperTaskSerializer
+
+
+from .jwt import ClaimsUser, access_token, issue_tokens, revoke
+from .serializers import JWTRefreshSerializer, UserLoginSerializer, UserRegistrationSerializer, \
+    UserRetrieveUpdateDestroySerializer
 
 
 class UserRegistrationAPIView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
 
 
-class UserListAPIView(generics.ListAPIView):
+class UserListAPIView(CachedListMixin, FastListMixin, ExpandableQuerysetMixin, generics.ListAPIView):
     serializer_class = UserRetrieveUpdateDestroySerializer
     permission_classes = (IsManager, )
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('id')
+    cache_scope = 'users'
 
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserDetailView(ExpandableQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserRetrieveUpdateDestroySerializer
     lookup_field = 'pk'
     queryset = User.objects.all()
     permission_classes = (IsOwnerOrManager, )
 
 
+class MyTaskListAPIView(FastListMixin, ExpandableQuerysetMixin, generics.ListAPIView):
+    """
+    The caller's tasks in all of their projects, with the project titles, in one query
+    """
+    serializer_class = DeveloperTaskSerializer
+    permission_classes = (permissions.IsAuthenticated, )
+    filter_backends = (DjangoFilterBackend, )
+    filterset_class = DeveloperTaskFilter
+
+    def get_queryset(self):
+        user = self.request.user
+        # by developer_id, a JWT user is not a model instance
+        return Task.objects.filter(developer_id=user.pk, project_id__in=member_project_ids(user)) \
+            .select_related('project').order_by('due_date', 'id')
+
+
 class UserLoginAPIView(generics.GenericAPIView):
     serializer_class = UserLoginSerializer
 
@@ -49,6 +80,49 @@ class UserLoginAPIView(generics.GenericAPIView):
 
 class Logout(views.APIView):
     def get(self, request):
-        # simply delete the token to force a login
+        # delete the token to force a login, which also drops it from the token cache
+        if isinstance(request.auth, Token):
+            request.auth.delete()
         logout(request)
         return Response(status=status.HTTP_200_OK)
+
+
+class JWTLoginAPIView(generics.GenericAPIView):
+    """
+    Opt-in stateless mode: a refresh token and a short-lived access token carrying the user type
+    and project ids, sent as "Authorization: Bearer <access>"
+    """
+    serializer_class = UserLoginSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(data=issue_tokens(serializer.user), status=status.HTTP_200_OK)
+
+
+class JWTRefreshAPIView(generics.GenericAPIView):
+    """
+    A new access token with the current user type and project ids
+    """
+    serializer_class = JWTRefreshSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        access = access_token(serializer.user, serializer.validated_data['refresh'])
+        return Response(data={'access': str(access)}, status=status.HTTP_200_OK)
+
+
+class JWTRevokeAPIView(generics.GenericAPIView):
+    """
+    Logout of the JWT mode: denies the refresh token and the access token of the request
+    """
+    serializer_class = JWTRefreshSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke(serializer.validated_data['refresh'])
+        if isinstance(request.user, ClaimsUser):
+            revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)